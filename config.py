@@ -123,6 +123,40 @@ TOUCHSCREEN_KEYWORDS = [
 
 USERNAME = os.getenv('USERNAME', 'User')
 
+APP_DATA_DIR = os.path.join(os.getenv('APPDATA') or os.path.expanduser('~'), 'bobrik')
+
+APP_VERSION = "1.1.4"
+
+# Фоновая проверка обновлений bobrik
+UPDATES_DIR = os.path.join(APP_DATA_DIR, 'updates')
+
+# Установленные версии: versions/<версия>/bobrik.exe, текущая указана в current.json
+VERSIONS_DIR = os.path.join(APP_DATA_DIR, 'versions')
+VERSION_POINTER = os.path.join(APP_DATA_DIR, 'current.json')
+HEALTH_TIMEOUT = 20  # Сколько ждать подтверждения запуска новой версии (сек)
+
+UPDATE_CHECK = {
+    'first_delay_s': 120,       # Первая проверка после запуска
+    'interval_hours': 6,        # Обычный интервал проверки
+    'retry_min': 5,             # Повтор после ошибки (удваивается до max_backoff_hours)
+    'max_backoff_hours': 24
+}
+
+DOWNLOAD_CACHE = {
+    'dir': os.path.join(APP_DATA_DIR, 'cache'),
+    'max_size_mb': 1024
+}
+
+# Раздача кэша загрузок соседним кассам в локальной сети
+# (у соседей берутся только файлы с хэшем из каталога программ или version.json)
+PEER_CACHE = {
+    'enabled': False,
+    'port': 8765,            # HTTP-сервер кэша
+    'discovery_port': 8766,  # UDP-поиск соседей
+    'discovery': True,       # Искать соседей широковещательным запросом
+    'peers': []              # Адреса соседей вручную: ['192.168.1.20:8765']
+}
+
 IIKO_PATHS = {
     'executable': r"C:\Program Files\iiko\iikoRMS\Front.Net\iikoFront.Net.exe",
     'logs': f"C:\\Users\\{USERNAME}\\AppData\\Roaming\\iiko\\CashServer\\Logs",
@@ -132,6 +166,9 @@ IIKO_PATHS = {
     'entities_db': f"C:\\Users\\{USERNAME}\\AppData\\Roaming\\iiko\\CashServer\\EntitiesStorage\\Entities"
 }
 
+# Версия iikoFront для подбора плагинов ("8.9.6028.0"); None - из свойств iikoFront.Net.exe
+IIKO_FRONT_VERSION = None
+
 SYSTEM_PATHS = {
     'notepad_plus': r"C:\Program Files\Notepad++\notepad++.exe",
     'startup_folder': f"C:\\Users\\{USERNAME}\\AppData\\Roaming\\Microsoft\\Windows\\Start Menu\\Programs\\Startup",
@@ -142,8 +179,46 @@ SYSTEM_PATHS = {
     ]
 }
 
+# Страницы плагинов на rapid.iiko.ru
+PLUGINS_CONFIG = {
+    'AlcoholMarkingPlugin': 'https://rapid.iiko.ru/plugins/AlcoholMarkingPlugin/',
+    'OnlineMarkingVerification': 'https://rapid.iiko.ru/plugins/Resto%20OnlineMarkingVerification/',
+    'Sberbank': 'https://rapid.iiko.ru/plugins/Smart%20Sberbank/',
+    'DualConnector': 'https://rapid.iiko.ru/plugins/Resto.Front.Api.PaymentSystem.DualConnector/',
+    'Arrivals': 'https://rapid.iiko.ru/plugins/Arrivals/'
+}
+
 IIKO_CARD_URL = "https://m1.iiko.cards/ru-RU/About/DownloadPosInstaller?useRc=False"
 
+# Ограничение скорости фоновых загрузок, чтобы не мешать платежам и синхронизации iiko
+BANDWIDTH_LIMIT = {
+    'max_kbps': 0,                  # Потолок скорости, 0 - без ограничения
+    'adaptive': True,               # Снижать скорость при росте задержки до сервера iiko
+    'probe_host': 'm1.iiko.cards',
+    'latency_threshold_ms': 250,
+    'min_kbps': 64
+}
+
+# Сохраненные списки версий плагинов (показываются сразу, обновляются в фоне)
+PLUGIN_INDEX_CACHE = os.path.join(APP_DATA_DIR, 'plugin_index.json')
+
+# Длительности прошлых установок по каждому установщику
+INSTALL_DURATIONS_FILE = os.path.join(APP_DATA_DIR, 'install_durations.json')
+
+# Каталог программ (catalog.json в репозитории) и его последняя загруженная копия
+PROGRAM_CATALOG_URL = "https://raw.githubusercontent.com/Feuda1/bobrik/main/catalog.json"
+PROGRAM_CATALOG_CACHE = os.path.join(APP_DATA_DIR, 'program_catalog.json')
+
+# Профили новой кассы: программы из каталога (catalog.json) и плагины из PLUGINS_CONFIG
+PROFILES_FILE = os.path.join(APP_DATA_DIR, 'profiles.json')
+
+DEFAULT_PROFILES = {
+    'Новая касса': {
+        'programs': ['anydesk', 'assistant', 'notepad_plus', '7zip', 'iikotools', 'com_port_checker'],
+        'plugins': []  # например {'name': 'Sberbank', 'version': None} - последняя версия
+    }
+}
+
 LOG_KEYWORDS = [
     'cash-server',
     'virtual-printer', 
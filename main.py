@@ -6,6 +6,7 @@ from PyQt6.QtGui import QPalette, QColor
 from PyQt6.QtCore import Qt
 from ui.main_window import MainWindow
 from simple_startup import setup_startup_if_first_run
+from managers.version_slots import launch_current_version, confirm_started
 
 def is_admin():
     try:
@@ -50,6 +51,10 @@ def main():
     else:
         print("Программа запущена с правами администратора.")
     
+    # После обновления этот exe только запускает актуальную версию из versions/
+    if launch_current_version():
+        sys.exit(0)
+    
     # Настраиваем автозагрузку при первом запуске
     setup_startup_if_first_run()
     
@@ -63,6 +68,9 @@ def main():
     
     window = MainWindow()
     
+    # Подтверждаем запуск новой версии, иначе прежняя откатит обновление
+    confirm_started()
+    
     sys.exit(app.exec())
 
 if __name__ == "__main__":
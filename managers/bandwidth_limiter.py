@@ -0,0 +1,142 @@
+import socket
+import threading
+import time
+from config import BANDWIDTH_LIMIT
+
+
+class BandwidthLimiter:
+    """Ограничитель скорости загрузок (token bucket), общий для всех потоков
+
+    В адаптивном режиме фоновый поток периодически замеряет время TCP-соединения
+    с сервером iiko и снижает скорость, пока задержка выше порога
+    (AIMD: уменьшение вдвое, плавное восстановление).
+    """
+
+    def __init__(self, max_rate=0, adaptive=False, probe_host=None, probe_port=443,
+                 latency_threshold=0.25, min_rate=64 * 1024, probe_interval=2.0):
+        self.max_rate = max_rate
+        self.adaptive = adaptive
+        self.probe_host = probe_host
+        self.probe_port = probe_port
+        self.latency_threshold = latency_threshold
+        self.min_rate = min_rate
+        self.probe_interval = probe_interval
+
+        self.rate = max_rate
+        self.last_latency = None
+
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        self._consumed = 0
+        self._last_activity = 0.0
+        self._observed_rate = 0.0
+        self._probe_thread = None
+        self._probe_address = None
+
+    def consume(self, amount):
+        """Учитывает amount байт и при необходимости приостанавливает поток"""
+        wait = 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._consumed += amount
+            self._last_activity = now
+            rate = self.rate
+
+            if rate > 0:
+                burst = rate * 0.5
+                self._tokens = min(burst, self._tokens + (now - self._updated) * rate)
+                self._tokens -= amount
+                if self._tokens < 0:
+                    wait = -self._tokens / rate
+            self._updated = now
+
+        if self.adaptive:
+            self._ensure_probe()
+
+        if wait > 0:
+            time.sleep(wait)
+
+    def max_chunk_size(self, default):
+        """Размер блока чтения, при котором ограничение остается плавным"""
+        rate = self.rate
+        if rate <= 0:
+            return default
+        return max(4096, min(default, int(rate / 4)))
+
+    def _ensure_probe(self):
+        with self._lock:
+            if self._probe_thread and self._probe_thread.is_alive():
+                return
+            self._probe_thread = threading.Thread(target=self._probe_loop, daemon=True)
+            self._probe_thread.start()
+
+    def _measure_latency(self):
+        """Время установки TCP-соединения с сервером iiko (сек)"""
+        try:
+            if self._probe_address is None:
+                info = socket.getaddrinfo(self.probe_host, self.probe_port, type=socket.SOCK_STREAM)
+                self._probe_address = info[0][4][:2]
+            started = time.monotonic()
+            with socket.create_connection(self._probe_address, timeout=self.latency_threshold * 4):
+                pass
+            return time.monotonic() - started
+        except OSError:
+            # Таймаут или сброс соединения считаем признаком перегрузки канала
+            return self.latency_threshold * 4
+
+    def _probe_loop(self):
+        measured_at = time.monotonic()
+        while True:
+            time.sleep(self.probe_interval)
+            with self._lock:
+                idle = time.monotonic() - self._last_activity
+                now = time.monotonic()
+                throughput = self._consumed / max(now - measured_at, 0.001)
+                self._consumed = 0
+                measured_at = now
+            if idle > self.probe_interval * 5:
+                # Загрузок нет - поток не нужен
+                with self._lock:
+                    self._probe_thread = None
+                return
+
+            latency = self._measure_latency()
+            self.last_latency = latency
+            self._adjust(latency, throughput)
+
+    def _adjust(self, latency, throughput):
+        """Пересчитывает скорость по результату замера задержки"""
+        with self._lock:
+            if self.rate == 0:
+                self._observed_rate = max(self._observed_rate, throughput)
+
+            if latency > self.latency_threshold:
+                base = self.rate or throughput or self.min_rate
+                self.rate = max(self.min_rate, base * 0.5)
+            elif self.rate > 0:
+                self.rate *= 1.25
+                if self.max_rate and self.rate >= self.max_rate:
+                    self.rate = self.max_rate
+                elif not self.max_rate and self._observed_rate and self.rate >= self._observed_rate:
+                    # Канал снова свободен - снимаем ограничение
+                    self.rate = 0
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_bandwidth_limiter():
+    """Возвращает общий ограничитель скорости загрузок по настройкам из config.py"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = BandwidthLimiter(
+                max_rate=BANDWIDTH_LIMIT['max_kbps'] * 1024,
+                adaptive=BANDWIDTH_LIMIT['adaptive'],
+                probe_host=BANDWIDTH_LIMIT['probe_host'],
+                latency_threshold=BANDWIDTH_LIMIT['latency_threshold_ms'] / 1000,
+                min_rate=BANDWIDTH_LIMIT['min_kbps'] * 1024,
+            )
+        return _limiter
@@ -0,0 +1,138 @@
+# Каталог программ, с которым собрана эта версия bobrik.
+# Используется, пока не загружен опубликованный catalog.json; должен совпадать
+# с catalog.json в корне репозитория (проверяется тестом).
+DEFAULT_CATALOG = {
+    "version": 1,
+    "format": 1,
+    "programs": {
+        "7zip": {
+            "name": "7-Zip",
+            "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/7z2500-x64.exe",
+            "filename": "7z2500-x64.exe",
+            "silent_args": ["/S"],
+            "check_names": ["7-Zip", "7zip"],
+            "category": "utilities",
+            "waits": True
+        },
+        "advanced_ip_scanner": {
+            "name": "Advanced IP Scanner",
+            "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/Advanced_IP_Scanner_2.5.4594.1.exe",
+            "filename": "Advanced_IP_Scanner_2.5.4594.1.exe",
+            "silent_args": ["/VERYSILENT", "/NORESTART"],
+            "check_names": ["Advanced IP Scanner", "Advanced_IP_Scanner"],
+            "category": "network",
+            "segments": 4,
+            "location": "desktop",
+            "folder": "Advanced_IP_Scanner",
+            "waits": True
+        },
+        "anydesk": {
+            "name": "AnyDesk",
+            "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/AnyDesk.exe",
+            "filename": "AnyDesk.exe",
+            "silent_args": ["--install", "--silent"],
+            "check_names": ["AnyDesk"],
+            "category": "remote",
+            "location": "desktop"
+        },
+        "assistant": {
+            "name": "Ассистент",
+            "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/assistant_install_6.exe",
+            "filename": "assistant_install_6.exe",
+            "silent_args": ["/S"],
+            "check_names": ["Ассистент", "Assistant"],
+            "category": "utilities",
+            "folder": "Assistant",
+            "waits": True
+        },
+        "com_port_checker": {
+            "name": "Com Port Checker",
+            "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/ComPortChecker.1.1.zip",
+            "filename": "ComPortChecker.1.1.zip",
+            "silent_args": [],
+            "check_names": ["Com Port Checker", "ComPortChecker"],
+            "category": "utilities",
+            "is_zip": True,
+            "extract_and_run": "ComPortChecker.exe",
+            "location": "desktop",
+            "folder": "ComPortChecker"
+        },
+        "database_net": {
+            "name": "Database Net",
+            "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/DatabaseNet5Pro.zip",
+            "filename": "DatabaseNet5Pro.zip",
+            "silent_args": [],
+            "check_names": ["Database Net", "DatabaseNet"],
+            "category": "development",
+            "is_zip": True,
+            "extract_and_run": "setup.exe",
+            "segments": 4,
+            "location": "desktop",
+            "folder": "DatabaseNet"
+        },
+        "notepad_plus": {
+            "name": "Notepad++",
+            "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/npp.8.8.2.Installer.x64.exe",
+            "filename": "npp.8.8.2.Installer.x64.exe",
+            "silent_args": ["/S"],
+            "check_names": ["Notepad++", "notepad"],
+            "category": "utilities",
+            "folder": "Notepad_Plus",
+            "waits": True
+        },
+        "printer_test": {
+            "name": "Printer TEST V3.1C",
+            "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/Printer-TEST-V3.1C.zip",
+            "filename": "Printer-TEST-V3.1C.zip",
+            "silent_args": [],
+            "check_names": ["Printer TEST", "PrinterTEST"],
+            "category": "utilities",
+            "is_zip": True,
+            "extract_and_run": "PrinterTEST.exe",
+            "location": "desktop",
+            "folder": "PrinterTEST"
+        },
+        "rhelper": {
+            "name": "Rhelper",
+            "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/remote-access-setup.exe",
+            "filename": "remote-access-setup.exe",
+            "silent_args": ["/S"],
+            "check_names": ["Rhelper", "Remote Access"],
+            "category": "remote",
+            "notice": "🔑 Пароль для Rhelper: remote-access-setup",
+            "waits": True
+        },
+        "ordercheck": {
+            "name": "OrderCheck",
+            "url": "https://clearbat.iiko.online/downloads/OrderCheck.exe",
+            "filename": "OrderCheck.exe",
+            "location": "desktop"
+        },
+        "clear_bat": {
+            "name": "CLEAR.bat",
+            "url": "https://clearbat.iiko.online/downloads/CLEAR.bat.exe",
+            "filename": "CLEAR.bat.exe",
+            "location": "desktop",
+            "folder": "CLEAR_bat"
+        },
+        "iikotools": {
+            "name": "iikoTools",
+            "url": "https://fronttools.iiko.it/FrontTools.exe",
+            "filename": "FrontTools.exe",
+            "silent_args": [],
+            "check_names": ["iikoTools", "FrontTools"],
+            "category": "iiko",
+            "portable": True,
+            "location": "desktop"
+        },
+        "iikotools_sqlite": {
+            "name": "iikoTools SQLite",
+            "url": "https://fronttools.iiko.it/fronttools_sqlite.zip",
+            "filename": "fronttools_sqlite.zip",
+            "is_zip": True,
+            "segments": 4,
+            "location": "desktop",
+            "folder": "iikoTools_SQLite"
+        }
+    }
+}
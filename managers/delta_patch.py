@@ -0,0 +1,187 @@
+import os
+import lzma
+import struct
+import hashlib
+
+# Формат патча: заголовок + LZMA-поток операций.
+# Операции: COPY (смещение и длина блока в старом файле) и DATA (новые байты).
+MAGIC = b"BOBDELTA1"
+HEADER = struct.Struct("<9s32s32sQI")
+OP_COPY = b"C"
+OP_DATA = b"D"
+COPY_ARGS = struct.Struct("<QI")
+DATA_ARGS = struct.Struct("<I")
+
+DEFAULT_BLOCK_SIZE = 4096
+_MOD = 1 << 16
+
+
+class DeltaError(Exception):
+    """Патч не подходит к файлу или поврежден"""
+
+
+def file_sha256(path):
+    """SHA-256 файла (bytes)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.digest()
+
+
+def _weak_checksum(data):
+    """Слабая контрольная сумма rsync: (a, b) по модулю 2^16"""
+    a = sum(data) % _MOD
+    b = sum((len(data) - i) * byte for i, byte in enumerate(data)) % _MOD
+    return a, b
+
+
+def make_delta(old_path, new_path, patch_path, block_size=DEFAULT_BLOCK_SIZE):
+    """Создает патч old -> new (rsync-подобный поиск совпадающих блоков)
+
+    Используется при публикации релиза; работает медленно, но только один раз.
+    Возвращает размер патча.
+    """
+    with open(old_path, 'rb') as f:
+        old = f.read()
+    with open(new_path, 'rb') as f:
+        new = f.read()
+
+    # Индекс блоков старого файла: слабая сумма -> [(md5, смещение)]
+    blocks = {}
+    for offset in range(0, len(old) - block_size + 1, block_size):
+        block = old[offset:offset + block_size]
+        a, b = _weak_checksum(block)
+        blocks.setdefault((b << 16) | a, []).append((hashlib.md5(block).digest(), offset))
+
+    ops = bytearray()
+    literal_start = 0
+    pending_copy = None  # (смещение, длина) - соседние блоки объединяются
+
+    def flush_literal(end):
+        if end > literal_start:
+            ops.extend(OP_DATA + DATA_ARGS.pack(end - literal_start))
+            ops.extend(new[literal_start:end])
+
+    def flush_copy():
+        if pending_copy:
+            ops.extend(OP_COPY + COPY_ARGS.pack(*pending_copy))
+
+    pos = 0
+    a = b = None
+    while pos + block_size <= len(new):
+        if a is None:
+            a, b = _weak_checksum(new[pos:pos + block_size])
+
+        match = None
+        candidates = blocks.get((b << 16) | a)
+        if candidates:
+            strong = hashlib.md5(new[pos:pos + block_size]).digest()
+            for digest, offset in candidates:
+                if digest == strong:
+                    match = offset
+                    break
+
+        if match is not None:
+            if literal_start < pos:
+                flush_copy()
+                pending_copy = None
+                flush_literal(pos)
+            if pending_copy and pending_copy[0] + pending_copy[1] == match:
+                pending_copy = (pending_copy[0], pending_copy[1] + block_size)
+            else:
+                flush_copy()
+                pending_copy = (match, block_size)
+            pos += block_size
+            literal_start = pos
+            a = None
+            continue
+
+        # Сдвигаем окно на один байт
+        out_byte = new[pos]
+        in_byte = new[pos + block_size] if pos + block_size < len(new) else None
+        pos += 1
+        if in_byte is None:
+            break
+        a = (a - out_byte + in_byte) % _MOD
+        b = (b - block_size * out_byte + a) % _MOD
+
+    if literal_start < len(new):
+        flush_copy()
+        pending_copy = None
+        flush_literal(len(new))
+    flush_copy()
+
+    header = HEADER.pack(MAGIC, hashlib.sha256(old).digest(), hashlib.sha256(new).digest(),
+                         len(new), block_size)
+    with open(patch_path, 'wb') as f:
+        f.write(header)
+        f.write(lzma.compress(bytes(ops)))
+    return os.path.getsize(patch_path)
+
+
+def apply_delta(old_path, patch_path, new_path):
+    """Собирает новый файл из старого и патча, проверяя SHA-256 обоих
+
+    Возвращает SHA-256 (hex) собранного файла.
+    """
+    with open(patch_path, 'rb') as f:
+        header = f.read(HEADER.size)
+        if len(header) != HEADER.size:
+            raise DeltaError("Патч поврежден")
+        magic, old_sha256, new_sha256, new_size, _ = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise DeltaError("Неизвестный формат патча")
+        try:
+            ops = lzma.decompress(f.read())
+        except lzma.LZMAError as e:
+            raise DeltaError(f"Патч поврежден: {str(e)}") from e
+
+    if file_sha256(old_path) != old_sha256:
+        raise DeltaError("Патч предназначен для другой версии файла")
+
+    digest = hashlib.sha256()
+    tmp_path = new_path + '.tmp'
+    try:
+        with open(old_path, 'rb') as old, open(tmp_path, 'wb') as out:
+            pos = 0
+            while pos < len(ops):
+                op = ops[pos:pos + 1]
+                pos += 1
+                if op == OP_COPY:
+                    offset, length = COPY_ARGS.unpack_from(ops, pos)
+                    pos += COPY_ARGS.size
+                    old.seek(offset)
+                    data = old.read(length)
+                    if len(data) != length:
+                        raise DeltaError("Патч ссылается за пределы исходного файла")
+                elif op == OP_DATA:
+                    (length,) = DATA_ARGS.unpack_from(ops, pos)
+                    pos += DATA_ARGS.size
+                    data = ops[pos:pos + length]
+                    pos += length
+                else:
+                    raise DeltaError("Патч поврежден")
+                out.write(data)
+                digest.update(data)
+
+        if os.path.getsize(tmp_path) != new_size or digest.digest() != new_sha256:
+            raise DeltaError("Контрольная сумма собранного файла не совпадает")
+        os.replace(tmp_path, new_path)
+    except (struct.error, OSError) as e:
+        raise DeltaError(f"Ошибка применения патча: {str(e)}") from e
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return digest.hexdigest()
+
+
+if __name__ == "__main__":
+    # Публикация релиза: python -m managers.delta_patch old.exe new.exe bobrik-old-new.delta
+    import sys
+
+    old_file, new_file, patch_file = sys.argv[1:4]
+    size = make_delta(old_file, new_file, patch_file)
+    print(f"Патч: {size / 1024:.0f} КБ ({size * 100 / os.path.getsize(new_file):.1f}% от полного файла)")
+    print(f"sha256: {file_sha256(patch_file).hex()}")
@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from config import DOWNLOAD_CACHE
+from managers.download_manager import get_session, download_file
+
+
+def materialize(src_path, dest_path):
+    """Кладет копию файла из кэша в dest_path (жесткой ссылкой, если получится)"""
+    if os.path.exists(dest_path):
+        os.remove(dest_path)
+    try:
+        os.link(src_path, dest_path)
+    except OSError:
+        shutil.copy2(src_path, dest_path)
+    return dest_path
+
+
+class DownloadCache:
+    """Локальный кэш установщиков и плагинов
+
+    Файлы хранятся по SHA-256 содержимого (blobs/<sha256>), индекс связывает
+    URL с хэшем и валидаторами (ETag/Last-Modified). Попадание в кэш
+    проверяется условным запросом: ответ 304 означает, что файл не изменился.
+    """
+
+    def __init__(self, cache_dir=None, max_size=None):
+        self.cache_dir = cache_dir or DOWNLOAD_CACHE['dir']
+        self.max_size = max_size or DOWNLOAD_CACHE['max_size_mb'] * 1024 * 1024
+        self.blobs_dir = os.path.join(self.cache_dir, 'blobs')
+        self.tmp_dir = os.path.join(self.cache_dir, 'tmp')
+        self.index_path = os.path.join(self.cache_dir, 'index.json')
+        self._lock = threading.Lock()
+        # PeerCacheClient: поиск файла у соседних касс перед загрузкой из интернета
+        self.peer_client = None
+
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            index.setdefault('urls', {})
+            index.setdefault('blobs', {})
+            return index
+        except (OSError, ValueError):
+            return {'urls': {}, 'blobs': {}}
+
+    def _save_index(self):
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def blob_path(self, sha256):
+        return os.path.join(self.blobs_dir, sha256)
+
+    def lookup_hash(self, sha256):
+        """Возвращает путь к файлу с данным хэшем или None"""
+        with self._lock:
+            if sha256 in self._index['blobs'] and os.path.exists(self.blob_path(sha256)):
+                self._index['blobs'][sha256]['last_used'] = time.time()
+                self._save_index()
+                return self.blob_path(sha256)
+        return None
+
+    def _cached_entry(self, url):
+        with self._lock:
+            entry = self._index['urls'].get(url)
+            if entry and os.path.exists(self.blob_path(entry['sha256'])):
+                return dict(entry)
+        return None
+
+    def _is_fresh(self, url, entry, headers=None, timeout=30):
+        """Условный запрос: True, если файл на сервере не изменился"""
+        if not (entry.get('etag') or entry.get('last_modified')):
+            return False
+
+        request_headers = {'Accept-Encoding': 'identity'}
+        if headers:
+            request_headers.update(headers)
+        if entry.get('etag'):
+            request_headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            request_headers['If-Modified-Since'] = entry['last_modified']
+
+        try:
+            session = get_session(url)
+            with session.get(url, stream=True, headers=request_headers, timeout=timeout,
+                             allow_redirects=True) as response:
+                if response.status_code == 304:
+                    return True
+                if response.status_code == 200 and entry.get('etag'):
+                    # Сервер без поддержки условных запросов, но ETag совпал
+                    return response.headers.get('etag') == entry['etag']
+                return False
+        except Exception:
+            # Нет сети - отдаем то, что есть в кэше
+            return True
+
+    def fetch(self, url, headers=None, progress_callback=None, expected_sha256=None,
+              **download_kwargs):
+        """Возвращает (путь к актуальной копии файла в кэше, взят ли файл из кэша)"""
+        if expected_sha256:
+            # Известен хэш содержимого - сеть не нужна вовсе
+            path = self.lookup_hash(expected_sha256.lower())
+            if path:
+                return path, True
+
+        entry = self._cached_entry(url)
+        if (entry and (not expected_sha256 or entry['sha256'] == expected_sha256.lower())
+                and self._is_fresh(url, entry, headers)):
+            self._touch(url)
+            return self.blob_path(entry['sha256']), True
+
+        tmp_path = os.path.join(self.tmp_dir, hashlib.sha1(url.encode('utf-8')).hexdigest())
+        if self.peer_client and expected_sha256:
+            # Соседям можно верить только в хэше из каталога или version.json,
+            # без него файл берется у источника
+            peer_path = tmp_path + '.peer'
+            found = self.peer_client.fetch(
+                expected_sha256, peer_path,
+                progress_callback=progress_callback,
+                cancel_event=download_kwargs.get('cancel_event'),
+            )
+            if found:
+                return self.store(url, peer_path, found), False
+
+        result = download_file(url, tmp_path, headers=headers, progress_callback=progress_callback,
+                               expected_sha256=expected_sha256, **download_kwargs)
+
+        return self.store(url, tmp_path, result.sha256, result.etag, result.last_modified), False
+
+    def store(self, url, path, sha256, etag=None, last_modified=None):
+        """Переносит загруженный файл в кэш и обновляет индекс"""
+        blob = self.blob_path(sha256)
+        with self._lock:
+            if os.path.exists(blob):
+                os.remove(path)
+            else:
+                os.replace(path, blob)
+
+            now = time.time()
+            self._index['blobs'][sha256] = {'size': os.path.getsize(blob), 'last_used': now}
+            if url:
+                self._index['urls'][url] = {
+                    'sha256': sha256,
+                    'etag': etag,
+                    'last_modified': last_modified,
+                }
+            self._evict(keep=sha256)
+            self._save_index()
+        return blob
+
+    def _touch(self, url):
+        with self._lock:
+            entry = self._index['urls'].get(url)
+            if entry and entry['sha256'] in self._index['blobs']:
+                self._index['blobs'][entry['sha256']]['last_used'] = time.time()
+                self._save_index()
+
+    def _evict(self, keep=None):
+        """Удаляет давно не используемые файлы, пока кэш больше лимита"""
+        blobs = self._index['blobs']
+        total = sum(info['size'] for info in blobs.values())
+        if total <= self.max_size:
+            return
+
+        for sha256, info in sorted(blobs.items(), key=lambda item: item[1]['last_used']):
+            if total <= self.max_size:
+                break
+            if sha256 == keep:
+                continue
+            try:
+                os.remove(self.blob_path(sha256))
+            except OSError:
+                pass
+            total -= info['size']
+            del blobs[sha256]
+
+        self._index['urls'] = {
+            url: entry for url, entry in self._index['urls'].items()
+            if entry['sha256'] in blobs
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_download_cache():
+    """Возвращает общий экземпляр кэша загрузок"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DownloadCache()
+        return _cache
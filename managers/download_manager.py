@@ -0,0 +1,542 @@
+import os
+import re
+import json
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+try:
+    import requests
+    import urllib3
+    from requests.adapters import HTTPAdapter
+except ImportError:
+    requests = None
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Границы адаптивного размера блока чтения
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 1024 * 1024
+# Желаемое время чтения одного блока (сек)
+TARGET_CHUNK_TIME = 0.25
+# Сегментированная загрузка: минимальный размер диапазона и число соединений
+MIN_SEGMENT_SIZE = 4 * 1024 * 1024
+MAX_SEGMENTS = 8
+HASH_BLOCK_SIZE = 1024 * 1024
+# Как часто сохранять позицию незавершенной загрузки в sidecar
+CHECKPOINT_SIZE = 4 * 1024 * 1024
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+class DownloadError(Exception):
+    """Ошибка загрузки файла"""
+
+
+class DownloadInterrupted(DownloadError):
+    """Соединение оборвалось до получения всего файла"""
+
+
+if requests:
+    RETRYABLE_ERRORS = (
+        DownloadInterrupted,
+        requests.ConnectionError,
+        requests.Timeout,
+        requests.exceptions.ChunkedEncodingError,
+        urllib3.exceptions.HTTPError,
+        ConnectionError,
+    )
+else:
+    RETRYABLE_ERRORS = (DownloadInterrupted,)
+
+
+class DownloadCancelled(DownloadError):
+    """Загрузка отменена пользователем"""
+
+
+class IntegrityError(DownloadError):
+    """Контрольная сумма загруженного файла не совпала с ожидаемой"""
+
+
+class _RangeNotSupported(DownloadError):
+    """Сервер не отдал запрошенный диапазон"""
+
+
+class DownloadResult:
+    """Результат загрузки файла"""
+
+    def __init__(self, path, size, elapsed, sha256=None, etag=None, last_modified=None):
+        self.path = path
+        self.size = size
+        self.elapsed = elapsed
+        self.sha256 = sha256
+        self.etag = etag
+        self.last_modified = last_modified
+
+
+def get_session(url):
+    """Возвращает общий requests.Session для хоста (keep-alive, пул соединений)"""
+    if not requests:
+        raise DownloadError("Библиотека requests не установлена")
+
+    host = urlsplit(url).netloc.lower()
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers.update(DEFAULT_HEADERS)
+            _sessions[host] = session
+        return session
+
+
+def close_sessions():
+    """Закрывает все открытые сессии"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            try:
+                session.close()
+            except Exception:
+                pass
+        _sessions.clear()
+
+
+class ProgressReporter:
+    """Переводит события прогресса загрузки в сообщения лога и сигналы"""
+
+    def __init__(self, log_callback=None, progress_callback=None, scale=90, step=10,
+                 message="Загружено: {}%", fallback_total=0):
+        self.log_callback = log_callback
+        self.progress_callback = progress_callback
+        self.scale = scale
+        self.step = step
+        self.message = message
+        self.fallback_total = fallback_total
+        self.last_progress = 0
+
+    def __call__(self, downloaded, total):
+        total = total or self.fallback_total
+        if total <= 0:
+            return
+
+        progress = min(self.scale, int((downloaded / total) * self.scale))
+        if progress >= self.last_progress + self.step and progress > 0:
+            self.last_progress = progress
+            if self.log_callback:
+                self.log_callback(self.message.format(progress), "info")
+            if self.progress_callback:
+                self.progress_callback(progress)
+
+
+def _next_chunk_size(chunk_size, elapsed):
+    """Подбирает размер следующего блока по скорости чтения предыдущего"""
+    if elapsed < TARGET_CHUNK_TIME / 2 and chunk_size < MAX_CHUNK_SIZE:
+        return chunk_size * 2
+    if elapsed > TARGET_CHUNK_TIME * 2 and chunk_size > MIN_CHUNK_SIZE:
+        return chunk_size // 2
+    return chunk_size
+
+
+def _read_part_meta(meta_path, url):
+    """Читает sidecar-файл незавершенной загрузки"""
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('url') != url:
+            return None
+        return meta
+    except (OSError, ValueError):
+        return None
+
+
+def _write_part_meta(meta_path, meta):
+    """Атомарно сохраняет sidecar-файл незавершенной загрузки"""
+    tmp_path = meta_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _parse_content_range_start(value):
+    """Возвращает начальный байт из заголовка Content-Range"""
+    match = re.match(r'bytes\s+(\d+)-\d+/(\d+|\*)', value or '')
+    return int(match.group(1)) if match else None
+
+
+def _hash_file(path, length=None):
+    """Возвращает объект SHA-256 по содержимому файла (или первым length байтам)"""
+    digest = hashlib.sha256()
+    remaining = length
+    with open(path, 'rb') as f:
+        while remaining is None or remaining > 0:
+            size = HASH_BLOCK_SIZE if remaining is None else min(HASH_BLOCK_SIZE, remaining)
+            block = f.read(size)
+            if not block:
+                break
+            digest.update(block)
+            if remaining is not None:
+                remaining -= len(block)
+    return digest
+
+
+def _download_attempt(session, url, part_path, meta_path, request_headers, timeout,
+                      progress_callback, resume, limiter=None, cancel_event=None,
+                      chunk_callback=None):
+    """Одна попытка загрузки в .part файл, при возможности с продолжением
+
+    Возвращает (размер, sha256); хэш считается по ходу записи.
+    """
+    meta = _read_part_meta(meta_path, url) if resume and os.path.exists(part_path) else None
+    if meta and 'segments' in meta:
+        # Остаток от сегментированной загрузки одним потоком не продолжить
+        meta = None
+    offset = 0
+    headers = dict(request_headers)
+
+    if meta:
+        offset = min(meta.get('downloaded', 0), os.path.getsize(part_path))
+        validator = meta.get('etag') or meta.get('last_modified')
+        if offset > 0 and validator:
+            headers['Range'] = f'bytes={offset}-'
+            # If-Range: при изменившемся файле сервер отдаст его целиком (200)
+            headers['If-Range'] = validator
+        else:
+            offset = 0
+
+    with session.get(url, stream=True, headers=headers, timeout=timeout,
+                     allow_redirects=True) as response:
+        if response.status_code == 416 and meta and meta.get('size') == offset:
+            # Файл уже полностью загружен в прошлый раз
+            return offset, _hash_file(part_path, offset).hexdigest()
+
+        response.raise_for_status()
+
+        encoding = response.headers.get('content-encoding', 'identity').lower()
+        content_length = int(response.headers.get('content-length', 0) or 0)
+        if encoding != 'identity':
+            # Размер сжатого потока не совпадает с размером файла
+            content_length = 0
+
+        resumed = (
+            offset > 0
+            and response.status_code == 206
+            and _parse_content_range_start(response.headers.get('content-range')) == offset
+        )
+        if not resumed:
+            offset = 0
+
+        total_size = offset + content_length if content_length else 0
+        previous = meta if resumed else {}
+        meta = {
+            'url': url,
+            'etag': response.headers.get('etag') or previous.get('etag'),
+            'last_modified': response.headers.get('last-modified') or previous.get('last_modified'),
+            'size': total_size,
+            'downloaded': offset,
+        }
+        _write_part_meta(meta_path, meta)
+
+        downloaded = offset
+        checkpoint = offset
+        chunk_size = MIN_CHUNK_SIZE
+        # При докачке дочитываем в хэш только уже сохраненную часть
+        digest = _hash_file(part_path, offset) if resumed else hashlib.sha256()
+
+        with open(part_path, 'r+b' if resumed else 'wb') as f:
+            if total_size > 0 and not resumed:
+                # Резервируем место под файл заранее
+                f.truncate(total_size)
+            f.seek(offset)
+
+            try:
+                while True:
+                    if cancel_event and cancel_event.is_set():
+                        raise DownloadCancelled("Загрузка отменена")
+                    if limiter:
+                        chunk_size = limiter.max_chunk_size(chunk_size)
+                    chunk_started = time.monotonic()
+                    chunk = response.raw.read(chunk_size, decode_content=True)
+                    if not chunk:
+                        break
+
+                    f.write(chunk)
+                    digest.update(chunk)
+                    if chunk_callback:
+                        chunk_callback(downloaded, chunk)
+                    downloaded += len(chunk)
+                    chunk_size = _next_chunk_size(chunk_size, time.monotonic() - chunk_started)
+
+                    if downloaded - checkpoint >= CHECKPOINT_SIZE:
+                        f.flush()
+                        os.fsync(f.fileno())
+                        meta['downloaded'] = checkpoint = downloaded
+                        _write_part_meta(meta_path, meta)
+
+                    if progress_callback:
+                        progress_callback(downloaded, total_size)
+                    if limiter:
+                        limiter.consume(len(chunk))
+            finally:
+                # Запоминаем, сколько байт точно записано, чтобы продолжить позже
+                f.flush()
+                meta['downloaded'] = downloaded
+                _write_part_meta(meta_path, meta)
+
+            if total_size > 0 and downloaded != total_size:
+                raise DownloadInterrupted(
+                    f"Загрузка прервана: получено {downloaded} из {total_size} байт"
+                )
+            if total_size == 0:
+                f.truncate(downloaded)
+
+    return downloaded, digest.hexdigest()
+
+
+def _probe_ranges(session, url, request_headers, timeout):
+    """Проверяет поддержку Range и возвращает (url, size, etag, last_modified) или None"""
+    headers = dict(request_headers)
+    headers['Range'] = 'bytes=0-0'
+
+    # GET вместо HEAD: подписанные ссылки GitHub на HEAD отвечают 403
+    with session.get(url, stream=True, headers=headers, timeout=timeout,
+                     allow_redirects=True) as response:
+        if response.status_code != 206:
+            return None
+
+        match = re.match(r'bytes\s+0-0/(\d+)', response.headers.get('content-range', ''))
+        if not match:
+            return None
+
+        return (
+            response.url,
+            int(match.group(1)),
+            response.headers.get('etag'),
+            response.headers.get('last-modified'),
+        )
+
+
+def _split_segments(total_size, segments):
+    """Делит файл на диапазоны [start, end] для параллельной загрузки"""
+    count = max(1, min(segments, MAX_SEGMENTS, total_size // MIN_SEGMENT_SIZE))
+    step = total_size // count
+    parts = []
+    for i in range(count):
+        start = i * step
+        end = total_size - 1 if i == count - 1 else start + step - 1
+        parts.append({'start': start, 'end': end, 'done': start})
+    return parts
+
+
+def _write_at(f, data, offset):
+    """Пишет блок по смещению (os.pwrite, если доступен)"""
+    if hasattr(os, 'pwrite'):
+        os.pwrite(f.fileno(), data, offset)
+    else:
+        f.seek(offset)
+        f.write(data)
+
+
+def _download_segmented(session, url, part_path, meta_path, request_headers, timeout,
+                        progress_callback, resume, segments, limiter=None, cancel_event=None):
+    """Загружает файл в несколько соединений, каждый диапазон пишется по своему смещению
+
+    Возвращает None, если сервер не поддерживает Range или файл слишком мал.
+    """
+    probe = _probe_ranges(session, url, request_headers, timeout)
+    if not probe:
+        return None
+
+    range_url, total_size, etag, last_modified = probe
+    if total_size < MIN_SEGMENT_SIZE * 2:
+        return None
+
+    meta = _read_part_meta(meta_path, url) if resume and os.path.exists(part_path) else None
+    if (meta and meta.get('segments') and meta.get('size') == total_size
+            and meta.get('etag') == etag and meta.get('last_modified') == last_modified):
+        parts = meta['segments']
+    else:
+        parts = _split_segments(total_size, segments)
+        with open(part_path, 'wb') as f:
+            f.truncate(total_size)
+
+    meta = {
+        'url': url,
+        'etag': etag,
+        'last_modified': last_modified,
+        'size': total_size,
+        'segments': parts,
+    }
+    _write_part_meta(meta_path, meta)
+
+    lock = threading.Lock()
+    abort = threading.Event()
+    state = {
+        'downloaded': sum(part['done'] - part['start'] for part in parts),
+        'checkpoint': 0,
+    }
+    validator = etag or last_modified
+
+    def fetch(part):
+        if part['done'] > part['end']:
+            return
+
+        headers = dict(request_headers)
+        headers['Range'] = f"bytes={part['done']}-{part['end']}"
+        if validator:
+            headers['If-Range'] = validator
+
+        with session.get(range_url, stream=True, headers=headers, timeout=timeout) as response:
+            response.raise_for_status()
+            if (response.status_code != 206 or
+                    _parse_content_range_start(response.headers.get('content-range')) != part['done']):
+                raise _RangeNotSupported("Сервер перестал отдавать диапазоны")
+
+            chunk_size = MIN_CHUNK_SIZE
+            # Без буфера: позиция в sidecar всегда соответствует записанным данным
+            with open(part_path, 'r+b', buffering=0) as f:
+                while part['done'] <= part['end']:
+                    if cancel_event and cancel_event.is_set():
+                        raise DownloadCancelled("Загрузка отменена")
+                    if abort.is_set():
+                        raise DownloadInterrupted("Загрузка остановлена")
+
+                    if limiter:
+                        chunk_size = limiter.max_chunk_size(chunk_size)
+                    chunk_started = time.monotonic()
+                    want = min(chunk_size, part['end'] - part['done'] + 1)
+                    chunk = response.raw.read(want, decode_content=False)
+                    if not chunk:
+                        raise DownloadInterrupted(
+                            f"Диапазон {part['start']}-{part['end']} получен не полностью"
+                        )
+
+                    _write_at(f, chunk, part['done'])
+                    chunk_size = _next_chunk_size(chunk_size, time.monotonic() - chunk_started)
+
+                    with lock:
+                        part['done'] += len(chunk)
+                        state['downloaded'] += len(chunk)
+                        if state['downloaded'] - state['checkpoint'] >= CHECKPOINT_SIZE:
+                            state['checkpoint'] = state['downloaded']
+                            _write_part_meta(meta_path, meta)
+                        if progress_callback:
+                            progress_callback(state['downloaded'], total_size)
+
+                    if limiter:
+                        limiter.consume(len(chunk))
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(parts)) as pool:
+            futures = [pool.submit(fetch, part) for part in parts]
+            error = None
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    abort.set()
+                    if error is None or isinstance(error, DownloadInterrupted):
+                        error = e
+            if error is not None:
+                raise error
+    finally:
+        with lock:
+            _write_part_meta(meta_path, meta)
+
+    return total_size
+
+
+def download_file(url, dest_path, headers=None, timeout=60, progress_callback=None,
+                  resume=True, retries=3, segments=1, expected_sha256=None, limiter=None,
+                  cancel_event=None, chunk_callback=None):
+    """Загружает файл по URL в dest_path через общий пул соединений
+
+    Данные пишутся в dest_path.part, рядом хранится sidecar с ETag/Last-Modified
+    и размером; после обрыва загрузка продолжается запросом Range.
+    При segments > 1 и поддержке Range файл качается в несколько соединений.
+    progress_callback(downloaded, total) вызывается после каждого записанного блока,
+    total равен 0, если сервер не сообщил размер.
+    SHA-256 считается на лету; при несовпадении с expected_sha256 файл отбрасывается.
+    limiter (BandwidthLimiter) ограничивает общую скорость загрузок.
+    Установленный cancel_event прерывает загрузку (DownloadCancelled), .part сохраняется.
+    chunk_callback(offset, data) получает записанные блоки при загрузке одним потоком
+    (например, для распаковки архива во время загрузки).
+    """
+    session = get_session(url)
+    request_headers = {'Accept-Encoding': 'identity'}
+    if headers:
+        request_headers.update(headers)
+
+    part_path = dest_path + '.part'
+    meta_path = part_path + '.json'
+    if not resume:
+        _remove_quietly(part_path)
+        _remove_quietly(meta_path)
+
+    started = time.monotonic()
+    attempt = 0
+
+    while True:
+        try:
+            downloaded = sha256 = None
+            if segments > 1:
+                downloaded = _download_segmented(session, url, part_path, meta_path,
+                                                 request_headers, timeout, progress_callback,
+                                                 resume or attempt > 0, segments, limiter,
+                                                 cancel_event)
+                if downloaded is None:
+                    segments = 1
+                else:
+                    # Диапазоны приходят не по порядку, поэтому хэш считается отдельно
+                    sha256 = _hash_file(part_path).hexdigest()
+            if downloaded is None:
+                downloaded, sha256 = _download_attempt(session, url, part_path, meta_path,
+                                                       request_headers, timeout, progress_callback,
+                                                       resume or attempt > 0, limiter,
+                                                       cancel_event, chunk_callback)
+            break
+        except _RangeNotSupported:
+            # Докачиваем одним потоком с нуля
+            segments = 1
+            _remove_quietly(part_path)
+            _remove_quietly(meta_path)
+        except RETRYABLE_ERRORS as e:
+            attempt += 1
+            if attempt > retries:
+                raise DownloadError(str(e)) from e
+            delay = min(2 ** attempt, 10)
+            if cancel_event:
+                if cancel_event.wait(delay):
+                    raise DownloadCancelled("Загрузка отменена") from e
+            else:
+                time.sleep(delay)
+        except requests.RequestException as e:
+            raise DownloadError(str(e)) from e
+
+    if expected_sha256 and sha256 != expected_sha256.lower():
+        # Поврежденный файл не докачиваем, а удаляем целиком
+        _remove_quietly(part_path)
+        _remove_quietly(meta_path)
+        raise IntegrityError(
+            f"Контрольная сумма не совпадает: ожидалась {expected_sha256}, получена {sha256}"
+        )
+
+    meta = _read_part_meta(meta_path, url) or {}
+    os.replace(part_path, dest_path)
+    _remove_quietly(meta_path)
+
+    return DownloadResult(dest_path, downloaded, time.monotonic() - started, sha256=sha256,
+                          etag=meta.get('etag'), last_modified=meta.get('last_modified'))
@@ -0,0 +1,293 @@
+import os
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from PyQt6.QtCore import QObject, pyqtSignal
+from managers.download_manager import download_file, DownloadCancelled
+from managers.download_cache import get_download_cache, materialize
+from managers.bandwidth_limiter import get_bandwidth_limiter
+
+# Приоритеты заданий: чем меньше число, тем раньше задание берется в работу
+PRIORITY_SELF_UPDATE = 0
+PRIORITY_PROGRAM = 10
+PRIORITY_PLUGIN = 20
+PRIORITY_BACKGROUND = 30
+
+MAX_PARALLEL_DOWNLOADS = 3
+# Сколько завершенных заданий помнит очередь (для статуса на кнопках)
+FINISHED_JOBS_KEPT = 50
+
+STATUS_QUEUED = "queued"
+STATUS_DOWNLOADING = "downloading"
+STATUS_WAITING_INSTALL = "waiting_install"
+STATUS_INSTALLING = "installing"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+
+FINAL_STATUSES = (STATUS_DONE, STATUS_FAILED, STATUS_CANCELLED)
+
+STATUS_TEXT = {
+    STATUS_QUEUED: "в очереди",
+    STATUS_DOWNLOADING: "загрузка",
+    STATUS_WAITING_INSTALL: "ждет установки",
+    STATUS_INSTALLING: "установка",
+    STATUS_DONE: "готово",
+    STATUS_FAILED: "ошибка",
+    STATUS_CANCELLED: "отменено",
+}
+
+
+class DownloadJob:
+    """Задание очереди: загрузка файла и последующая обработка"""
+
+    def __init__(self, job_id, name, url, dest_path, priority, on_downloaded=None,
+                 exclusive=False, use_cache=True, progress_callback=None, download_kwargs=None,
+                 size_hint=0):
+        self.job_id = job_id
+        self.name = name
+        self.url = url
+        self.dest_path = dest_path
+        self.priority = priority
+        # on_downloaded(job, path) выполняется после загрузки;
+        # exclusive=True - в общей очереди установки, строго по одному
+        self.on_downloaded = on_downloaded
+        self.exclusive = exclusive
+        self.use_cache = use_cache
+        self.progress_callback = progress_callback
+        # Ожидаемый размер файла, если сервер не сообщает Content-Length
+        self.size_hint = size_hint
+        self.download_kwargs = download_kwargs or {}
+
+        self.status = STATUS_QUEUED
+        self.progress = 0
+        self.error = None
+        self.path = None
+        self.sha256 = None  # Хэш содержимого, посчитанный во время загрузки
+        self.from_cache = False
+        self.cancel_event = threading.Event()
+
+        self.created_at = time.monotonic()
+        self.download_started = None
+        self.download_finished = None
+        self.install_started = None
+        self.install_finished = None
+
+    @property
+    def is_active(self):
+        return self.status not in FINAL_STATUSES
+
+    @property
+    def download_time(self):
+        if self.download_started and self.download_finished:
+            return self.download_finished - self.download_started
+        return 0.0
+
+    @property
+    def install_time(self):
+        if self.install_started and self.install_finished:
+            return self.install_finished - self.install_started
+        return 0.0
+
+
+class DownloadQueue(QObject):
+    """Очередь загрузок и установок
+
+    Загрузки идут параллельно (до max_downloads), установщики запускаются
+    строго по одному (MSI не умеет работать параллельно). Задания с меньшим
+    приоритетом берутся раньше, любое задание можно отменить до начала установки;
+    у эксклюзивного задания во время установки отмена лишь прекращает ожидание
+    установщика (обработчик проверяет cancel_event), и очередь идет дальше.
+    """
+    log_signal = pyqtSignal(str, str)
+    job_updated = pyqtSignal(int, str, int)  # job_id, status, progress
+    job_finished = pyqtSignal(int, bool)  # job_id, success
+
+    def __init__(self, max_downloads=MAX_PARALLEL_DOWNLOADS, parent=None):
+        super().__init__(parent)
+        self.max_downloads = max_downloads
+        self.jobs = {}
+        self._finished_ids = deque()
+
+        self._ids = itertools.count(1)
+        self._order = itertools.count()
+        self._download_heap = []
+        self._install_heap = []
+        self._lock = threading.Lock()
+        self._download_ready = threading.Condition(self._lock)
+        self._install_ready = threading.Condition(self._lock)
+        self._workers = []
+
+    def submit(self, name, url, dest_path=None, priority=PRIORITY_PROGRAM, on_downloaded=None,
+               exclusive=False, use_cache=True, progress_callback=None, size_hint=0, **download_kwargs):
+        """Ставит загрузку в очередь и возвращает задание"""
+        job = DownloadJob(next(self._ids), name, url, dest_path, priority, on_downloaded,
+                          exclusive, use_cache, progress_callback, download_kwargs, size_hint)
+        with self._lock:
+            self.jobs[job.job_id] = job
+            heapq.heappush(self._download_heap, (priority, next(self._order), job))
+            self._start_workers()
+            self._download_ready.notify()
+
+        self.job_updated.emit(job.job_id, job.status, 0)
+        return job
+
+    def cancel(self, job_id):
+        """Отменяет задание, если установка еще не началась (или прекращает ожидание установщика)"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if not job or not job.is_active or (job.status == STATUS_INSTALLING and not job.exclusive):
+                return False
+            job.cancel_event.set()
+            # Статус меняется только под блокировкой: воркер, который возьмет
+            # задание из очереди позже, увидит cancel_event и пропустит его
+            waiting = job.status in (STATUS_QUEUED, STATUS_WAITING_INSTALL)
+        if waiting:
+            self._finish(job, STATUS_CANCELLED)
+        return True
+
+    def get_job(self, job_id):
+        return self.jobs.get(job_id)
+
+    def active_jobs(self):
+        with self._lock:
+            return [job for job in self.jobs.values() if job.is_active]
+
+    def _start_workers(self):
+        """Запускает потоки при первом задании (вызывается под блокировкой)"""
+        if self._workers:
+            return
+        for _ in range(self.max_downloads):
+            worker = threading.Thread(target=self._download_loop, daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        installer = threading.Thread(target=self._install_loop, daemon=True)
+        installer.start()
+        self._workers.append(installer)
+
+    def _set_status(self, job, status, progress=None):
+        job.status = status
+        if progress is not None:
+            job.progress = progress
+        self.job_updated.emit(job.job_id, status, job.progress)
+
+    def _finish(self, job, status, error=None):
+        with self._lock:
+            if not job.is_active:
+                return
+            job.error = error
+            self._set_status(job, status)
+            self._finished_ids.append(job.job_id)
+            while len(self._finished_ids) > FINISHED_JOBS_KEPT:
+                self.jobs.pop(self._finished_ids.popleft(), None)
+        self.job_finished.emit(job.job_id, status == STATUS_DONE)
+
+    def _make_progress_callback(self, job):
+        def on_progress(downloaded, total):
+            total = total or job.size_hint
+            if total > 0:
+                progress = min(100, int(downloaded * 100 / total))
+                if progress != job.progress:
+                    job.progress = progress
+                    self.job_updated.emit(job.job_id, job.status, progress)
+            if job.progress_callback:
+                job.progress_callback(downloaded, total)
+        return on_progress
+
+    def _next_job(self, heap, condition, status=None):
+        """Берет задание из кучи; отмененные пропускает, status выставляет под блокировкой"""
+        with self._lock:
+            while True:
+                while not heap:
+                    condition.wait()
+                job = heapq.heappop(heap)[2]
+                if job.is_active and not job.cancel_event.is_set():
+                    if status:
+                        self._set_status(job, status, 0)
+                    return job
+
+    def _download_loop(self):
+        while True:
+            job = self._next_job(self._download_heap, self._download_ready, STATUS_DOWNLOADING)
+            try:
+                self._download(job)
+            except DownloadCancelled:
+                self._finish(job, STATUS_CANCELLED)
+                continue
+            except Exception as e:
+                self.log_signal.emit(f"Ошибка загрузки {job.name}: {str(e)}", "error")
+                self._finish(job, STATUS_FAILED, e)
+                continue
+
+            if job.exclusive:
+                with self._lock:
+                    cancelled = job.cancel_event.is_set()
+                    if not cancelled:
+                        self._set_status(job, STATUS_WAITING_INSTALL)
+                        heapq.heappush(self._install_heap, (job.priority, next(self._order), job))
+                        self._install_ready.notify()
+                if cancelled:
+                    self._finish(job, STATUS_CANCELLED)
+            else:
+                self._run_handler(job)
+
+    def _download(self, job):
+        job.download_started = time.monotonic()
+
+        kwargs = dict(job.download_kwargs)
+        kwargs.setdefault('limiter', get_bandwidth_limiter())
+        kwargs['cancel_event'] = job.cancel_event
+        progress = self._make_progress_callback(job)
+
+        if job.use_cache:
+            cached_path, job.from_cache = get_download_cache().fetch(
+                job.url, progress_callback=progress, **kwargs
+            )
+            # Файлы кэша названы по SHA-256 содержимого
+            job.sha256 = os.path.basename(cached_path)
+            job.path = materialize(cached_path, job.dest_path) if job.dest_path else cached_path
+        else:
+            result = download_file(job.url, job.dest_path, progress_callback=progress, **kwargs)
+            job.path, job.sha256 = result.path, result.sha256
+
+        job.download_finished = time.monotonic()
+        job.progress = 100
+
+    def _install_loop(self):
+        while True:
+            job = self._next_job(self._install_heap, self._install_ready)
+            self._run_handler(job)
+
+    def _run_handler(self, job):
+        """Выполняет обработчик задания (установку/распаковку)"""
+        with self._lock:
+            cancelled = job.cancel_event.is_set() or not job.is_active
+            if not cancelled and job.on_downloaded:
+                self._set_status(job, STATUS_INSTALLING)
+        if cancelled:
+            self._finish(job, STATUS_CANCELLED)
+            return
+        if job.on_downloaded:
+            job.install_started = time.monotonic()
+            try:
+                job.on_downloaded(job, job.path)
+            except Exception as e:
+                job.install_finished = time.monotonic()
+                self.log_signal.emit(f"Ошибка установки {job.name}: {str(e)}", "error")
+                self._finish(job, STATUS_FAILED, e)
+                return
+            job.install_finished = time.monotonic()
+        self._finish(job, STATUS_CANCELLED if job.cancel_event.is_set() else STATUS_DONE)
+
+
+_queue = None
+
+
+def get_download_queue():
+    """Возвращает общую очередь загрузок (создается в главном потоке)"""
+    global _queue
+    if _queue is None:
+        _queue = DownloadQueue()
+    return _queue
@@ -7,6 +7,9 @@ import tempfile
 from PyQt6.QtCore import QThread, pyqtSignal
 from PyQt6.QtWidgets import QMessageBox
 from config import IIKO_PATHS, IIKO_CARD_URL
+from managers.download_manager import ProgressReporter
+from managers.download_queue import get_download_queue, PRIORITY_PROGRAM
+from managers.install_supervisor import get_install_supervisor, INSTALL_WAIT_TIMEOUT
 
 try:
     import psutil
@@ -188,51 +191,45 @@ class IikoManager(QThread):
                 
             self.log_signal.emit("Начинаем загрузку iikoCard...", "info")
             
-            threading.Thread(target=self._download_and_install_iiko_card, daemon=True).start()
+            installer_path = os.path.join(tempfile.gettempdir(), "iikoCard_installer.exe")
+            get_download_queue().submit(
+                "iikoCard", IIKO_CARD_URL, installer_path,
+                priority=PRIORITY_PROGRAM,
+                on_downloaded=self._install_iiko_card,
+                exclusive=True,
+                use_cache=False,
+                progress_callback=ProgressReporter(self.log_signal.emit, fallback_total=10 * 1024 * 1024),
+            )
             
         except Exception as e:
             self.log_signal.emit(f"Ошибка при запуске обновления iikoCard: {str(e)}", "error")
             
-    def _download_and_install_iiko_card(self):
-        """Скачивает и устанавливает iikoCard в отдельном потоке"""
+    def _install_iiko_card(self, job, installer_path):
+        """Устанавливает загруженный iikoCard (выполняется в очереди установки)"""
         try:
-            temp_dir = tempfile.gettempdir()
-            installer_path = os.path.join(temp_dir, "iikoCard_installer.exe")
-            
-            response = requests.get(IIKO_CARD_URL, stream=True)
-            total_size = int(response.headers.get('content-length', 0))
-            
-            if total_size == 0:
-                self.log_signal.emit("Не удалось определить размер файла", "warning")
-                total_size = 10 * 1024 * 1024
-                
-            downloaded = 0
-            last_logged_progress = 0
-            
-            with open(installer_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        progress = min(90, int((downloaded / total_size) * 90))
-                        
-                        if progress >= last_logged_progress + 10 and progress > 0:
-                            self.log_signal.emit(f"Загружено: {progress}%", "info")
-                            last_logged_progress = progress
-                            
             self.log_signal.emit("Загрузка завершена, начинаем установку...", "info")
             
             process = subprocess.Popen([installer_path], 
                                      stdout=subprocess.DEVNULL, 
                                      stderr=subprocess.DEVNULL)
+            watch = get_install_supervisor().watch("iikoCard", process)
             
             self.log_signal.emit("100%", "info")
             self.log_signal.emit("iikoCard установка запущена", "success")
             
+            # Установщик iikoCard передает работу дочерним процессам (msiexec) -
+            # ждем, пока завершится все дерево
+            if not watch.wait(INSTALL_WAIT_TIMEOUT, job.cancel_event) or watch.expired:
+                if not job.cancel_event.is_set():
+                    self.log_signal.emit("Установка iikoCard занимает больше времени чем ожидалось", "info")
+                return
+            
+            self.log_signal.emit(f"iikoCard: установщик завершил работу ({watch.duration:.0f} с)", "success")
+            
             try:
                 os.remove(installer_path)
             except:
                 pass
                 
         except Exception as e:
-            self.log_signal.emit(f"Ошибка при загрузке/установке iikoCard: {str(e)}", "error")
\ No newline at end of file
+            self.log_signal.emit(f"Ошибка при установке iikoCard: {str(e)}", "error")
\ No newline at end of file
@@ -0,0 +1,235 @@
+import os
+import json
+import time
+import threading
+from statistics import median
+from config import INSTALL_DURATIONS_FILE
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+POLL_INTERVAL = 0.5
+# Сколько очередь ждет установщик, прежде чем запустить следующий (сек)
+INSTALL_WAIT_TIMEOUT = 300
+# Дольше этого дерево процессов не отслеживается (например, установщик запустил саму программу)
+MAX_WATCH_TIME = 2 * 3600
+# Сколько последних длительностей хранится на каждый установщик
+DURATIONS_KEPT = 5
+# Допуск при сравнении времени запуска процессов (сек)
+CREATE_TIME_SLACK = 1.0
+
+
+class InstallWatch:
+    """Отслеживаемая установка: корневой процесс и все его потомки"""
+
+    def __init__(self, name, process, on_finished=None, clock=time.monotonic):
+        self.name = name
+        self.process = process
+        self.on_finished = on_finished
+        self.started = clock()
+        self.started_wall = time.time()
+        self.returncode = None
+        self.duration = None
+        self.expired = False
+        # pid -> время создания процесса (None - корень еще не попал в снимок)
+        self.pids = {process.pid: None}
+        self._done = threading.Event()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None, cancel_event=None):
+        """Ждет, пока завершится все дерево процессов
+
+        False - по таймауту или если выставлен cancel_event (процессы при этом
+        продолжают работать и отслеживаться).
+        """
+        if cancel_event is None:
+            return self._done.wait(timeout)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not cancel_event.is_set():
+            remaining = POLL_INTERVAL if deadline is None else min(POLL_INTERVAL, deadline - time.monotonic())
+            if remaining <= 0:
+                break
+            if self._done.wait(remaining):
+                return True
+        return self._done.is_set()
+
+    def _finish(self, duration, expired=False):
+        self.duration = duration
+        self.expired = expired
+        self._done.set()
+
+
+class InstallSupervisor:
+    """Следит за деревьями процессов всех запущенных установщиков
+
+    Один поток на все установки: раз в POLL_INTERVAL снимается список
+    процессов, к каждой установке добавляются новые потомки (в том числе
+    процессов, которые уже завершились - Windows не меняет им ppid).
+    Установка завершена, когда не осталось ни одного процесса дерева.
+    Без psutil отслеживается только сам установщик.
+    """
+
+    def __init__(self, poll_interval=POLL_INTERVAL, max_watch_time=MAX_WATCH_TIME,
+                 durations_path=INSTALL_DURATIONS_FILE, clock=time.monotonic):
+        self.poll_interval = poll_interval
+        self.max_watch_time = max_watch_time
+        self.durations_path = durations_path
+        self.clock = clock
+        self._lock = threading.Condition()
+        self._active = []
+        self._thread = None
+        self._durations = self._load_durations()
+
+    @property
+    def tracks_children(self):
+        return psutil is not None
+
+    def watch(self, name, process, on_finished=None):
+        """Начинает отслеживать запущенный установщик (subprocess.Popen)
+
+        on_finished(watch) вызывается из потока наблюдения, когда дерево
+        процессов опустело.
+        """
+        watch = InstallWatch(name, process, on_finished, self.clock)
+        with self._lock:
+            self._active.append(watch)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._lock.notify()
+        return watch
+
+    def active(self):
+        with self._lock:
+            return list(self._active)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                watches = list(self._active)
+                if not watches:
+                    self._thread = None
+                    return
+            snapshot = self._snapshot()
+            for watch in watches:
+                self._poll(watch, snapshot)
+            with self._lock:
+                self._active = [watch for watch in self._active if not watch.done]
+                if self._active:
+                    self._lock.wait(self.poll_interval)
+
+    def _snapshot(self):
+        """Один проход по процессам системы: {pid: (ppid, create_time)}"""
+        if psutil is None:
+            return None
+        snapshot = {}
+        # В Windows нет зомби-процессов, а запрос статуса стоит отдельного обращения
+        attrs = ['pid', 'ppid', 'create_time'] if os.name == 'nt' else ['pid', 'ppid', 'create_time', 'status']
+        for proc in psutil.process_iter(attrs):
+            info = proc.info
+            # Процессы без прав доступа отдают None вместо времени запуска
+            if info['create_time'] is None or info.get('status') == psutil.STATUS_ZOMBIE:
+                continue
+            snapshot[info['pid']] = (info['ppid'], info['create_time'])
+        return snapshot
+
+    def _poll(self, watch, snapshot):
+        elapsed = self.clock() - watch.started
+        root_alive = watch.process.poll() is None
+        if watch.returncode is None and not root_alive:
+            watch.returncode = watch.process.returncode
+
+        alive = root_alive
+        if snapshot is not None:
+            alive = self._update_tree(watch, snapshot) or root_alive
+
+        if not alive:
+            self._complete(watch, elapsed)
+        elif elapsed > self.max_watch_time:
+            watch._finish(elapsed, expired=True)
+
+    def _update_tree(self, watch, snapshot):
+        """Добавляет в дерево новых потомков; True, если кто-то из дерева еще работает"""
+        root_pid = watch.process.pid
+        if watch.pids.get(root_pid, 0) is None and root_pid in snapshot:
+            watch.pids[root_pid] = snapshot[root_pid][1]
+
+        added = True
+        while added:
+            added = False
+            for pid, (ppid, create_time) in snapshot.items():
+                if pid in watch.pids or ppid not in watch.pids:
+                    continue
+                parent = snapshot.get(ppid)
+                if parent and watch.pids[ppid] and abs(parent[1] - watch.pids[ppid]) >= CREATE_TIME_SLACK:
+                    # pid родителя уже занят другим процессом
+                    continue
+                # Потомок не может быть старше родителя - иначе это чужой процесс с тем же pid
+                parent_time = watch.pids[ppid] or watch.started_wall
+                if create_time + CREATE_TIME_SLACK >= parent_time:
+                    watch.pids[pid] = create_time
+                    added = True
+
+        alive = False
+        for pid, create_time in watch.pids.items():
+            if pid == root_pid:
+                continue
+            current = snapshot.get(pid)
+            if current and abs(current[1] - create_time) < CREATE_TIME_SLACK:
+                alive = True
+        return alive
+
+    def _complete(self, watch, duration):
+        self.record_duration(watch.name, duration)
+        watch._finish(duration)
+        if watch.on_finished:
+            try:
+                watch.on_finished(watch)
+            except Exception:
+                pass
+
+    def _load_durations(self):
+        try:
+            with open(self.durations_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def record_duration(self, name, duration):
+        """Запоминает длительность установки (последние DURATIONS_KEPT)"""
+        with self._lock:
+            durations = self._durations.setdefault(name, [])
+            durations.append(round(duration, 1))
+            del durations[:-DURATIONS_KEPT]
+            try:
+                os.makedirs(os.path.dirname(self.durations_path), exist_ok=True)
+                tmp_path = self.durations_path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self._durations, f, ensure_ascii=False)
+                os.replace(tmp_path, self.durations_path)
+            except OSError:
+                pass
+
+    def expected_duration(self, name):
+        """Обычная длительность установки (медиана прошлых запусков) или None"""
+        with self._lock:
+            durations = self._durations.get(name)
+            return median(durations) if durations else None
+
+
+_supervisor = None
+_supervisor_lock = threading.Lock()
+
+
+def get_install_supervisor():
+    """Возвращает общий наблюдатель за установщиками"""
+    global _supervisor
+    with _supervisor_lock:
+        if _supervisor is None:
+            _supervisor = InstallSupervisor()
+        return _supervisor
@@ -0,0 +1,212 @@
+import time
+import threading
+
+try:
+    import winreg
+except ImportError:
+    winreg = None
+
+UNINSTALL_PATH = r'SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall'
+WOW64_UNINSTALL_PATH = r'SOFTWARE\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall'
+
+# Сколько секунд состояние "установлена / версия" считается актуальным
+INSTALLED_STATE_TTL = 30
+
+
+def normalize_name(name):
+    """Имя для сравнения: только буквы и цифры в нижнем регистре ("7-Zip" -> "7zip")"""
+    return ''.join(char for char in (name or '').lower() if char.isalnum())
+
+
+class RegistryBackend:
+    """Читает разделы Uninstall реестра Windows через winreg"""
+
+    def _locations(self):
+        return [
+            (winreg.HKEY_LOCAL_MACHINE, UNINSTALL_PATH, winreg.KEY_WOW64_64KEY),
+            (winreg.HKEY_LOCAL_MACHINE, WOW64_UNINSTALL_PATH, 0),
+            (winreg.HKEY_CURRENT_USER, UNINSTALL_PATH, 0),
+        ]
+
+    def entries(self):
+        """Записи установленных программ: {key, name, version, uninstall_string}"""
+        if winreg is None:
+            return []
+        result = []
+        for hive, path, flags in self._locations():
+            try:
+                root = winreg.OpenKey(hive, path, 0, winreg.KEY_READ | flags)
+            except OSError:
+                continue
+            with root:
+                index = 0
+                while True:
+                    try:
+                        key_name = winreg.EnumKey(root, index)
+                    except OSError:
+                        break
+                    index += 1
+                    entry = self._read_entry(root, key_name)
+                    if entry:
+                        result.append(entry)
+        return result
+
+    def _read_entry(self, root, key_name):
+        try:
+            with winreg.OpenKey(root, key_name) as key:
+                values = {}
+                for value_name in ('DisplayName', 'DisplayVersion', 'UninstallString'):
+                    try:
+                        values[value_name] = winreg.QueryValueEx(key, value_name)[0]
+                    except OSError:
+                        values[value_name] = None
+        except OSError:
+            return None
+        return {
+            'key': key_name,
+            'name': values['DisplayName'],
+            'version': values['DisplayVersion'],
+            'uninstall_string': values['UninstallString'],
+        }
+
+
+class StaticBackend:
+    """Заранее заданный список программ (для проверки без Windows)"""
+
+    def __init__(self, entries):
+        self._entries = list(entries)
+
+    def entries(self):
+        return list(self._entries)
+
+
+class InstalledSoftwareIndex:
+    """Снимок установленных программ: реестр читается один раз, проверки - из памяти
+
+    Имя ищется как подстрока в нормализованных DisplayName и именах разделов
+    Uninstall, как это делал reg query /f.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or RegistryBackend()
+        self._lock = threading.Lock()
+        self._programs = None  # нормализованное имя -> (version, uninstall_string, name)
+
+    def refresh(self):
+        """Перечитывает список программ"""
+        programs = {}
+        for entry in self.backend.entries():
+            info = (entry.get('version'), entry.get('uninstall_string'), entry.get('name') or entry.get('key'))
+            for name in (entry.get('name'), entry.get('key')):
+                normalized = normalize_name(name)
+                if normalized and normalized not in programs:
+                    programs[normalized] = info
+        with self._lock:
+            self._programs = programs
+        return len(programs)
+
+    def _snapshot(self):
+        with self._lock:
+            programs = self._programs
+        if programs is None:
+            self.refresh()
+            with self._lock:
+                programs = self._programs
+        return programs
+
+    def find(self, name):
+        """(version, uninstall_string, display_name) первой подходящей программы или None"""
+        query = normalize_name(name)
+        if not query:
+            return None
+        programs = self._snapshot()
+        if query in programs:
+            return programs[query]
+        for normalized, info in programs.items():
+            if query in normalized:
+                return info
+        return None
+
+    def is_installed(self, names):
+        """True, если найдена программа с любым из имен"""
+        return any(self.find(name) for name in names)
+
+
+class InstalledStateCache:
+    """Состояние программ каталога (установлена ли и какой версии) с коротким TTL
+
+    Устаревшие записи пересчитываются одним проходом по реестру на всю пачку;
+    после установки или удаления запись программы сбрасывается invalidate().
+    """
+
+    def __init__(self, index, ttl=INSTALLED_STATE_TTL, clock=time.monotonic):
+        self.index = index
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._states = {}  # program_key -> (время проверки, info или None)
+
+    def get(self, program_key):
+        """(актуально ли, последний известный info или None) без обращения к реестру"""
+        with self._lock:
+            state = self._states.get(program_key)
+        if state is None:
+            return False, None
+        return self.clock() - state[0] <= self.ttl, state[1]
+
+    def compute(self, programs):
+        """Состояние программ {program_key: check_names} -> {program_key: info или None}
+
+        Реестр перечитывается не больше одного раза и только если есть
+        устаревшие записи.
+        """
+        result = {}
+        stale = {}
+        for program_key, check_names in programs.items():
+            fresh, info = self.get(program_key)
+            if fresh:
+                result[program_key] = info
+            else:
+                stale[program_key] = check_names
+
+        if stale:
+            self.index.refresh()
+            checked_at = self.clock()
+            for program_key, check_names in stale.items():
+                info = next(filter(None, map(self.index.find, check_names)), None)
+                with self._lock:
+                    self._states[program_key] = (checked_at, info)
+                result[program_key] = info
+        return result
+
+    def invalidate(self, program_key=None):
+        """Сбрасывает состояние одной программы или всех"""
+        with self._lock:
+            if program_key is None:
+                self._states.clear()
+            else:
+                self._states.pop(program_key, None)
+
+
+_index = None
+_state_cache = None
+_index_lock = threading.Lock()
+
+
+def get_installed_software_index():
+    """Возвращает общий индекс установленных программ"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = InstalledSoftwareIndex()
+        return _index
+
+
+def get_installed_state_cache():
+    """Возвращает общий кэш состояния программ каталога"""
+    global _state_cache
+    index = get_installed_software_index()
+    with _index_lock:
+        if _state_cache is None:
+            _state_cache = InstalledStateCache(index)
+        return _state_cache
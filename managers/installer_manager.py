@@ -5,14 +5,14 @@ import tempfile
 import threading
 import shutil
 import json
-import zipfile
 from PyQt6.QtCore import QThread, pyqtSignal
 from PyQt6.QtWidgets import QMessageBox, QFileDialog
-
-try:
-    import requests
-except ImportError:
-    requests = None
+from managers.download_manager import ProgressReporter
+from managers.download_queue import get_download_queue, PRIORITY_PROGRAM
+from managers.zip_extract import extract_zip, find_member, member_folder_filter, member_path
+from managers.installed_software import get_installed_software_index, get_installed_state_cache
+from managers.program_catalog import get_program_catalog, is_installer
+from managers.install_supervisor import get_install_supervisor, INSTALL_WAIT_TIMEOUT
 
 class InstallerManager(QThread):
     log_signal = pyqtSignal(str, str)
@@ -21,173 +21,43 @@ class InstallerManager(QThread):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
+        self.installed_index = get_installed_software_index()
+        self.installed_states = get_installed_state_cache()
+        
+        # Каталог общий с вкладкой программ и загружается при первом обращении
+        self.catalog = get_program_catalog()
         
-        self.programs = {
-            "7zip": {
-                "name": "7-Zip",
-                "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/7z2500-x64.exe",
-                "filename": "7z2500-x64.exe",
-                "silent_args": ["/S"],
-                "check_names": ["7-Zip", "7zip"],
-                "category": "utilities"
-            },
-            "advanced_ip_scanner": {
-                "name": "Advanced IP Scanner",
-                "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/Advanced_IP_Scanner_2.5.4594.1.exe",
-                "filename": "Advanced_IP_Scanner_2.5.4594.1.exe",
-                "silent_args": ["/VERYSILENT", "/NORESTART"],
-                "check_names": ["Advanced IP Scanner", "Advanced_IP_Scanner"],
-                "category": "network"
-            },
-            "anydesk": {
-                "name": "AnyDesk",
-                "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/AnyDesk.exe",
-                "filename": "AnyDesk.exe",
-                "silent_args": ["--install", "--silent"],
-                "check_names": ["AnyDesk"],
-                "category": "remote"
-            },
-            "assistant": {
-                "name": "Ассистент",
-                "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/assistant_install_6.exe",
-                "filename": "assistant_install_6.exe",
-                "silent_args": ["/S"],
-                "check_names": ["Ассистент", "Assistant"],
-                "category": "utilities"
-            },
-            "com_port_checker": {
-                "name": "Com Port Checker",
-                "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/ComPortChecker.1.1.zip",
-                "filename": "ComPortChecker.1.1.zip",
-                "silent_args": [],
-                "check_names": ["Com Port Checker", "ComPortChecker"],
-                "category": "utilities",
-                "is_zip": True,
-                "extract_and_run": "ComPortChecker.exe"
-            },
-            "database_net": {
-                "name": "Database Net",
-                "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/DatabaseNet5Pro.zip",
-                "filename": "DatabaseNet5Pro.zip",
-                "silent_args": [],
-                "check_names": ["Database Net", "DatabaseNet"],
-                "category": "development",
-                "is_zip": True,
-                "extract_and_run": "setup.exe"
-            },
-            "notepad_plus": {
-                "name": "Notepad++",
-                "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/npp.8.8.2.Installer.x64.exe",
-                "filename": "npp.8.8.2.Installer.x64.exe",
-                "silent_args": ["/S"],
-                "check_names": ["Notepad++", "notepad"],
-                "category": "utilities"
-            },
-            "printer_test": {
-                "name": "Printer TEST V3.1C",
-                "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/Printer-TEST-V3.1C.zip",
-                "filename": "Printer-TEST-V3.1C.zip",
-                "silent_args": [],
-                "check_names": ["Printer TEST", "PrinterTEST"],
-                "category": "utilities",
-                "is_zip": True,
-                "extract_and_run": "PrinterTEST.exe"
-            },
-            "rhelper": {
-                "name": "Rhelper (Remote Access)",
-                "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/remote-access-setup.exe",
-                "filename": "remote-access-setup.exe",
-                "silent_args": ["/S"],
-                "check_names": ["Rhelper", "Remote Access"],
-                "category": "remote"
-            }
-        }
+    @property
+    def programs(self):
+        return self.catalog.programs
         
     def run(self):
         pass
         
-    def install_program(self, program_key, silent=True):
-        """Устанавливает программу по ключу"""
-        if not requests:
-            self.log_signal.emit("Библиотека requests не установлена", "error")
-            return
-            
-        if program_key not in self.programs:
-            self.log_signal.emit(f"Программа {program_key} не найдена", "error")
-            return
-            
+    def queue_install(self, program_key, priority=PRIORITY_PROGRAM):
+        """Ставит загрузку и установку программы в очередь без вопросов пользователю"""
         program = self.programs[program_key]
+        self.log_signal.emit(f"{program['name']} добавлена в очередь загрузки", "info")
+        return get_download_queue().submit(
+            program["name"], program["url"],
+            os.path.join(tempfile.gettempdir(), program["filename"]),
+            priority=priority,
+            on_downloaded=lambda job, path: self._install_downloaded(job, path, program_key),
+            exclusive=is_installer(program),
+            progress_callback=ProgressReporter(self.log_signal.emit,
+                                               fallback_total=program.get("size") or 50 * 1024 * 1024),
+            size_hint=program.get("size", 0),
+            segments=program.get("segments", 1),
+            expected_sha256=program.get("sha256"),
+        )
         
-        if self.check_program_installed(program_key):
-            msg = QMessageBox(self.parent)
-            msg.setWindowTitle('Программа уже установлена')
-            msg.setText(f'{program["name"]} уже установлена в системе.\n\nПереустановить?')
-            msg.setIcon(QMessageBox.Icon.Question)
-            
-            yes_button = msg.addButton('Да', QMessageBox.ButtonRole.YesRole)
-            no_button = msg.addButton('Нет', QMessageBox.ButtonRole.NoRole)
-            msg.setDefaultButton(no_button)
-            
-            msg.exec()
-            
-            if msg.clickedButton() != yes_button:
-                self.log_signal.emit(f"Переустановка {program['name']} отменена", "info")
-                return
-        
-        if not silent:
-            msg = QMessageBox(self.parent)
-            msg.setWindowTitle('Установка программы')
-            msg.setText(f'Начать загрузку и установку {program["name"]}?')
-            msg.setIcon(QMessageBox.Icon.Question)
-            
-            yes_button = msg.addButton('Да', QMessageBox.ButtonRole.YesRole)
-            no_button = msg.addButton('Нет', QMessageBox.ButtonRole.NoRole)
-            msg.setDefaultButton(no_button)
-            
-            msg.exec()
-            
-            if msg.clickedButton() != yes_button:
-                self.log_signal.emit(f"Установка {program['name']} отменена", "info")
-                return
-                
-        self.log_signal.emit(f"Начинаем загрузку {program['name']}...", "info")
-        threading.Thread(target=self._download_and_install, args=(program,), daemon=True).start()
-        
-    def _download_and_install(self, program):
-        """Загружает и устанавливает программу"""
+    def _install_downloaded(self, job, installer_path, program_key):
+        """Устанавливает загруженную программу (установщики выполняются по одному)"""
+        program = self.programs[program_key]
         try:
-            temp_dir = tempfile.gettempdir()
-            installer_path = os.path.join(temp_dir, program["filename"])
-            
-            self.log_signal.emit(f"Загрузка {program['name']}...", "info")
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
+            if job.from_cache:
+                self.log_signal.emit("Файл не изменился, используется копия из кэша", "info")
             
-            response = requests.get(program["url"], stream=True, headers=headers, timeout=60, allow_redirects=True)
-            response.raise_for_status()
-            
-            total_size = int(response.headers.get('content-length', 0))
-            
-            if total_size == 0:
-                self.log_signal.emit("Размер файла неизвестен, начинаем загрузку...", "warning")
-                total_size = 50 * 1024 * 1024
-                
-            downloaded = 0
-            last_logged_progress = 0
-            
-            with open(installer_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        progress = min(90, int((downloaded / total_size) * 90))
-                        
-                        if progress >= last_logged_progress + 10 and progress > 0:
-                            self.log_signal.emit(f"Загружено: {progress}%", "info")
-                            last_logged_progress = progress
-                            
             file_size_mb = os.path.getsize(installer_path) / (1024 * 1024)
             self.log_signal.emit(f"Загрузка завершена ({file_size_mb:.1f} МБ)", "success")
             
@@ -195,15 +65,24 @@ class InstallerManager(QThread):
                 self.log_signal.emit("Файл установщика поврежден или не найден", "error")
                 return
                 
-            if program.get("is_zip", False):
+            if program.get("portable", False):
+                # Программа не требует установки - кладем на рабочий стол
+                desktop_path = os.path.join(os.path.expanduser("~"), "Desktop")
+                shutil.copy2(installer_path, os.path.join(desktop_path, program["filename"]))
+                self.log_signal.emit(f"{program['name']} сохранен на рабочий стол", "success")
+            elif program.get("is_zip", False):
                 self._handle_zip_installation(program, installer_path)
+            elif not is_installer(program):
+                # Утилита (OrderCheck, CLEAR.bat, AnyDesk) - запускаем и не занимаем очередь установки
+                subprocess.Popen([installer_path] + program.get("silent_args", []))
+                self.log_signal.emit(f"{program['name']} запущен", "success")
             else:
-                self._handle_regular_installation(program, installer_path)
+                self._handle_regular_installation(program, installer_path, job.cancel_event)
                 
-        except requests.RequestException as e:
-            self.log_signal.emit(f"Ошибка загрузки {program['name']}: {str(e)}", "error")
         except Exception as e:
             self.log_signal.emit(f"Ошибка установки {program['name']}: {str(e)}", "error")
+        finally:
+            self.installed_states.invalidate(program_key)
     
     def _handle_zip_installation(self, program, zip_path):
         """Обрабатывает установку из ZIP архива"""
@@ -216,43 +95,73 @@ class InstallerManager(QThread):
             
             os.makedirs(extract_dir)
             
+            extract_and_run = program.get("extract_and_run")
+            entry = find_member(zip_path, extract_and_run) if extract_and_run else None
+            if extract_and_run and not entry:
+                self.log_signal.emit(f"Файл {extract_and_run} не найден в архиве", "error")
+            
+            if entry:
+                # Сначала только папка установщика - запуск не ждет остальные файлы
+                self.log_signal.emit(f"Извлечение установщика {program['name']}...", "info")
+                in_entry_folder = member_folder_filter(entry)
+                result = extract_zip(zip_path, extract_dir, include=in_entry_folder)
+                if result.failed:
+                    self.log_signal.emit(f"Не удалось извлечь {len(result.failed)} файлов", "warning")
+                
+                exe_path = member_path(extract_dir, entry)
+                self.log_signal.emit(f"Запуск установщика: {extract_and_run}", "info")
+                process = subprocess.Popen([exe_path])
+                get_install_supervisor().watch(program['name'], process, self._log_install_finished)
+                self.log_signal.emit(f"{program['name']} - установщик запущен", "success")
+                
+                # Остальное содержимое архива - в фоне
+                threading.Thread(
+                    target=self._extract_rest,
+                    args=(zip_path, extract_dir, lambda name: not in_entry_folder(name)),
+                    daemon=True
+                ).start()
+                return
+            
             self.log_signal.emit(f"Извлечение {program['name']}...", "info")
             
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(extract_dir)
+            reporter = ProgressReporter(log_callback=self.log_signal.emit, scale=100, step=25,
+                                        message="Извлечено: {}%")
+            result = extract_zip(zip_path, extract_dir, progress_callback=reporter)
+            if result.failed:
+                self.log_signal.emit(f"Не удалось извлечь {len(result.failed)} файлов", "warning")
             
             self.log_signal.emit(f"Архив извлечен в {extract_dir}", "info")
             
-            extract_and_run = program.get("extract_and_run")
-            if extract_and_run:
-                exe_path = None
-                for root, dirs, files in os.walk(extract_dir):
-                    if extract_and_run in files:
-                        exe_path = os.path.join(root, extract_and_run)
-                        break
-                
-                if exe_path and os.path.exists(exe_path):
-                    self.log_signal.emit(f"Запуск установщика: {extract_and_run}", "info")
-                    subprocess.Popen([exe_path])
-                    self.log_signal.emit(f"{program['name']} - установщик запущен", "success")
-                else:
-                    self.log_signal.emit(f"Файл {extract_and_run} не найден в архиве", "error")
-                    subprocess.Popen(['explorer', extract_dir])
-                    self.log_signal.emit(f"Открыта папка с файлами {program['name']}", "info")
-            else:
-                subprocess.Popen(['explorer', extract_dir])
-                self.log_signal.emit(f"Открыта папка с файлами {program['name']}", "info")
+            subprocess.Popen(['explorer', extract_dir])
+            self.log_signal.emit(f"Открыта папка с файлами {program['name']}", "info")
             
-            try:
-                os.remove(zip_path)
-                self.log_signal.emit("Временный архив удален", "info")
-            except:
-                pass
+            self._remove_archive(zip_path)
                 
         except Exception as e:
             self.log_signal.emit(f"Ошибка при работе с архивом: {str(e)}", "error")
     
-    def _handle_regular_installation(self, program, installer_path):
+    def _extract_rest(self, zip_path, extract_dir, include):
+        """Распаковывает оставшиеся файлы архива после запуска установщика"""
+        try:
+            result = extract_zip(zip_path, extract_dir, include=include)
+            if result.extracted:
+                self.log_signal.emit(f"Остальные файлы архива извлечены ({result.extracted})", "info")
+        except Exception as e:
+            self.log_signal.emit(f"Ошибка при работе с архивом: {str(e)}", "error")
+        self._remove_archive(zip_path)
+    
+    def _remove_archive(self, zip_path):
+        try:
+            os.remove(zip_path)
+            self.log_signal.emit("Временный архив удален", "info")
+        except:
+            pass
+    
+    def _log_install_finished(self, watch):
+        """Сообщает о завершении установщика, за которым никто не ждет (поток наблюдения)"""
+        self.log_signal.emit(f"{watch.name}: установщик завершил работу ({watch.duration:.0f} с)", "success")
+    
+    def _handle_regular_installation(self, program, installer_path, cancel_event=None):
         """Обрабатывает обычную установку .exe/.msi"""
         try:
             self.log_signal.emit(f"Начинаем установку {program['name']}...", "info")
@@ -266,39 +175,41 @@ class InstallerManager(QThread):
             
             self.log_signal.emit(f"Команда установки: {' '.join(install_cmd[:2])}", "info")
             
+            supervisor = get_install_supervisor()
+            expected = supervisor.expected_duration(program['name'])
+            
             process = subprocess.Popen(
                 install_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
                 creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
             )
+            watch = supervisor.watch(program['name'], process)
             
             self.log_signal.emit("95%", "info")
             self.log_signal.emit(f"{program['name']} - установка запущена", "success")
+            if expected:
+                self.log_signal.emit(f"Обычно установка занимает около {expected:.0f} с", "info")
             
-            def cleanup_and_check():
-                try:
-                    process.wait(timeout=300)
-                    
-                    try:
-                        os.remove(installer_path)
-                        self.log_signal.emit("Временный файл удален", "info")
-                    except:
-                        pass
-                    
-                    self.log_signal.emit("100%", "success")
-                    
-                    if process.returncode == 0:
-                        self.log_signal.emit(f"{program['name']} успешно установлена", "success")
-                    else:
-                        self.log_signal.emit(f"{program['name']} - установка завершена с кодом {process.returncode}", "warning")
-                        
-                except subprocess.TimeoutExpired:
+            # Ждем, пока завершатся установщик и все запущенные им процессы:
+            # очередь не запустит следующий установщик раньше (если ожидание не отменят)
+            if not watch.wait(INSTALL_WAIT_TIMEOUT, cancel_event) or watch.expired:
+                if not (cancel_event and cancel_event.is_set()):
                     self.log_signal.emit(f"Установка {program['name']} занимает больше времени чем ожидалось", "info")
-                except Exception as e:
-                    self.log_signal.emit(f"Ошибка в процессе установки: {str(e)}", "error")
+                return
             
-            threading.Thread(target=cleanup_and_check, daemon=True).start()
+            try:
+                os.remove(installer_path)
+                self.log_signal.emit("Временный файл удален", "info")
+            except:
+                pass
+            
+            self.log_signal.emit("100%", "success")
+            
+            if watch.returncode == 0:
+                self.log_signal.emit(f"{program['name']} успешно установлена за {watch.duration:.0f} с", "success")
+            else:
+                self.log_signal.emit(f"{program['name']} - установка завершена с кодом {watch.returncode}", "warning")
             
         except Exception as e:
             self.log_signal.emit(f"Ошибка установки {program['name']}: {str(e)}", "error")
@@ -331,89 +242,51 @@ class InstallerManager(QThread):
                 
                 os.makedirs(extract_dir)
                 
-                with zipfile.ZipFile(file_path, 'r') as zip_ref:
-                    zip_ref.extractall(extract_dir)
+                extract_zip(file_path, extract_dir)
                 
                 subprocess.Popen(['explorer', extract_dir])
                 self.log_signal.emit("ZIP архив извлечен и папка открыта", "success")
                 
             elif file_path.lower().endswith('.msi'):
-                subprocess.Popen(['msiexec', '/i', file_path])
+                process = subprocess.Popen(['msiexec', '/i', file_path])
+                get_install_supervisor().watch(os.path.basename(file_path), process, self._log_install_finished)
                 self.log_signal.emit("MSI установщик запущен", "success")
             else:
-                subprocess.Popen([file_path])
+                process = subprocess.Popen([file_path])
+                get_install_supervisor().watch(os.path.basename(file_path), process, self._log_install_finished)
                 self.log_signal.emit("Установщик запущен", "success")
                 
         except Exception as e:
             self.log_signal.emit(f"Ошибка запуска установщика: {str(e)}", "error")
             
     def check_program_installed(self, program_key):
-        """Проверяет, установлена ли программа"""
+        """Проверяет, установлена ли программа (по снимку реестра в памяти)"""
         try:
             if program_key not in self.programs:
                 return False
                 
             program = self.programs[program_key]
             check_names = program.get("check_names", [program["name"]])
-            
-            if sys.platform == "win32":
-                for name in check_names:
-                    if self._check_in_registry(name) or self._check_in_programs(name):
-                        return True
-                        
-            return False
-            
-        except Exception:
-            return False
-    
-    def _check_in_registry(self, program_name):
-        """Проверяет программу в реестре"""
-        try:
-            registry_paths = [
-                r'HKEY_LOCAL_MACHINE\SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall',
-                r'HKEY_LOCAL_MACHINE\SOFTWARE\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall',
-                r'HKEY_CURRENT_USER\SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall'
-            ]
-            
-            for reg_path in registry_paths:
-                try:
-                    result = subprocess.run([
-                        'reg', 'query', reg_path, '/s', '/f', program_name
-                    ], capture_output=True, text=True, timeout=10)
-                    
-                    if result.returncode == 0 and program_name.lower() in result.stdout.lower():
-                        return True
-                except:
-                    continue
-                    
-            return False
-            
-        except Exception:
-            return False
-    
-    def _check_in_programs(self, program_name):
-        """Проверяет программу через wmic"""
-        try:
-            result = subprocess.run([
-                'wmic', 'product', 'where', f'name like "%{program_name}%"',
-                'get', 'name'
-            ], capture_output=True, text=True, timeout=15)
-            
-            return result.returncode == 0 and program_name.lower() in result.stdout.lower()
+            return self.installed_index.is_installed(check_names)
             
         except Exception:
             return False
             
+    def get_installed_states(self, program_keys=None):
+        """{program_key: (version, uninstall_string, display_name) или None} из кэша с TTL"""
+        keys = self.programs if program_keys is None else program_keys
+        # Программы без check_names (скрипты, архивы без установки) не отслеживаются
+        return self.installed_states.compute({
+            key: self.programs[key]["check_names"]
+            for key in keys if self.programs.get(key, {}).get("check_names")
+        })
+        
     def get_installed_programs_list(self):
         """Возвращает список установленных программ"""
         try:
-            installed = []
-            
-            for key, program in self.programs.items():
-                if self.check_program_installed(key):
-                    installed.append((key, program["name"]))
-                    
-            return installed
+            # Не больше одного прохода по реестру, свежие состояния берутся из кэша
+            states = self.get_installed_states()
+            return [(key, program["name"]) for key, program in self.programs.items() if states.get(key)]
             
         except Exception as e:
             self.log_signal.emit(f"Ошибка проверки установленных программ: {str(e)}", "error")
@@ -449,6 +322,7 @@ class InstallerManager(QThread):
             self.log_signal.emit(f"Открытие программ и компонентов для удаления {program['name']}...", "info")
             
             subprocess.Popen(['appwiz.cpl'])
+            self.installed_states.invalidate(program_key)
             
             self.log_signal.emit("Найдите программу в списке и удалите вручную", "info")
                 
@@ -457,8 +331,7 @@ class InstallerManager(QThread):
             
     def get_programs_by_category(self, category):
         """Возвращает программы по категории"""
-        return [(key, prog["name"]) for key, prog in self.programs.items() 
-                if prog.get("category") == category]
+        return [(key, self.programs[key]["name"]) for key in self.catalog.by_category(category)]
     
     def add_custom_program(self, name, url, silent_args=None):
         """Добавляет пользовательскую программу"""
@@ -471,15 +344,16 @@ class InstallerManager(QThread):
             elif url.lower().endswith('.zip'):
                 filename = f"{key}_installer.zip"
                 
-            self.programs[key] = {
+            self.catalog.add_custom(key, {
                 "name": name,
                 "url": url,
                 "filename": filename,
                 "silent_args": silent_args or ["/S"],
+                "waits": True,
                 "check_names": [name],
                 "category": "custom",
                 "is_custom": True
-            }
+            })
             
             self.log_signal.emit(f"Добавлена программа: {name}", "success")
             return key
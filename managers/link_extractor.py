@@ -0,0 +1,70 @@
+import re
+import codecs
+from html import unescape
+
+# Размер блока при чтении страницы из сети
+CHUNK_SIZE = 16 * 1024
+
+# Открывающий тег <a ...> с атрибутом href в любых кавычках
+_ANCHOR_RE = re.compile(
+    r"""<a\s[^>]*?\bhref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))[^>]*>""",
+    re.IGNORECASE
+)
+
+
+class ZipLinkExtractor:
+    """Потоковый поиск ссылок <a href="...zip"> в HTML
+
+    Страница подается частями через feed(); готовые ссылки забираются
+    методом pop_links(), не дожидаясь конца документа. Дерево документа
+    не строится: хранится только недочитанный хвост последнего тега.
+    """
+
+    def __init__(self, suffix='.zip'):
+        self.suffix = suffix
+        self._tail = ''
+        self._links = []
+
+    def feed(self, text):
+        data = self._tail + text
+        end = 0
+        for match in _ANCHOR_RE.finditer(data):
+            href = unescape(match.group(1) or match.group(2) or match.group(3) or '')
+            if href.endswith(self.suffix):
+                self._links.append(href)
+            end = match.end()
+
+        # Тег, оборванный на границе блока, дочитывается со следующим блоком
+        last_open = data.rfind('<', end)
+        if last_open != -1 and data.find('>', last_open) == -1:
+            self._tail = data[last_open:]
+        else:
+            self._tail = ''
+
+    def close(self):
+        self._tail = ''
+
+    def pop_links(self):
+        """Ссылки, найденные с прошлого вызова"""
+        links, self._links = self._links, []
+        return links
+
+
+def iter_zip_links(chunks, encoding='utf-8', suffix='.zip'):
+    """Выдает href ссылок на архивы по мере разбора блоков (bytes или str)"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    extractor = ZipLinkExtractor(suffix)
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            chunk = decoder.decode(chunk)
+        extractor.feed(chunk)
+        yield from extractor.pop_links()
+    extractor.feed(decoder.decode(b'', final=True))
+    extractor.close()
+    yield from extractor.pop_links()
+
+
+def iter_response_zip_links(response, suffix='.zip'):
+    """Выдает ссылки на архивы из ответа requests (stream=True) во время загрузки"""
+    return iter_zip_links(response.iter_content(CHUNK_SIZE), response.encoding or 'utf-8', suffix)
+
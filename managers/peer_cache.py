@@ -0,0 +1,223 @@
+import os
+import re
+import time
+import socket
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+from config import PEER_CACHE
+from managers.download_manager import download_file, DownloadError, DownloadCancelled
+from managers.download_cache import get_download_cache
+
+DISCOVERY_REQUEST = b"BOBRIK_PEER?"
+DISCOVERY_REPLY = b"BOBRIK_PEER "
+# Сколько ждать ответов на широковещательный запрос и как долго помнить соседей (сек)
+DISCOVERY_TIMEOUT = 0.5
+DISCOVERY_TTL = 300
+PEER_TIMEOUT = 3
+
+_SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class _PeerRequestHandler(BaseHTTPRequestHandler):
+    """Отдает файлы кэша загрузок по хэшу: /blobs/<sha256>"""
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path.startswith('/blobs/'):
+            self._send_blob(parts.path[len('/blobs/'):])
+        else:
+            self.send_error(404)
+
+    def _send_blob(self, sha256):
+        path = self.server.cache.lookup_hash(sha256) if _SHA256_RE.match(sha256) else None
+        if not path:
+            self.send_error(404)
+            return
+
+        size = os.path.getsize(path)
+        start = 0
+        match = re.match(r'bytes=(\d+)-$', self.headers.get('Range', ''))
+        if match and int(match.group(1)) < size:
+            start = int(match.group(1))
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{size - 1}/{size}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(size - start))
+        self.send_header('ETag', f'"{sha256}"')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+
+        self.server.served += 1
+        with open(path, 'rb') as f:
+            f.seek(start)
+            while True:
+                block = f.read(1024 * 1024)
+                if not block:
+                    break
+                self.wfile.write(block)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PeerCacheServer:
+    """HTTP-сервер, раздающий локальный кэш загрузок другим кассам в сети
+
+    Дополнительно отвечает на UDP-запросы поиска, чтобы соседи находили
+    его без ручной настройки.
+    """
+
+    def __init__(self, cache, host='0.0.0.0', port=None, discovery_port=None):
+        self.cache = cache
+        self.host = host
+        self.port = PEER_CACHE['port'] if port is None else port
+        self.discovery_port = PEER_CACHE['discovery_port'] if discovery_port is None else discovery_port
+        self._httpd = None
+        self._udp = None
+
+    def start(self):
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _PeerRequestHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.cache = self.cache
+        self._httpd.served = 0
+        self.port = self._httpd.server_address[1]
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+        if self.discovery_port:
+            self._udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._udp.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._udp.bind((self.host, self.discovery_port))
+            threading.Thread(target=self._answer_discovery, daemon=True).start()
+        return self
+
+    @property
+    def served(self):
+        """Сколько файлов отдано соседям"""
+        return self._httpd.served if self._httpd else 0
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+        if self._udp:
+            self._udp.close()
+            self._udp = None
+
+    def _answer_discovery(self):
+        udp = self._udp
+        while True:
+            try:
+                data, address = udp.recvfrom(64)
+            except OSError:
+                return
+            if data == DISCOVERY_REQUEST:
+                try:
+                    udp.sendto(DISCOVERY_REPLY + str(self.port).encode('ascii'), address)
+                except OSError:
+                    pass
+
+
+class PeerCacheClient:
+    """Ищет файл у соседних касс до обращения в интернет"""
+
+    def __init__(self, peers=None, discovery=None, discovery_port=None, own_port=None):
+        self.peers = list(PEER_CACHE['peers'] if peers is None else peers)
+        self.discovery = PEER_CACHE['discovery'] if discovery is None else discovery
+        self.discovery_port = PEER_CACHE['discovery_port'] if discovery_port is None else discovery_port
+        # Собственный сервер не считается соседом
+        self.own_port = own_port
+        self._discovered = []
+        self._discovered_at = 0.0
+        self._lock = threading.Lock()
+
+    def _discover(self):
+        """Широковещательный поиск соседей по UDP (результат кэшируется)"""
+        with self._lock:
+            if time.monotonic() - self._discovered_at < DISCOVERY_TTL:
+                return list(self._discovered)
+
+            found = []
+            own_addresses = _local_addresses()
+            try:
+                with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp:
+                    udp.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+                    udp.settimeout(DISCOVERY_TIMEOUT)
+                    udp.sendto(DISCOVERY_REQUEST, ('<broadcast>', self.discovery_port))
+                    deadline = time.monotonic() + DISCOVERY_TIMEOUT
+                    while time.monotonic() < deadline:
+                        try:
+                            data, address = udp.recvfrom(64)
+                        except socket.timeout:
+                            break
+                        if not data.startswith(DISCOVERY_REPLY):
+                            continue
+                        port = int(data[len(DISCOVERY_REPLY):])
+                        if address[0] in own_addresses and port == self.own_port:
+                            continue
+                        found.append(f"{address[0]}:{port}")
+            except (OSError, ValueError):
+                pass
+
+            self._discovered = found
+            self._discovered_at = time.monotonic()
+            return list(found)
+
+    def candidates(self):
+        peers = list(self.peers)
+        if self.discovery:
+            peers += [peer for peer in self._discover() if peer not in peers]
+        return peers
+
+    def fetch(self, expected_sha256, dest_path, progress_callback=None, cancel_event=None):
+        """Загружает файл с известным хэшем у первого соседа, у которого он есть
+
+        Хэш должен приходить из доверенного источника (каталог программ,
+        version.json): соседа находят широковещательным запросом, и ответить
+        может любой компьютер в сети. Без хэша соседи не используются.
+        Возвращает sha256 или None.
+        """
+        if not expected_sha256:
+            return None
+        sha256 = expected_sha256.lower()
+        for peer in self.candidates():
+            try:
+                download_file(f"http://{peer}/blobs/{sha256}", dest_path,
+                              timeout=PEER_TIMEOUT * 10, retries=1,
+                              progress_callback=progress_callback,
+                              expected_sha256=sha256, cancel_event=cancel_event)
+            except DownloadCancelled:
+                raise
+            except DownloadError:
+                continue
+            return sha256
+        return None
+
+
+def _local_addresses():
+    addresses = {'127.0.0.1'}
+    try:
+        addresses.update(info[4][0] for info in socket.getaddrinfo(socket.gethostname(), None,
+                                                                   socket.AF_INET))
+    except OSError:
+        pass
+    return addresses
+
+
+_server = None
+
+
+def start_peer_cache():
+    """Включает раздачу кэша и поиск файлов у соседей, если это разрешено в config.py"""
+    global _server
+    if not PEER_CACHE['enabled'] or _server is not None:
+        return _server
+
+    cache = get_download_cache()
+    _server = PeerCacheServer(cache).start()
+    cache.peer_client = PeerCacheClient(own_port=_server.port)
+    return _server
+
@@ -0,0 +1,195 @@
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin, unquote
+from config import PLUGINS_CONFIG, PLUGIN_INDEX_CACHE
+from managers.download_manager import get_session
+from managers.link_extractor import iter_zip_links, iter_response_zip_links
+from managers.plugin_versions import index_versions, find_compatible_version, get_iiko_front_version
+
+PLUGIN_INDEX_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+# Таймаут на одну страницу плагина: (подключение, чтение) в секундах
+PLUGIN_INDEX_TIMEOUT = (5, 15)
+MAX_PARALLEL_INDEX_FETCHES = 5
+
+
+class PluginIndexCache:
+    """Сохраненные на диске списки версий плагинов с ETag/Last-Modified страниц"""
+
+    def __init__(self, path=PLUGIN_INDEX_CACHE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Записи старого формата без version_key индексируются при загрузке
+        for entry in entries.values():
+            index_versions(entry['versions'])
+        return entries
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+    def get(self, plugin_url):
+        """Запись {"versions", "etag", "last_modified"} или None"""
+        with self._lock:
+            entry = self._entries.get(plugin_url)
+            return dict(entry) if entry else None
+
+    def cached_versions(self, plugins_config):
+        """Последние известные версии плагинов: {plugin_name: versions}"""
+        with self._lock:
+            return {
+                plugin_name: self._entries[plugin_url]['versions']
+                for plugin_name, plugin_url in plugins_config.items()
+                if plugin_url in self._entries
+            }
+
+    def store(self, plugin_url, versions, etag=None, last_modified=None):
+        with self._lock:
+            self._entries[plugin_url] = {
+                'versions': versions,
+                'etag': etag,
+                'last_modified': last_modified,
+            }
+            self._save()
+
+
+_index_cache = None
+_index_cache_lock = threading.Lock()
+
+
+def get_plugin_index_cache():
+    """Возвращает общий кэш списков версий"""
+    global _index_cache
+    with _index_cache_lock:
+        if _index_cache is None:
+            _index_cache = PluginIndexCache()
+        return _index_cache
+
+
+def build_plugin_versions(hrefs, plugin_url):
+    """Список версий из ссылок на архивы (новые сверху)"""
+    versions = []
+    for href in hrefs:
+        # Получаем полную ссылку
+        full_url = urljoin(plugin_url, href)
+        # Извлекаем название версии из имени файла
+        filename = unquote(os.path.basename(href))
+        version_name = filename.replace('.zip', '')
+
+        versions.append({
+            'name': version_name,
+            'url': full_url,
+            'filename': filename
+        })
+
+    # Сортируем версии по номеру (новые сверху)
+    return index_versions(versions)
+
+
+def parse_plugin_versions(html, plugin_url):
+    """Извлекает ссылки на архивы (.zip) из страницы плагина (новые сверху)"""
+    return build_plugin_versions(iter_zip_links([html]), plugin_url)
+
+
+def revalidate_plugin_versions(plugin_url, timeout=PLUGIN_INDEX_TIMEOUT, index_cache=None):
+    """Проверяет страницу плагина условным запросом
+
+    Возвращает (versions, changed): при 304 или неизменном списке берется
+    сохраненная копия и changed=False.
+    """
+    index_cache = index_cache or get_plugin_index_cache()
+    entry = index_cache.get(plugin_url)
+
+    headers = dict(PLUGIN_INDEX_HEADERS)
+    if entry:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+    with get_session(plugin_url).get(plugin_url, headers=headers, timeout=timeout,
+                                     stream=True) as response:
+        if response.status_code == 304 and entry:
+            return entry['versions'], False
+        response.raise_for_status()
+        # Ссылки разбираются по мере загрузки страницы
+        versions = build_plugin_versions(iter_response_zip_links(response), plugin_url)
+
+    changed = not entry or entry['versions'] != versions
+    index_cache.store(plugin_url, versions, response.headers.get('ETag'),
+                      response.headers.get('Last-Modified'))
+    return versions, changed
+
+
+def fetch_plugin_versions(plugin_url, timeout=PLUGIN_INDEX_TIMEOUT):
+    """Возвращает версии плагина со страницы rapid.iiko.ru (новые сверху)"""
+    return revalidate_plugin_versions(plugin_url, timeout)[0]
+
+
+def fetch_all_plugin_versions(plugins_config, timeout=PLUGIN_INDEX_TIMEOUT,
+                              max_workers=MAX_PARALLEL_INDEX_FETCHES):
+    """Проверяет страницы всех плагинов параллельно
+
+    Генератор выдает (plugin_name, versions, changed, error) по мере готовности
+    страниц, поэтому медленная папка не задерживает остальные. При ошибке
+    versions - последний сохраненный список (или пустой).
+    """
+    if not plugins_config:
+        return
+    index_cache = get_plugin_index_cache()
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(plugins_config))) as pool:
+        futures = {
+            pool.submit(revalidate_plugin_versions, plugin_url, timeout, index_cache): plugin_name
+            for plugin_name, plugin_url in plugins_config.items()
+        }
+        for future in as_completed(futures):
+            plugin_name = futures[future]
+            try:
+                versions, changed = future.result()
+                yield plugin_name, versions, changed, None
+            except Exception as e:
+                entry = index_cache.get(plugins_config[plugin_name])
+                yield plugin_name, entry['versions'] if entry else [], False, e
+
+
+def find_plugin_version(plugin_name, version=None):
+    """Находит версию плагина из PLUGINS_CONFIG
+
+    Без version - самая новая сборка для установленного iikoFront (или просто последняя).
+    """
+    if plugin_name not in PLUGINS_CONFIG:
+        raise KeyError(f"Плагин {plugin_name} не найден")
+
+    try:
+        versions = fetch_plugin_versions(PLUGINS_CONFIG[plugin_name])
+    except Exception:
+        # Нет связи с сайтом - используем последний сохраненный список
+        entry = get_plugin_index_cache().get(PLUGINS_CONFIG[plugin_name])
+        if not entry:
+            raise
+        versions = entry['versions']
+    if not versions:
+        raise LookupError(f"Версии не найдены для {plugin_name}")
+    if not version:
+        return find_compatible_version(versions, get_iiko_front_version()) or versions[0]
+    for version_info in versions:
+        if version_info['name'] == version or version in version_info['name']:
+            return version_info
+    raise LookupError(f"Версия {version} плагина {plugin_name} не найдена")
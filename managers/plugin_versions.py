@@ -0,0 +1,81 @@
+import os
+import re
+import sys
+import ctypes
+from config import IIKO_PATHS, IIKO_FRONT_VERSION
+
+# Номер версии в имени архива: "Sberbank_8.9.3054" -> 8.9.3054
+_DOTTED_VERSION_RE = re.compile(r'\d+(?:\.\d+)+')
+_NUMBER_RE = re.compile(r'\d+')
+
+
+def version_key(name):
+    """Числовые компоненты версии из имени файла: "Plugin_10.2.15" -> [10, 2, 15]"""
+    dotted = _DOTTED_VERSION_RE.findall(name)
+    if dotted:
+        return [int(part) for part in max(dotted, key=len).split('.')]
+    return [int(part) for part in _NUMBER_RE.findall(name)]
+
+
+def index_versions(versions):
+    """Заполняет version_key (один раз) и сортирует версии: новые сверху
+
+    Сравнение числовое, поэтому 10.x оказывается выше 9.x.
+    """
+    for version in versions:
+        if 'version_key' not in version:
+            version['version_key'] = version_key(version['name'])
+    versions.sort(key=lambda x: (x['version_key'], x['name']), reverse=True)
+    return versions
+
+
+def get_file_version(path):
+    """Версия из ресурсов exe (FileVersion) в виде [major, minor, build, revision] или None"""
+    if sys.platform != 'win32' or not os.path.exists(path):
+        return None
+    try:
+        version_dll = ctypes.windll.version
+        size = version_dll.GetFileVersionInfoSizeW(path, None)
+        if not size:
+            return None
+        buffer = ctypes.create_string_buffer(size)
+        if not version_dll.GetFileVersionInfoW(path, 0, size, buffer):
+            return None
+
+        info = ctypes.c_void_p()
+        length = ctypes.c_uint()
+        if not version_dll.VerQueryValueW(buffer, '\\', ctypes.byref(info), ctypes.byref(length)):
+            return None
+        # VS_FIXEDFILEINFO: dwFileVersionMS и dwFileVersionLS - 3-й и 4-й DWORD
+        fixed = ctypes.cast(info, ctypes.POINTER(ctypes.c_uint32 * 4)).contents
+        ms, ls = fixed[2], fixed[3]
+        return [ms >> 16, ms & 0xFFFF, ls >> 16, ls & 0xFFFF]
+    except (AttributeError, OSError):
+        return None
+
+
+def get_iiko_front_version():
+    """Версия установленного iikoFront: из config.py или из iikoFront.Net.exe"""
+    if IIKO_FRONT_VERSION:
+        return version_key(IIKO_FRONT_VERSION) or None
+    return get_file_version(IIKO_PATHS['executable'])
+
+
+def find_compatible_version(versions, front_version):
+    """Самая новая сборка плагина для версии iikoFront или None
+
+    Подходит сборка с теми же major.minor, что у iikoFront; если такой нет -
+    самая новая более ранняя сборка той же основной версии.
+    """
+    if not front_version or len(front_version) < 2:
+        return None
+    front = list(front_version[:2])
+
+    older = None
+    for version in versions:
+        key = version.get('version_key') or version_key(version['name'])
+        if key[:2] == front:
+            return version
+        if older is None and key[:1] == front[:1] and key[:2] < front:
+            older = version
+    return older
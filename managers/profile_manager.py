@@ -0,0 +1,157 @@
+import os
+import json
+import time
+import threading
+from PyQt6.QtCore import QObject, pyqtSignal
+from config import PROFILES_FILE, DEFAULT_PROFILES
+from managers.download_queue import get_download_queue, PRIORITY_PLUGIN, STATUS_DONE, STATUS_TEXT
+from managers.plugin_index import find_plugin_version
+
+
+class ProfileManager(QObject):
+    """Профили новой кассы: установка набора программ и плагинов за один запуск
+
+    Все загрузки профиля сразу ставятся в общую очередь, поэтому следующие
+    файлы качаются, пока работает текущий установщик. По завершении в лог
+    выводится время загрузки и установки каждого элемента.
+    """
+    log_signal = pyqtSignal(str, str)
+    profile_finished = pyqtSignal(str, bool)  # profile_name, success
+
+    def __init__(self, installer_manager, plugin_installer=None, parent=None):
+        super().__init__(parent)
+        # plugin_installer(plugin_name, version_info, path) распаковывает загруженный плагин
+        self.installer_manager = installer_manager
+        self.plugin_installer = plugin_installer
+
+        self._lock = threading.Lock()
+        self._run = None
+
+        self.download_queue = get_download_queue()
+        self.download_queue.job_finished.connect(self._on_job_finished)
+
+    def load_profiles(self):
+        """Загружает профили из profiles.json (создает файл с профилями по умолчанию)"""
+        try:
+            with open(PROFILES_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            self.save_profiles(DEFAULT_PROFILES)
+        except (OSError, ValueError) as e:
+            self.log_signal.emit(f"Ошибка чтения профилей: {str(e)}", "error")
+        return dict(DEFAULT_PROFILES)
+
+    def save_profiles(self, profiles):
+        """Сохраняет профили в profiles.json"""
+        try:
+            os.makedirs(os.path.dirname(PROFILES_FILE), exist_ok=True)
+            with open(PROFILES_FILE, 'w', encoding='utf-8') as f:
+                json.dump(profiles, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            self.log_signal.emit(f"Ошибка сохранения профилей: {str(e)}", "error")
+
+    def is_running(self):
+        return self._run is not None
+
+    def run_profile(self, profile_name):
+        """Запускает установку всех программ и плагинов профиля"""
+        if self._run is not None:
+            self.log_signal.emit(f"Профиль {self._run['name']} еще выполняется", "warning")
+            return False
+
+        profile = self.load_profiles().get(profile_name)
+        if not profile:
+            self.log_signal.emit(f"Профиль {profile_name} не найден", "error")
+            return False
+
+        programs = [key for key in profile.get('programs', [])
+                    if key in self.installer_manager.programs]
+        for key in profile.get('programs', []):
+            if key not in self.installer_manager.programs:
+                self.log_signal.emit(f"Программа {key} из профиля не найдена в каталоге", "warning")
+        plugins = profile.get('plugins', []) if self.plugin_installer else []
+
+        self._run = {
+            'name': profile_name,
+            'started': time.monotonic(),
+            'jobs': [],
+            'pending': len(plugins),
+            'failed': [],
+        }
+        self.log_signal.emit(
+            f"Профиль {profile_name}: {len(programs)} программ, {len(plugins)} плагинов", "info"
+        )
+
+        for program_key in programs:
+            job = self.installer_manager.queue_install(program_key)
+            with self._lock:
+                self._run['jobs'].append(job)
+
+        if plugins:
+            # Версии плагинов ищутся на сайте - не блокируем интерфейс
+            threading.Thread(target=self._queue_plugins, args=(plugins,), daemon=True).start()
+        elif not programs:
+            self._finish_run()
+        return True
+
+    def _queue_plugins(self, plugins):
+        downloads_path = os.path.join(os.path.expanduser("~"), "Downloads")
+        for plugin in plugins:
+            plugin_name = plugin['name']
+            try:
+                version_info = find_plugin_version(plugin_name, plugin.get('version'))
+                job = self.download_queue.submit(
+                    f"{plugin_name} {version_info['name']}",
+                    version_info['url'],
+                    os.path.join(downloads_path, version_info['filename']),
+                    priority=PRIORITY_PLUGIN,
+                    on_downloaded=self._plugin_handler(plugin_name, version_info),
+                )
+                with self._lock:
+                    self._run['jobs'].append(job)
+            except Exception as e:
+                self.log_signal.emit(f"Плагин {plugin_name}: {str(e)}", "error")
+                with self._lock:
+                    self._run['failed'].append(plugin_name)
+            finally:
+                with self._lock:
+                    self._run['pending'] -= 1
+        self._check_finished()
+
+    def _plugin_handler(self, plugin_name, version_info):
+        def install(job, path):
+            self.plugin_installer(plugin_name, version_info, path)
+        return install
+
+    def _on_job_finished(self, job_id, success):
+        self._check_finished()
+
+    def _check_finished(self):
+        with self._lock:
+            run = self._run
+            if run is None or run['pending'] > 0:
+                return
+            if any(job.is_active for job in run['jobs']):
+                return
+        self._finish_run()
+
+    def _finish_run(self):
+        with self._lock:
+            run, self._run = self._run, None
+        if run is None:
+            return
+
+        total = time.monotonic() - run['started']
+        self.log_signal.emit(f"Профиль {run['name']} выполнен за {total:.0f} с", "success")
+        for job in run['jobs']:
+            self.log_signal.emit(
+                f"  {job.name}: {STATUS_TEXT[job.status]}, загрузка {job.download_time:.1f} с, "
+                f"установка {job.install_time:.1f} с",
+                "success" if job.status == STATUS_DONE else "warning"
+            )
+            if job.status != STATUS_DONE:
+                run['failed'].append(job.name)
+
+        if run['failed']:
+            self.log_signal.emit(f"Не установлено: {', '.join(run['failed'])}", "warning")
+        self.profile_finished.emit(run['name'], not run['failed'])
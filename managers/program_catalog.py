@@ -0,0 +1,189 @@
+import os
+import re
+import copy
+import json
+import threading
+from config import PROGRAM_CATALOG_URL, PROGRAM_CATALOG_CACHE
+from managers.download_manager import get_session
+from managers.default_catalog import DEFAULT_CATALOG
+
+# Версия формата catalog.json, которую понимает эта сборка bobrik
+CATALOG_FORMAT = 1
+CATALOG_TIMEOUT = (5, 15)
+CATALOG_HEADERS = {'User-Agent': 'bobrik-catalog/1.0'}
+
+REQUIRED_FIELDS = ('name', 'url', 'filename')
+
+_SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class CatalogError(ValueError):
+    """catalog.json поврежден или записан в неподдерживаемом формате"""
+
+
+def parse_catalog(data):
+    """Проверяет манифест каталога и возвращает (version, programs)
+
+    Формат: {"version": N, "format": 1, "programs": {key: {...}}}. Обязательны
+    name, url и filename; необязательны size (байт, для прогресса), sha256 (файл
+    проверяется при загрузке; не указывается для файлов, которые меняются по тому
+    же URL), silent_args, check_names, category, is_zip, extract_and_run, portable,
+    segments, location, folder, notice и waits (настоящий установщик: занимает
+    очередь установки, пока не завершится).
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('programs'), dict):
+        raise CatalogError("В каталоге нет раздела programs")
+    if data.get('format', CATALOG_FORMAT) > CATALOG_FORMAT:
+        raise CatalogError(f"Формат каталога {data['format']} не поддерживается, обновите bobrik")
+
+    programs = {}
+    for key, program in data['programs'].items():
+        if not isinstance(program, dict) or any(not program.get(field) for field in REQUIRED_FIELDS):
+            raise CatalogError(f"Программа {key}: нужны поля {', '.join(REQUIRED_FIELDS)}")
+        sha256 = program.get('sha256')
+        if sha256 is not None and not (isinstance(sha256, str) and _SHA256_RE.match(sha256.lower())):
+            raise CatalogError(f"Программа {key}: sha256 должен быть 64 шестнадцатеричными символами")
+        size = program.get('size')
+        if size is not None and (not isinstance(size, int) or size <= 0):
+            raise CatalogError(f"Программа {key}: size должен быть положительным числом")
+        programs[key] = program
+    return data.get('version', 0), programs
+
+
+def is_installer(program):
+    """Программа ставится установщиком, которого нужно дождаться
+
+    Такие программы занимают общую очередь установки (строго по одному, MSI
+    не умеет работать параллельно); утилиты запускаются сразу и не ждутся.
+    Одно правило для вкладки программ и для InstallerManager (профили).
+    """
+    return bool(program.get("waits") or program.get("is_msi")
+                or program["filename"].lower().endswith('.msi'))
+
+
+class ProgramCatalog:
+    """Каталог программ, общий для вкладки программ и InstallerManager
+
+    Каталог читается с диска при первом обращении, а не при запуске;
+    revalidate() сверяет его с опубликованным catalog.json по ETag.
+    """
+
+    def __init__(self, url=PROGRAM_CATALOG_URL, cache_path=PROGRAM_CATALOG_CACHE, default=DEFAULT_CATALOG):
+        self.url = url
+        self.cache_path = cache_path
+        self.default = default
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._version = 0
+        self._etag = None
+        self._programs = {}
+        self._categories = {}
+        self._custom = {}
+
+    def _read(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _apply(self, version, programs, etag=None):
+        programs.update(self._custom)
+        categories = {}
+        for key, program in programs.items():
+            categories.setdefault(program.get('category'), []).append(key)
+        self._version, self._etag = version, etag
+        self._programs, self._categories = programs, categories
+        self._loaded = True
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if self._loaded:
+                return
+            # Сначала последняя загруженная копия, затем каталог, с которым собран bobrik
+            try:
+                data = self._read(self.cache_path)
+                version, programs = parse_catalog(data)
+                if version >= self.default.get('version', 0):
+                    self._apply(version, programs, data.get('etag'))
+                    return
+            except (OSError, ValueError):
+                pass
+            version, programs = parse_catalog(copy.deepcopy(self.default))
+            self._apply(version, programs)
+
+    def _save(self, data, etag):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = self.cache_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(dict(data, etag=etag), f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass
+
+    @property
+    def version(self):
+        self._ensure_loaded()
+        return self._version
+
+    @property
+    def programs(self):
+        """{program_key: описание программы}"""
+        self._ensure_loaded()
+        return self._programs
+
+    def get(self, program_key):
+        return self.programs.get(program_key)
+
+    def by_category(self, category):
+        """Ключи программ категории"""
+        self._ensure_loaded()
+        return list(self._categories.get(category, []))
+
+    def add_custom(self, program_key, program):
+        """Добавляет программу пользователя (только в памяти, переживает обновление каталога)"""
+        self._ensure_loaded()
+        with self._lock:
+            self._custom[program_key] = program
+            self._programs[program_key] = program
+            self._categories.setdefault(program.get('category'), []).append(program_key)
+
+    def revalidate(self, timeout=CATALOG_TIMEOUT):
+        """Проверяет опубликованный каталог условным запросом
+
+        Возвращает True, если каталог обновился. Каталог более старой версии,
+        чем уже загруженный, не применяется.
+        """
+        self._ensure_loaded()
+        headers = dict(CATALOG_HEADERS)
+        if self._etag:
+            headers['If-None-Match'] = self._etag
+
+        response = get_session(self.url).get(self.url, headers=headers, timeout=timeout)
+        if response.status_code == 304:
+            return False
+        response.raise_for_status()
+
+        data = response.json()
+        version, programs = parse_catalog(data)
+        etag = response.headers.get('ETag')
+        with self._lock:
+            if version < self._version:
+                return False
+            changed = version != self._version or programs != {
+                key: program for key, program in self._programs.items() if key not in self._custom
+            }
+            self._save(data, etag)
+            self._apply(version, programs, etag)
+        return changed
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_program_catalog():
+    """Возвращает общий каталог программ"""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = ProgramCatalog()
+        return _catalog
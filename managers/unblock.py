@@ -0,0 +1,55 @@
+import os
+import subprocess
+
+# Альтернативный поток NTFS с отметкой "загружено из интернета" (Mark-of-the-Web)
+ZONE_STREAM = ':Zone.Identifier'
+UNBLOCK_TIMEOUT = 120
+
+
+def run_command(args, timeout=UNBLOCK_TIMEOUT):
+    """Запускает команду без окна и возвращает код завершения"""
+    result = subprocess.run(args, capture_output=True, text=True, timeout=timeout,
+                            creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0))
+    return result.returncode
+
+
+def _ps_quote(path):
+    return "'" + path.replace("'", "''") + "'"
+
+
+def unblock_command(directory):
+    """Одна команда PowerShell, снимающая блокировку со всех файлов папки"""
+    script = (f"Get-ChildItem -LiteralPath {_ps_quote(directory)} -Recurse -File "
+              f"| Unblock-File -ErrorAction SilentlyContinue")
+    return ['powershell', '-NoProfile', '-NonInteractive', '-Command', script]
+
+
+def unblock_directory(directory, runner=run_command, use_streams=None):
+    """Снимает блокировку Windows со всех файлов папки
+
+    Поток Zone.Identifier удаляется напрямую из Python; если это не удалось
+    хотя бы для одного файла, выполняется один вызов PowerShell на всю папку.
+    runner(args, timeout) -> код завершения позволяет подменить запуск команд.
+    Возвращает (число файлов со снятой отметкой, был ли вызван PowerShell).
+    """
+    if use_streams is None:
+        use_streams = os.name == 'nt'
+
+    unblocked = 0
+    need_fallback = not use_streams
+    if use_streams:
+        for root, dirs, files in os.walk(directory):
+            for file in files:
+                try:
+                    os.remove(os.path.join(root, file) + ZONE_STREAM)
+                    unblocked += 1
+                except FileNotFoundError:
+                    # Файл не помечен - снимать нечего
+                    continue
+                except OSError:
+                    need_fallback = True
+
+    if need_fallback:
+        if runner(unblock_command(directory), UNBLOCK_TIMEOUT) != 0:
+            raise OSError("Unblock-File завершился с ошибкой")
+    return unblocked, need_fallback
@@ -7,6 +7,12 @@ import threading
 import shutil
 from PyQt6.QtCore import QThread, pyqtSignal, QTimer
 from PyQt6.QtWidgets import QMessageBox
+from managers.download_manager import ProgressReporter, get_session
+from managers.download_queue import (get_download_queue, PRIORITY_SELF_UPDATE, PRIORITY_BACKGROUND,
+                                     STATUS_FAILED)
+from managers.delta_patch import apply_delta, DeltaError, file_sha256
+from managers.version_slots import slot_path, install_slot, switch_version
+from config import APP_VERSION, UPDATES_DIR, UPDATE_CHECK
 
 try:
     import requests
@@ -16,23 +22,90 @@ except ImportError:
 class SimpleUpdateManager(QThread):
     log_signal = pyqtSignal(str, str)
     update_available_signal = pyqtSignal(str, str, str)  # version, notes, download_url
-    show_confirmation_signal = pyqtSignal(str, str)  # script_path, new_exe_path
+    show_confirmation_signal = pyqtSignal(str)  # version
+    switch_finished_signal = pyqtSignal(str, bool)  # version, success
+    schedule_check_signal = pyqtSignal(int)  # задержка следующей фоновой проверки, мс
     
     def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
-        self.current_version = "1.1.4"  # Текущая версия приложения
+        self.current_version = APP_VERSION  # Текущая версия приложения
         self.github_repo = "Feuda1/bobrik"
         self.version_url = f"https://raw.githubusercontent.com/{self.github_repo}/main/version.json"
         self.exe_url = f"https://github.com/{self.github_repo}/releases/latest/download/bobrik.exe"
+        self.expected_sha256 = None  # Хэш bobrik.exe из version.json
+        self.delta_info = None  # Патч от текущей версии: {"url": ..., "sha256": ...}
+        self._delta_job_id = None
+        self._delta_fallback = None
+        
+        # Фоновые обновления: ETag version.json, загруженное заранее обновление
+        self.state_path = os.path.join(UPDATES_DIR, 'state.json')
+        self.staged_update = None  # {"version": ..., "path": ...}
+        self._state = self._load_state()
+        self._failures = 0
+        self._staging_version = None
+        self._staging_job_id = None  # Задание фоновой загрузки обновления
+        self._notified_version = None
+        self.check_timer = QTimer(self)
+        self.check_timer.setSingleShot(True)
+        self.check_timer.timeout.connect(self._start_background_check)
         
         # Подключаем сигналы к слотам в главном потоке
         self.update_available_signal.connect(self._show_update_dialog_in_main_thread)
         self.show_confirmation_signal.connect(self._show_confirmation_dialog)
+        self.switch_finished_signal.connect(self._on_switch_finished)
+        self.schedule_check_signal.connect(self.check_timer.start)
+        get_download_queue().job_finished.connect(self._on_update_job_finished)
         
     def run(self):
         pass
         
+    def start_background_updates(self):
+        """Запускает периодическую проверку и фоновую загрузку обновлений"""
+        if requests:
+            self.check_timer.start(UPDATE_CHECK['first_delay_s'] * 1000)
+        
+    def _load_state(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+            
+    def _save_state(self):
+        try:
+            os.makedirs(UPDATES_DIR, exist_ok=True)
+            tmp_path = self.state_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._state, f, ensure_ascii=False)
+            os.replace(tmp_path, self.state_path)
+        except OSError:
+            pass
+            
+    def _fetch_version_data(self):
+        """Загружает version.json условным запросом (304 - берем сохраненную копию)"""
+        headers = {'User-Agent': 'bobrik-updater/1.0'}
+        if self._state.get('etag') and self._state.get('version_data'):
+            headers['If-None-Match'] = self._state['etag']
+            
+        response = get_session(self.version_url).get(self.version_url, headers=headers, timeout=10)
+        if response.status_code == 304:
+            return self._state['version_data']
+        response.raise_for_status()
+        
+        version_data = response.json()
+        self._state['etag'] = response.headers.get('etag')
+        self._state['version_data'] = version_data
+        self._save_state()
+        return version_data
+        
+    def _read_version_data(self, version_data):
+        """Разбирает version.json, возвращает (версия, описание, ссылка на exe)"""
+        self.expected_sha256 = version_data.get('sha256') or None
+        self.delta_info = version_data.get('deltas', {}).get(self.current_version)
+        return (version_data.get('version', ''), version_data.get('notes', ''),
+                version_data.get('download_url', self.exe_url))
+        
     def check_for_updates(self):
         """Проверяет наличие обновлений"""
         try:
@@ -49,22 +122,11 @@ class SimpleUpdateManager(QThread):
     def _check_updates_async(self):
         """Проверяет обновления в отдельном потоке"""
         try:
-            headers = {
-                'User-Agent': 'bobrik-updater/1.0',
-                'Cache-Control': 'no-cache'
-            }
-            
-            # Загружаем информацию о версии
-            response = requests.get(self.version_url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            version_data = response.json()
-            latest_version = version_data.get('version', '')
-            release_notes = version_data.get('notes', '')
-            download_url = version_data.get('download_url', self.exe_url)
+            latest_version, release_notes, download_url = self._read_version_data(self._fetch_version_data())
             
             if self._is_newer_version(latest_version, self.current_version):
                 self.log_signal.emit(f"🎉 Доступна новая версия: {latest_version}", "success")
+                self._find_staged_update(latest_version)
                 # Отправляем сигнал в главный поток
                 self.update_available_signal.emit(latest_version, release_notes, download_url)
             else:
@@ -76,6 +138,86 @@ class SimpleUpdateManager(QThread):
             self.log_signal.emit("📄 Ошибка формата файла версии", "error")
         except Exception as e:
             self.log_signal.emit(f"❌ Ошибка при проверке обновлений: {str(e)}", "error")
+            
+    def _start_background_check(self):
+        threading.Thread(target=self._background_check, daemon=True).start()
+        
+    def _background_check(self):
+        """Тихая проверка: новая версия загружается заранее, диалог - когда все готово"""
+        next_check = UPDATE_CHECK['interval_hours'] * 3600
+        try:
+            latest_version, release_notes, download_url = self._read_version_data(self._fetch_version_data())
+            self._failures = 0
+            
+            if self._is_newer_version(latest_version, self.current_version):
+                if self._find_staged_update(latest_version):
+                    if self._notified_version != latest_version:
+                        self._notified_version = latest_version
+                        self.update_available_signal.emit(latest_version, release_notes, download_url)
+                elif self._staging_version != latest_version and self.expected_sha256:
+                    if get_download_queue().active_jobs():
+                        # Не мешаем загрузкам пользователя - попробуем позже
+                        next_check = UPDATE_CHECK['retry_min'] * 60
+                    else:
+                        self._staging_version = latest_version
+                        self._download_and_install_update(download_url, latest_version, interactive=False)
+        except Exception:
+            next_check = self._next_backoff()
+        
+        self.schedule_check_signal.emit(next_check * 1000)
+        
+    def _next_backoff(self):
+        """Экспоненциальная пауза между неудачными попытками (сек)"""
+        delay = min(UPDATE_CHECK['retry_min'] * 60 * 2 ** self._failures,
+                    UPDATE_CHECK['max_backoff_hours'] * 3600)
+        self._failures += 1
+        return delay
+        
+    def _on_staging_failed(self, version):
+        """Фоновая загрузка не удалась - следующая проверка попробует снова"""
+        self._staging_job_id = None
+        if self._staging_version == version:
+            self._staging_version = None
+        self.schedule_check_signal.emit(self._next_backoff() * 1000)
+        
+    def _find_staged_update(self, version):
+        """Проверяет, загружено ли обновление заранее и не повреждено ли оно
+
+        Хэш exe запоминается при загрузке; файл перечитывается, только если
+        его размер или время изменения с тех пор поменялись.
+        """
+        path = slot_path(version)
+        if not os.path.exists(path) or not self.expected_sha256:
+            # Без хэша из version.json загруженному exe не доверяем
+            self.staged_update = None
+            return None
+        stat = os.stat(path)
+        staged = self._state.get('staged') or {}
+        if staged.get('version') == version and staged.get('size') == stat.st_size \
+                and staged.get('mtime') == stat.st_mtime:
+            sha256 = staged.get('sha256')
+        else:
+            sha256 = file_sha256(path).hex()
+        if sha256 != self.expected_sha256.lower():
+            os.remove(path)
+            self.staged_update = None
+            return None
+        self._remember_staged(version, path, sha256)
+        return path
+        
+    def _stage_update(self, new_exe_path, version, sha256):
+        """Переносит проверенное обновление в слот versions/<версия>"""
+        staged_path = install_slot(new_exe_path, version)
+        self._remember_staged(version, staged_path, sha256)
+        return staged_path
+        
+    def _remember_staged(self, version, path, sha256):
+        stat = os.stat(path)
+        self.staged_update = {'version': version, 'path': path}
+        staged = {'version': version, 'sha256': sha256, 'size': stat.st_size, 'mtime': stat.st_mtime}
+        if self._state.get('staged') != staged:
+            self._state['staged'] = staged
+            self._save_state()
                 
     def _is_newer_version(self, latest, current):
         """Сравнивает версии (например: 1.0.1 > 1.0.0)"""
@@ -98,6 +240,8 @@ class SimpleUpdateManager(QThread):
             if not self.parent:
                 return
                 
+            staged = self.staged_update and self.staged_update['version'] == version
+                
             msg = QMessageBox(self.parent)
             msg.setWindowTitle('Доступно обновление bobrik')
             
@@ -108,6 +252,8 @@ class SimpleUpdateManager(QThread):
                 short_notes = notes[:300] + '...' if len(notes) > 300 else notes
                 text += f'Что нового:\n{short_notes}\n\n'
                 
+            if staged:
+                text += '✅ Обновление уже загружено, bobrik перезапустится сразу.\n\n'
             text += '💾 Обновить сейчас?'
             
             msg.setText(text)
@@ -121,116 +267,155 @@ class SimpleUpdateManager(QThread):
             result = msg.exec()
             
             if msg.clickedButton() == update_button:
-                self.log_signal.emit("📥 Начинаем загрузку обновления...", "info")
-                threading.Thread(target=self._download_and_install_update, 
-                               args=(download_url, version), daemon=True).start()
+                if staged:
+                    self._switch_to_version(version)
+                else:
+                    self.log_signal.emit("📥 Начинаем загрузку обновления...", "info")
+                    self._download_and_install_update(download_url, version)
             else:
                 self.log_signal.emit("⏰ Обновление отложено", "info")
                 
         except Exception as e:
             self.log_signal.emit(f"❌ Ошибка диалога обновления: {str(e)}", "error")
             
-    def _download_and_install_update(self, download_url, version):
-        """Скачивает и устанавливает обновление"""
+    def _download_and_install_update(self, download_url, version, interactive=True):
+        """Скачивает обновление: патч к текущему exe, если он опубликован, иначе exe целиком
+
+        interactive=False - фоновая загрузка с низким приоритетом и без вывода прогресса.
+        """
+        if not self.expected_sha256:
+            self.log_signal.emit("❌ В version.json нет контрольной суммы, обновление не загружается", "error")
+            return
+        if self.delta_info and getattr(sys, 'frozen', False):
+            self._download_delta_update(download_url, version, interactive)
+        else:
+            self._download_full_update(download_url, version, interactive)
+            
+    def _download_delta_update(self, download_url, version, interactive):
+        """Ставит в очередь загрузку бинарного патча от текущей версии"""
+        patch_path = os.path.join(tempfile.gettempdir(), f"bobrik_{self.current_version}_{version}.delta")
+        if interactive:
+            self.log_signal.emit("📥 Загружаем патч обновления...", "info")
+        job = get_download_queue().submit(
+            f"bobrik {version} (патч)", self.delta_info['url'], patch_path,
+            priority=PRIORITY_SELF_UPDATE if interactive else PRIORITY_BACKGROUND,
+            on_downloaded=lambda job, path: self._apply_delta_update(job, path, download_url,
+                                                                     version, interactive),
+            use_cache=False,
+            headers={'User-Agent': 'bobrik-updater/1.0'},
+            expected_sha256=self.delta_info.get('sha256'),
+        )
+        self._delta_job_id = job.job_id
+        self._delta_fallback = (download_url, version, interactive)
+        if not interactive:
+            self._staging_job_id = job.job_id
+        
+    def _on_update_job_finished(self, job_id, success):
+        """Если патч не загрузился - качаем обновление целиком; следит за фоновой загрузкой"""
+        if job_id == self._delta_job_id:
+            self._delta_job_id = None
+            job = get_download_queue().get_job(job_id)
+            if not success and job and job.status == STATUS_FAILED:
+                self.log_signal.emit("⚠️ Патч недоступен, загружаем обновление целиком", "warning")
+                self._download_full_update(*self._delta_fallback)
+                return
+        
+        # Патч, не собравшийся в exe, заменяет задание загрузкой целиком - ее и ждем
+        if job_id != self._staging_job_id:
+            return
+        version = self._staging_version
+        if self.staged_update and self.staged_update['version'] == version:
+            self._staging_job_id = None
+            self._failures = 0
+        else:
+            self._on_staging_failed(version)
+            
+    def _apply_delta_update(self, job, patch_path, download_url, version, interactive):
+        """Собирает новый exe из текущего и патча, при ошибке качает exe целиком"""
+        new_exe_path = os.path.join(tempfile.gettempdir(), f"bobrik_{version}.exe")
+        try:
+            sha256 = apply_delta(sys.executable, patch_path, new_exe_path)
+            if self.expected_sha256 and sha256 != self.expected_sha256.lower():
+                raise DeltaError("Контрольная сумма не совпадает с version.json")
+            
+            saved_mb = (os.path.getsize(new_exe_path) - os.path.getsize(patch_path)) / (1024 * 1024)
+            self.log_signal.emit(f"🧩 Обновление собрано из патча, сэкономлено {saved_mb:.1f} МБ", "success")
+        except DeltaError as e:
+            self.log_signal.emit(f"⚠️ Не удалось применить патч ({str(e)}), загружаем обновление целиком", "warning")
+            self._download_full_update(download_url, version, interactive)
+            return
+        finally:
+            try:
+                os.remove(patch_path)
+            except OSError:
+                pass
+        
+        self._on_update_downloaded(job, new_exe_path, version, interactive, sha256)
+            
+    def _download_full_update(self, download_url, version, interactive=True):
+        """Ставит загрузку обновления в очередь (вперед остальных загрузок)"""
+        temp_dir = tempfile.gettempdir()
+        new_exe_path = os.path.join(temp_dir, f"bobrik_{version}.exe")
+        
+        reporter = None
+        if interactive:
+            reporter = ProgressReporter(self.log_signal.emit, scale=100, step=20,
+                                        message="📥 Загружено: {}%")
+        job = get_download_queue().submit(
+            f"bobrik {version}", download_url, new_exe_path,
+            priority=PRIORITY_SELF_UPDATE if interactive else PRIORITY_BACKGROUND,
+            on_downloaded=lambda job, path: self._on_update_downloaded(job, path, version, interactive),
+            use_cache=False,
+            progress_callback=reporter,
+            headers={'User-Agent': 'bobrik-updater/1.0'},
+            expected_sha256=self.expected_sha256,
+        )
+        if not interactive:
+            self._staging_job_id = job.job_id
+        
+    def _on_update_downloaded(self, job, new_exe_path, version, interactive=True, sha256=None):
+        """Проверяет загруженное обновление и готовит его установку
+
+        sha256 уже посчитан при загрузке (или при сборке из патча) - exe
+        повторно не читается.
+        """
         try:
-            # Создаем временный файл
-            temp_dir = tempfile.gettempdir()
-            new_exe_path = os.path.join(temp_dir, f"bobrik_{version}.exe")
-            
-            # Скачиваем новую версию
-            headers = {
-                'User-Agent': 'bobrik-updater/1.0'
-            }
-            
-            response = requests.get(download_url, stream=True, headers=headers, timeout=60)
-            response.raise_for_status()
-            
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-            last_progress = 0
-            
-            with open(new_exe_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        
-                        if total_size > 0:
-                            progress = int((downloaded / total_size) * 100)
-                            if progress >= last_progress + 20:  # Логируем каждые 20%
-                                self.log_signal.emit(f"📥 Загружено: {progress}%", "info")
-                                last_progress = progress
-            
-            self.log_signal.emit("✅ Загрузка завершена", "success")
-            
-            # Проверяем размер файла
+            # Обновление без хэша в version.json или с другим хэшем не устанавливается
+            if not self.expected_sha256:
+                self.log_signal.emit("❌ В version.json нет контрольной суммы, обновление отклонено", "error")
+                return
+            sha256 = sha256 or (job.sha256 if job else None)
+            if not sha256 or sha256 != self.expected_sha256.lower():
+                self.log_signal.emit("❌ Контрольная сумма обновления не совпадает с version.json", "error")
+                os.remove(new_exe_path)
+                return
+            
+            if interactive:
+                self.log_signal.emit("✅ Загрузка завершена", "success")
+                self.log_signal.emit("🔒 Контрольная сумма SHA-256 совпала", "success")
+            
             file_size_mb = os.path.getsize(new_exe_path) / (1024 * 1024)
             if file_size_mb < 5:  # Если файл меньше 5 МБ, что-то не так
                 self.log_signal.emit("❌ Загруженный файл слишком мал", "error")
                 return
                 
-            self.log_signal.emit(f"📦 Размер файла: {file_size_mb:.1f} МБ", "info")
+            self._stage_update(new_exe_path, version, sha256)
             
-            # Создаем скрипт обновления
-            self._create_update_script(new_exe_path)
+            if interactive:
+                self.log_signal.emit(f"📦 Размер файла: {file_size_mb:.1f} МБ", "info")
+                self.show_confirmation_signal.emit(version)
+            else:
+                self.log_signal.emit(f"📦 Обновление {version} загружено и готово к установке", "info")
+                self._notified_version = version
+                _, notes, download_url = self._read_version_data(self._state.get('version_data', {}))
+                self.update_available_signal.emit(version, notes, download_url)
             
         except Exception as e:
             self.log_signal.emit(f"❌ Ошибка загрузки обновления: {str(e)}", "error")
             
-    def _create_update_script(self, new_exe_path):
-        """Создает скрипт для замены файла и перезапуска"""
-        try:
-            current_exe = sys.executable if getattr(sys, 'frozen', False) else __file__
-            temp_dir = tempfile.gettempdir()
-            script_path = os.path.join(temp_dir, "bobrik_update.bat")
-            
-            self.log_signal.emit(f"Создание скрипта обновления: {script_path}", "info")
-            
-            # Создаем batch скрипт для Windows (без эмодзи)
-            script_content = f'''@echo off
-echo Obnovlenie bobrik...
-timeout /t 3 /nobreak > nul
-
-echo Sozdanie rezervnoy kopii...
-if exist "{current_exe}.backup" del /q "{current_exe}.backup" 2>nul
-ren "{current_exe}" "{os.path.basename(current_exe)}.backup" 2>nul
-
-echo Ustanovka novoy versii...
-copy /y "{new_exe_path}" "{current_exe}" 2>nul
-
-if exist "{current_exe}" (
-    echo Zapusk obnovlennoy versii...
-    start "" "{current_exe}"
-    
-    echo Ochistka vremennyh faylov...
-    timeout /t 2 /nobreak > nul
-    del /q "{new_exe_path}" 2>nul
-    
-    echo Obnovlenie zaversheno uspeshno
-) else (
-    echo Oshibka obnovleniya, vosstanovlenie rezervnoy kopii...
-    ren "{os.path.basename(current_exe)}.backup" "{os.path.basename(current_exe)}" 2>nul
-)
-
-del /q "%~f0" 2>nul
-'''
-            
-            with open(script_path, 'w', encoding='ascii', errors='ignore') as f:
-                f.write(script_content)
-                
-            self.log_signal.emit("Скрипт создан, отправляем сигнал для показа диалога", "info")
-            
-            # Используем сигнал для показа диалога в главном потоке
-            self.show_confirmation_signal.emit(script_path, new_exe_path)
-                
-        except Exception as e:
-            self.log_signal.emit(f"Ошибка создания скрипта обновления: {str(e)}", "error")
-            
-    def _show_confirmation_dialog(self, script_path, new_exe_path):
+    def _show_confirmation_dialog(self, version):
         """Показ диалога подтверждения через сигнал (выполняется в главном потоке)"""
         try:
-            self.log_signal.emit("Показываем диалог подтверждения в главном потоке", "info")
-            
             if not self.parent:
                 self.log_signal.emit("Родительский виджет не найден", "error")
                 return
@@ -244,52 +429,35 @@ del /q "%~f0" 2>nul
             install_button = msg.addButton('Обновить', QMessageBox.ButtonRole.YesRole)
             cancel_button = msg.addButton('Отмена', QMessageBox.ButtonRole.NoRole)
             
-            self.log_signal.emit("Диалог создан, показываем пользователю", "info")
-            
             # Показываем диалог
             result = msg.exec()
             
-            self.log_signal.emit("Диалог закрыт пользователем", "info")
-            
             if msg.clickedButton() == install_button:
-                self.log_signal.emit("Пользователь выбрал 'Обновить'", "info")
-                self._start_update_process(script_path, new_exe_path)
+                self._switch_to_version(version)
             else:
-                self.log_signal.emit("Пользователь выбрал 'Отмена'", "info")
-                self._cleanup_update_files(script_path, new_exe_path)
+                # Загруженное обновление остается - позже установится без загрузки
+                self.log_signal.emit("Обновление сохранено и будет предложено позже", "info")
                 
         except Exception as e:
             self.log_signal.emit(f"Ошибка диалога подтверждения: {str(e)}", "error")
             
-    def _start_update_process(self, script_path, new_exe_path):
-        """Запускает процесс обновления"""
-        try:
-            self.log_signal.emit("Запускаем процесс обновления", "info")
-            
-            # Запускаем скрипт обновления
-            self.log_signal.emit(f"Запуск скрипта: {script_path}", "info")
-            process = subprocess.Popen([script_path], shell=True, cwd=os.path.dirname(script_path))
-            self.log_signal.emit(f"Скрипт запущен с PID: {process.pid}", "info")
-            
-            # Планируем закрытие приложения
-            self.log_signal.emit("Закрытие приложения через 3 секунды", "info")
-            QTimer.singleShot(3000, self._close_application)
-            
-        except Exception as e:
-            self.log_signal.emit(f"Ошибка запуска обновления: {str(e)}", "error")
-            
-    def _cleanup_update_files(self, script_path, new_exe_path):
-        """Очищает файлы обновления при отмене"""
-        try:
-            if os.path.exists(new_exe_path):
-                os.remove(new_exe_path)
-                self.log_signal.emit("Временный exe удален", "info")
-            if os.path.exists(script_path):
-                os.remove(script_path)
-                self.log_signal.emit("Скрипт удален", "info")
-            self.log_signal.emit("Обновление отменено", "info")
-        except Exception as e:
-            self.log_signal.emit(f"Ошибка удаления файлов: {str(e)}", "warning")
+    def _switch_to_version(self, version):
+        """Запускает новую версию из слота и ждет подтверждения ее запуска"""
+        if not getattr(sys, 'frozen', False):
+            self.log_signal.emit("Обновление устанавливается только в собранном bobrik.exe", "warning")
+            return
+            
+        self.log_signal.emit(f"🔄 Запуск версии {version}...", "info")
+        threading.Thread(
+            target=lambda: self.switch_finished_signal.emit(version, switch_version(version)),
+            daemon=True
+        ).start()
+        
+    def _on_switch_finished(self, version, success):
+        if success:
+            self._close_application()
+        else:
+            self.log_signal.emit(f"❌ Версия {version} не запустилась, bobrik остается на {self.current_version}", "error")
             
     def _close_application(self):
         """Закрывает приложение"""
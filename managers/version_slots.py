@@ -0,0 +1,139 @@
+import os
+import sys
+import json
+import time
+import shutil
+import subprocess
+from config import APP_VERSION, VERSIONS_DIR, VERSION_POINTER, HEALTH_TIMEOUT
+
+# Аргумент, с которым запускается новая версия: путь к файлу подтверждения запуска
+HEALTH_ARG = '--health-file'
+EXE_NAME = 'bobrik.exe'
+
+
+def parse_version(version):
+    try:
+        return tuple(int(x) for x in version.split('.'))
+    except (AttributeError, ValueError):
+        return ()
+
+
+def slot_path(version):
+    """Путь к exe версии: versions/<version>/bobrik.exe"""
+    return os.path.join(VERSIONS_DIR, version, EXE_NAME)
+
+
+def read_pointer():
+    """Содержимое current.json: {"version", "previous", "pending"} или {}"""
+    try:
+        with open(VERSION_POINTER, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_pointer(pointer):
+    """Атомарно переключает текущую версию (замена current.json через os.replace)"""
+    os.makedirs(os.path.dirname(VERSION_POINTER), exist_ok=True)
+    tmp_path = VERSION_POINTER + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(pointer, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, VERSION_POINTER)
+
+
+def install_slot(exe_path, version):
+    """Переносит загруженный exe в слот версии (без копирования, если диск тот же)"""
+    target = slot_path(version)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if os.path.abspath(exe_path) != os.path.abspath(target):
+        shutil.move(exe_path, target)
+    return target
+
+
+def remove_old_slots(keep):
+    """Удаляет слоты, кроме перечисленных версий (текущая и предыдущая)"""
+    if not os.path.isdir(VERSIONS_DIR):
+        return
+    for version in os.listdir(VERSIONS_DIR):
+        if version not in keep:
+            shutil.rmtree(os.path.join(VERSIONS_DIR, version), ignore_errors=True)
+
+
+def switch_version(version, timeout=HEALTH_TIMEOUT):
+    """Переключает на версию из слота и ждет подтверждения запуска
+
+    Новая версия должна создать файл подтверждения за timeout секунд,
+    иначе процесс завершается и указатель возвращается на прежнюю версию.
+    Возвращает True, если новая версия запустилась.
+    """
+    target = slot_path(version)
+    if not os.path.exists(target):
+        return False
+
+    previous = read_pointer()
+    health_path = os.path.join(VERSIONS_DIR, version, 'started.ok')
+    if os.path.exists(health_path):
+        os.remove(health_path)
+
+    write_pointer({'version': version, 'previous': APP_VERSION, 'pending': True})
+    process = subprocess.Popen([target, HEALTH_ARG, health_path])
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if os.path.exists(health_path):
+            remove_old_slots(keep={version, APP_VERSION})
+            return True
+        if process.poll() is not None:
+            break
+        time.sleep(0.2)
+
+    # Новая версия не запустилась - откат
+    if process.poll() is None:
+        process.kill()
+    write_pointer(previous)
+    return False
+
+
+def confirm_started(argv=None):
+    """Вызывается новой версией после запуска интерфейса: подтверждает, что все в порядке"""
+    argv = sys.argv if argv is None else argv
+    if HEALTH_ARG not in argv:
+        return
+    index = argv.index(HEALTH_ARG)
+    if index + 1 < len(argv):
+        try:
+            with open(argv[index + 1], 'w') as f:
+                f.write(str(os.getpid()))
+        except OSError:
+            return
+    pointer = read_pointer()
+    if pointer.get('version') == APP_VERSION and pointer.get('pending'):
+        pointer['pending'] = False
+        write_pointer(pointer)
+
+
+def launch_current_version():
+    """Запускает версию из current.json, если она новее этого exe
+
+    bobrik.exe из автозагрузки работает как лаунчер: после обновления он
+    передает управление exe из слота. Возвращает True, если запущена другая версия.
+    """
+    if not getattr(sys, 'frozen', False) or HEALTH_ARG in sys.argv:
+        return False
+
+    pointer = read_pointer()
+    version = pointer.get('version')
+    if not version or pointer.get('pending'):
+        # Незавершенное переключение не подтверждено - остаемся на этом exe
+        return False
+    if parse_version(version) <= parse_version(APP_VERSION):
+        return False
+
+    target = slot_path(version)
+    if not os.path.exists(target) or os.path.abspath(target) == os.path.abspath(sys.executable):
+        return False
+
+    subprocess.Popen([target] + sys.argv[1:])
+    return True
@@ -0,0 +1,465 @@
+import os
+import time
+import zlib
+import queue
+import shutil
+import struct
+import zipfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Локальный заголовок файла в zip: сигнатура, версия, флаги, метод, время, дата,
+# CRC-32, сжатый и исходный размер, длины имени и дополнительного поля
+LOCAL_HEADER = struct.Struct('<4sHHHHHIIIHH')
+LOCAL_SIGNATURE = b'PK\x03\x04'
+CENTRAL_SIGNATURE = b'PK\x01\x02'
+END_SIGNATURE = b'PK\x05\x06'
+DESCRIPTOR_SIGNATURE = b'PK\x07\x08'
+
+FLAG_ENCRYPTED = 0x1
+FLAG_DATA_DESCRIPTOR = 0x8
+FLAG_UTF8 = 0x800
+METHOD_STORED = 0
+METHOD_DEFLATED = 8
+ZIP64_MARKER = 0xFFFFFFFF
+
+# Файлы пишутся блоками этого размера - память не зависит от размера файла
+COPY_BLOCK_SIZE = 256 * 1024
+MAX_BUFFERED_CHUNKS = 8
+# Распаковка множества мелких файлов упирается в задержки диска, а не в процессор
+MAX_EXTRACT_WORKERS = 8
+WRITE_ATTEMPTS = 3
+
+
+class ZipStreamError(Exception):
+    """Архив нельзя распаковать потоком (или поток прерван)"""
+
+
+def member_path(dest_dir, name):
+    """Путь файла архива внутри dest_dir; имена с ".." и дисками обрезаются, как в zipfile"""
+    name = os.path.splitdrive(name.replace('\\', '/'))[1]
+    parts = [part for part in name.split('/') if part not in ('', '.', '..')]
+    if not parts:
+        return None
+    return os.path.join(dest_dir, *parts)
+
+
+def file_crc32(path):
+    """CRC-32 файла на диске (читается блоками)"""
+    crc = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(COPY_BLOCK_SIZE), b''):
+            crc = zlib.crc32(block, crc)
+    return crc
+
+
+def is_unchanged(path, crc, size):
+    """True, если файл на диске совпадает с файлом архива по размеру и CRC-32"""
+    try:
+        if os.path.getsize(path) != size:
+            return False
+        return file_crc32(path) == crc
+    except OSError:
+        return False
+
+
+def remove_stale_files(dest_dir, names):
+    """Удаляет из папки файлы, которых нет среди имен архива; возвращает их число"""
+    keep = set()
+    for name in names:
+        path = member_path(dest_dir, name)
+        if path:
+            keep.add(os.path.normcase(os.path.normpath(path)))
+
+    removed = 0
+    for root, dirs, files in os.walk(dest_dir):
+        for file in files:
+            path = os.path.join(root, file)
+            if os.path.normcase(os.path.normpath(path)) in keep:
+                continue
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+class ExtractResult:
+    """Итог распаковки архива"""
+
+    def __init__(self):
+        self.extracted = 0
+        self.unchanged = 0
+        self.removed = 0
+        self.failed = []  # [(имя, ошибка)]
+        self.total_bytes = 0
+
+
+def find_member(zip_path, filename):
+    """Имя файла filename в архиве по центральному каталогу (ближайший к корню) или None"""
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        names = [info.filename for info in zip_ref.infolist() if not info.is_dir()]
+    matches = [name for name in names if name.rsplit('/', 1)[-1] == filename]
+    if not matches:
+        matches = [name for name in names if name.rsplit('/', 1)[-1].lower() == filename.lower()]
+    return min(matches, key=lambda name: name.count('/')) if matches else None
+
+
+def member_folder_filter(entry):
+    """Фильтр для extract_zip: файлы из папки entry и ее подпапок"""
+    prefix = entry.rpartition('/')[0]
+    prefix = prefix + '/' if prefix else ''
+    return lambda name: name.startswith(prefix)
+
+
+def extract_zip(zip_path, dest_dir, max_workers=MAX_EXTRACT_WORKERS, progress_callback=None,
+                skip_unchanged=False, remove_stale=False, name_decoder=None, include=None):
+    """Распаковывает архив в dest_dir несколькими потоками
+
+    Каждый поток читает через свой ZipFile, файлы пишутся блоками (CRC-32
+    проверяет zipfile). Папки создаются заранее одним проходом.
+    progress_callback(done_bytes, total_bytes) - прогресс по распакованным байтам.
+    skip_unchanged - не перезаписывать файлы с тем же размером и CRC-32,
+    remove_stale - удалить файлы, которых нет в архиве.
+    name_decoder(info) -> имя файла позволяет исправить кодировку имен.
+    include(имя в архиве) -> bool ограничивает распаковку частью файлов.
+    Бросает zipfile.BadZipFile, если архив поврежден.
+    """
+    result = ExtractResult()
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        infos = zip_ref.infolist()
+
+    # (индекс в архиве, путь, размер) для файлов; папки создаются сразу
+    tasks = []
+    directories = {dest_dir}
+    for index, info in enumerate(infos):
+        if include and not include(info.filename):
+            continue
+        name = name_decoder(info) if name_decoder else info.filename
+        path = member_path(dest_dir, name)
+        if path is None:
+            continue
+        if info.is_dir():
+            directories.add(path)
+        else:
+            directories.add(os.path.dirname(path))
+            tasks.append((index, path, info.file_size))
+            result.total_bytes += info.file_size
+    for directory in sorted(directories):
+        os.makedirs(directory, exist_ok=True)
+
+    lock = threading.Lock()
+    local = threading.local()
+    handles = []
+    done_bytes = [0]
+
+    def report(size):
+        if progress_callback:
+            with lock:
+                done_bytes[0] += size
+                progress_callback(done_bytes[0], result.total_bytes)
+
+    def extract_one(task):
+        index, path, size = task
+        if not hasattr(local, 'zip_ref'):
+            local.zip_ref = zipfile.ZipFile(zip_path, 'r')
+            with lock:
+                handles.append(local.zip_ref)
+        info = local.zip_ref.infolist()[index]
+
+        if skip_unchanged and is_unchanged(path, info.CRC, info.file_size):
+            with lock:
+                result.unchanged += 1
+            report(size)
+            return
+
+        for attempt in range(WRITE_ATTEMPTS):
+            try:
+                with local.zip_ref.open(info) as source, open(path, 'wb') as target:
+                    shutil.copyfileobj(source, target, COPY_BLOCK_SIZE)
+                break
+            except (PermissionError, OSError) as e:
+                # Файл может быть занят антивирусом - повторяем после паузы
+                if attempt < WRITE_ATTEMPTS - 1:
+                    time.sleep(0.5)
+                else:
+                    with lock:
+                        result.failed.append((info.filename, e))
+                    return
+            except (zipfile.BadZipFile, zlib.error) as e:
+                with lock:
+                    result.failed.append((info.filename, e))
+                return
+        with lock:
+            result.extracted += 1
+        report(size)
+
+    # Крупные файлы первыми, чтобы потоки закончили примерно одновременно
+    tasks.sort(key=lambda task: task[2], reverse=True)
+    pending = iter(tasks)
+
+    def worker():
+        while True:
+            with lock:
+                task = next(pending, None)
+            if task is None:
+                return
+            extract_one(task)
+
+    try:
+        workers = max(1, min(max_workers, len(tasks)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(worker) for _ in range(workers)]:
+                future.result()
+    finally:
+        for handle in handles:
+            handle.close()
+
+    if remove_stale:
+        result.removed = remove_stale_files(
+            dest_dir, [name_decoder(info) if name_decoder else info.filename
+                       for info in infos if not info.is_dir()]
+        )
+    return result
+
+
+def _decode_name(raw_name, flags):
+    return raw_name.decode('utf-8' if flags & FLAG_UTF8 else 'cp437')
+
+
+class _ChunkStream:
+    """Поток байтов из блоков, которые приходят из другого потока"""
+
+    def __init__(self, max_chunks=MAX_BUFFERED_CHUNKS):
+        self._queue = queue.Queue(maxsize=max_chunks)
+        self._buffer = b''
+        self._pos = 0
+        self._eof = False
+        self.aborted = threading.Event()
+
+    def put(self, data):
+        self._queue.put(data)
+
+    def close(self):
+        self._queue.put(None)
+
+    def abort(self):
+        self.aborted.set()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def drain(self):
+        """Освобождает очередь, чтобы не держать поток загрузки"""
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    def read(self, size):
+        """До size байт; b'' - конец потока"""
+        while self._pos >= len(self._buffer) and not self._eof:
+            data = self._queue.get()
+            if self.aborted.is_set():
+                raise ZipStreamError("Распаковка прервана")
+            if data is None:
+                self._eof = True
+            else:
+                self._buffer, self._pos = data, 0
+        data = self._buffer[self._pos:self._pos + size]
+        self._pos += len(data)
+        return data
+
+    def read_exact(self, size):
+        parts = []
+        while size > 0:
+            data = self.read(size)
+            if not data:
+                raise ZipStreamError("Архив оборвался")
+            parts.append(data)
+            size -= len(data)
+        return b''.join(parts)
+
+    def unread(self, data):
+        self._buffer, self._pos = data + self._buffer[self._pos:], 0
+
+
+class StreamingZipExtractor:
+    """Распаковка zip по мере загрузки
+
+    Блоки архива передаются в feed(offset, data) из потока загрузки, файлы
+    пишутся в отдельном потоке блоками с проверкой CRC-32 на лету.
+    Очередь блоков ограничена, поэтому память не растет с размером файлов.
+    Если архив нельзя распаковать потоком (шифрование, zip64, stored с
+    дескриптором данных, данные не по порядку), finish() вернет False и
+    архив нужно распаковать обычным способом после загрузки.
+    В extracted попадают и пропущенные неизменившиеся файлы.
+    """
+
+    def __init__(self, dest_dir, prepare=None, skip_unchanged=False,
+                 max_buffered_chunks=MAX_BUFFERED_CHUNKS):
+        # prepare() выполняется в потоке распаковки до записи первого файла;
+        # skip_unchanged - не перезаписывать файлы с тем же размером и CRC-32
+        self.dest_dir = dest_dir
+        self.prepare = prepare
+        self.skip_unchanged = skip_unchanged
+        self.extracted = []
+        self.unchanged = 0
+        self.error = None
+        self.complete = False
+
+        self._stream = _ChunkStream(max_buffered_chunks)
+        self._expected_offset = 0
+        self._failed = threading.Event()
+        self._done = threading.Event()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def feed(self, offset, data):
+        """Очередной блок загружаемого архива (offset - его смещение в файле)"""
+        if self._failed.is_set():
+            return
+        if offset != self._expected_offset:
+            self._fail(ZipStreamError("Данные архива пришли не по порядку"))
+            return
+        self._expected_offset += len(data)
+        self._stream.put(data)
+
+    @property
+    def received(self):
+        """Сколько байт архива передано в feed()"""
+        return self._expected_offset
+
+    def abort(self):
+        self._fail(ZipStreamError("Распаковка прервана"))
+
+    def finish(self, timeout=None):
+        """Ждет окончания распаковки; True, если весь архив распакован"""
+        if not self._failed.is_set():
+            self._stream.close()
+        self._done.wait(timeout)
+        return self.complete and self.error is None
+
+    def _fail(self, error):
+        if self.error is None:
+            self.error = error
+        self._failed.set()
+        self._stream.abort()
+
+    def _run(self):
+        try:
+            if self.prepare:
+                self.prepare()
+            os.makedirs(self.dest_dir, exist_ok=True)
+
+            while True:
+                signature = self._stream.read_exact(4)
+                if signature in (CENTRAL_SIGNATURE, END_SIGNATURE):
+                    break
+                if signature != LOCAL_SIGNATURE:
+                    raise ZipStreamError("Неизвестная структура архива")
+                self._extract_member()
+
+            # Центральный каталог не нужен - дочитываем поток до конца
+            while self._stream.read(COPY_BLOCK_SIZE):
+                pass
+            self.complete = True
+        except Exception as e:
+            self._fail(e)
+            self._stream.drain()
+        finally:
+            self._done.set()
+
+    def _extract_member(self):
+        header = LOCAL_SIGNATURE + self._stream.read_exact(LOCAL_HEADER.size - 4)
+        (_, _, flags, method, _, _, crc, compressed_size, size,
+         name_length, extra_length) = LOCAL_HEADER.unpack(header)
+        name = _decode_name(self._stream.read_exact(name_length), flags)
+        self._stream.read_exact(extra_length)
+
+        if flags & FLAG_ENCRYPTED:
+            raise ZipStreamError(f"Файл {name} зашифрован")
+        if method not in (METHOD_STORED, METHOD_DEFLATED):
+            raise ZipStreamError(f"Метод сжатия {method} не поддерживается")
+        if ZIP64_MARKER in (compressed_size, size):
+            raise ZipStreamError("Архивы zip64 распаковываются после загрузки")
+        has_descriptor = bool(flags & FLAG_DATA_DESCRIPTOR)
+
+        path = member_path(self.dest_dir, name)
+        if name.endswith('/') or path is None:
+            if path:
+                os.makedirs(path, exist_ok=True)
+            self._copy_data(name, method, compressed_size, has_descriptor, lambda data: None)
+            if has_descriptor:
+                self._read_descriptor()
+            return
+
+        if (self.skip_unchanged and not has_descriptor
+                and is_unchanged(path, crc, size)):
+            # Файл уже на месте - данные пропускаем без распаковки
+            remaining = compressed_size
+            while remaining > 0:
+                remaining -= len(self._stream.read_exact(min(COPY_BLOCK_SIZE, remaining)))
+            self.unchanged += 1
+            self.extracted.append(name)
+            return
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            actual_crc, written = self._copy_data(name, method, compressed_size, has_descriptor, f.write)
+        if has_descriptor:
+            crc, size = self._read_descriptor()
+
+        if actual_crc != crc or written != size:
+            raise ZipStreamError(f"Файл {name} поврежден (CRC-32 не совпадает)")
+        self.extracted.append(name)
+
+    def _copy_data(self, name, method, compressed_size, has_descriptor, write):
+        """Распаковывает данные файла блоками в write(); возвращает (CRC-32, размер)"""
+        crc = 0
+        written = 0
+        if method == METHOD_STORED:
+            if has_descriptor:
+                if name.endswith('/'):
+                    return crc, written
+                raise ZipStreamError(f"Размер {name} неизвестен до конца архива")
+            remaining = compressed_size
+            while remaining > 0:
+                block = self._stream.read_exact(min(COPY_BLOCK_SIZE, remaining))
+                remaining -= len(block)
+                write(block)
+                crc = zlib.crc32(block, crc)
+                written += len(block)
+            return crc, written
+
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        remaining = None if has_descriptor else compressed_size
+        while not decompressor.eof:
+            size_to_read = COPY_BLOCK_SIZE if remaining is None else min(COPY_BLOCK_SIZE, remaining)
+            block = self._stream.read(size_to_read) if size_to_read else b''
+            if not block:
+                raise ZipStreamError(f"Файл {name} оборвался")
+            if remaining is not None:
+                remaining -= len(block)
+            data = decompressor.decompress(block, COPY_BLOCK_SIZE)
+            while True:
+                write(data)
+                crc = zlib.crc32(data, crc)
+                written += len(data)
+                if decompressor.eof or not decompressor.unconsumed_tail:
+                    break
+                data = decompressor.decompress(decompressor.unconsumed_tail, COPY_BLOCK_SIZE)
+        if decompressor.unused_data:
+            self._stream.unread(decompressor.unused_data)
+        return crc, written
+
+    def _read_descriptor(self):
+        """Дескриптор данных после файла: возвращает (CRC-32, исходный размер)"""
+        descriptor = self._stream.read_exact(4)
+        if descriptor == DESCRIPTOR_SIGNATURE:
+            descriptor = self._stream.read_exact(4)
+        (crc,) = struct.unpack('<I', descriptor)
+        _, size = struct.unpack('<II', self._stream.read_exact(8))
+        return crc, size
@@ -0,0 +1,36 @@
+import os
+import sys
+import json
+import hashlib
+
+# Публикация релиза: python publish_version.py dist/bobrik.exe
+# Записывает в version.json хэш SHA-256 собранного exe - без него
+# bobrik не примет загруженное обновление.
+
+VERSION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'version.json')
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def publish(exe_path, version_file=VERSION_FILE):
+    with open(version_file, 'r', encoding='utf-8') as f:
+        version_data = json.load(f)
+    version_data['sha256'] = file_sha256(exe_path)
+    with open(version_file, 'w', encoding='utf-8') as f:
+        json.dump(version_data, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+    return version_data
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Использование: python publish_version.py путь/к/bobrik.exe")
+        sys.exit(1)
+    data = publish(sys.argv[1])
+    print(f"version.json: {data['version']}, sha256 {data['sha256']}")
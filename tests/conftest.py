@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+
+# Данные bobrik (кэш, состояние обновлений) - во временной папке, Qt - без экрана
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+os.environ['APPDATA'] = tempfile.mkdtemp(prefix='bobrik-tests-')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from PyQt6.QtWidgets import QApplication
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    return QApplication.instance() or QApplication([])
@@ -0,0 +1,111 @@
+import os
+import json
+import hashlib
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+import managers.download_manager as download_manager
+from managers.download_manager import download_file
+
+CONTENT = os.urandom(1024 * 1024 + 12345)
+ETAG = '"bobrik-test"'
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Раздает CONTENT; при server.ranges=True понимает Range и If-Range"""
+
+    def do_GET(self):
+        server = self.server
+        range_header = self.headers.get('Range')
+        if_range = self.headers.get('If-Range')
+        server.requests.append(range_header)
+
+        start, end = 0, len(CONTENT) - 1
+        partial = False
+        if server.ranges and range_header and (not if_range or if_range == ETAG):
+            first, _, last = range_header.replace('bytes=', '').partition('-')
+            start = int(first)
+            end = int(last) if last else end
+            partial = True
+
+        body = CONTENT[start:end + 1]
+        self.send_response(206 if partial else 200)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', ETAG)
+        if partial:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(CONTENT)}')
+        if server.ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+        self.wfile.write(body)
+        server.served += len(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setenv('NO_PROXY', '127.0.0.1')
+    # Небольшие сегменты, чтобы файл в 1 МБ качался в несколько соединений
+    monkeypatch.setattr(download_manager, 'MIN_SEGMENT_SIZE', 128 * 1024)
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), RangeHandler)
+    httpd.ranges = True
+    httpd.requests = []
+    httpd.served = 0
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def url_of(server):
+    return f'http://127.0.0.1:{server.server_address[1]}/file.bin'
+
+
+def test_segmented_download_assembles_file(server, tmp_path):
+    dest = str(tmp_path / 'file.bin')
+    result = download_file(url_of(server), dest, segments=4,
+                           expected_sha256=hashlib.sha256(CONTENT).hexdigest())
+
+    with open(dest, 'rb') as f:
+        assert f.read() == CONTENT
+    assert result.sha256 == hashlib.sha256(CONTENT).hexdigest()
+    # Проба bytes=0-0 и четыре диапазона
+    ranges = [r for r in server.requests if r and r != 'bytes=0-0']
+    assert len(ranges) == 4
+    assert not os.path.exists(dest + '.part')
+
+
+def test_server_without_ranges_falls_back_to_single_stream(server, tmp_path):
+    server.ranges = False
+    dest = str(tmp_path / 'file.bin')
+    download_file(url_of(server), dest, segments=4)
+
+    with open(dest, 'rb') as f:
+        assert f.read() == CONTENT
+    # После неудачной пробы - один обычный запрос всего файла
+    assert server.requests == ['bytes=0-0', None]
+
+
+def test_resume_from_part_file(server, tmp_path):
+    dest = str(tmp_path / 'file.bin')
+    url = url_of(server)
+    half = len(CONTENT) // 2
+    with open(dest + '.part', 'wb') as f:
+        f.write(CONTENT[:half])
+    with open(dest + '.part.json', 'w', encoding='utf-8') as f:
+        json.dump({'url': url, 'etag': ETAG, 'last_modified': None,
+                   'size': len(CONTENT), 'downloaded': half}, f)
+
+    result = download_file(url, dest)
+
+    with open(dest, 'rb') as f:
+        assert f.read() == CONTENT
+    assert server.requests == [f'bytes={half}-']
+    assert server.served == len(CONTENT) - half
+    # Хэш учитывает и сохраненную ранее часть
+    assert result.sha256 == hashlib.sha256(CONTENT).hexdigest()
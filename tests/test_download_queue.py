@@ -0,0 +1,55 @@
+import pytest
+
+from managers.download_queue import (DownloadQueue, FINISHED_JOBS_KEPT, STATUS_CANCELLED,
+                                     STATUS_DONE, STATUS_DOWNLOADING)
+
+
+@pytest.fixture
+def queue(qapp, monkeypatch):
+    # Без потоков: задания берутся из очереди вручную
+    queue = DownloadQueue()
+    monkeypatch.setattr(queue, '_start_workers', lambda: None)
+    finished = []
+    queue.job_finished.connect(lambda job_id, success: finished.append(job_id))
+    return queue, finished
+
+
+def test_cancelled_job_is_skipped_by_worker(queue):
+    queue, finished = queue
+    cancelled = queue.submit('a', 'http://example.invalid/a')
+    kept = queue.submit('b', 'http://example.invalid/b')
+
+    assert queue.cancel(cancelled.job_id)
+    job = queue._next_job(queue._download_heap, queue._download_ready, STATUS_DOWNLOADING)
+
+    assert job is kept and job.status == STATUS_DOWNLOADING
+    assert cancelled.status == STATUS_CANCELLED
+    assert finished == [cancelled.job_id]
+
+
+def test_cancel_after_pickup_finishes_job_once(queue):
+    queue, finished = queue
+    job = queue.submit('a', 'http://example.invalid/a')
+    queue._next_job(queue._download_heap, queue._download_ready, STATUS_DOWNLOADING)
+
+    # Загрузка уже началась: отмена только выставляет событие, статус не откатывается
+    assert queue.cancel(job.job_id)
+    assert job.status == STATUS_DOWNLOADING and finished == []
+
+    job.path = 'a'
+    queue._run_handler(job)
+    assert job.status == STATUS_CANCELLED
+    assert finished == [job.job_id]
+
+
+def test_finished_jobs_are_pruned(queue):
+    queue, finished = queue
+    jobs = [queue.submit(str(i), f'http://example.invalid/{i}') for i in range(FINISHED_JOBS_KEPT + 10)]
+    active = queue.submit('active', 'http://example.invalid/active')
+    for job in jobs:
+        queue._finish(job, STATUS_DONE)
+
+    assert len(queue.jobs) == FINISHED_JOBS_KEPT + 1
+    assert queue.get_job(jobs[0].job_id) is None
+    assert queue.get_job(jobs[-1].job_id) is jobs[-1]
+    assert queue.active_jobs() == [active]
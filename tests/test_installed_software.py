@@ -0,0 +1,102 @@
+from managers.installed_software import (InstalledSoftwareIndex, InstalledStateCache, StaticBackend,
+                                         normalize_name)
+
+
+class FakeIndex:
+    def __init__(self, installed):
+        self.installed = installed
+        self.refreshes = 0
+
+    def refresh(self):
+        self.refreshes += 1
+
+    def find(self, name):
+        return self.installed.get(name)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_stale_state_is_kept_until_recomputed():
+    index = FakeIndex({'7-Zip': ('23.01', 'uninstall.exe', '7-Zip')})
+    clock = FakeClock()
+    cache = InstalledStateCache(index, ttl=30, clock=clock)
+
+    assert cache.get('7zip') == (False, None)
+    cache.compute({'7zip': ['7-Zip'], 'anydesk': ['AnyDesk']})
+    assert index.refreshes == 1
+
+    clock.now = 60
+    fresh, info = cache.get('7zip')
+    assert not fresh and info[0] == '23.01'
+    assert index.refreshes == 1
+
+    cache.compute({'7zip': ['7-Zip'], 'anydesk': ['AnyDesk']})
+    assert index.refreshes == 2
+
+
+
+class CountingBackend(StaticBackend):
+    def __init__(self, entries):
+        super().__init__(entries)
+        self.reads = 0
+
+    def entries(self):
+        self.reads += 1
+        return super().entries()
+
+
+ENTRIES = [
+    {'key': '7-Zip', 'name': '7-Zip 23.01 (x64)', 'version': '23.01', 'uninstall_string': '7z-uninstall.exe'},
+    {'key': '{5A2B-11}', 'name': 'AnyDesk', 'version': 'ad 8.0.9', 'uninstall_string': 'AnyDesk.exe --uninstall'},
+    {'key': 'Notepad++', 'name': None, 'version': '8.6', 'uninstall_string': 'np-uninstall.exe'},
+    {'key': 'iikoCard5POS', 'name': 'iikoCard POS', 'version': None, 'uninstall_string': None},
+]
+
+
+def test_normalize_name():
+    assert normalize_name('7-Zip 23.01 (x64)') == '7zip2301x64'
+    assert normalize_name('Notepad++') == 'notepad'
+    assert normalize_name('Ассистент') == 'ассистент'
+    assert normalize_name(None) == ''
+
+
+def test_index_finds_programs_by_display_name_and_key():
+    index = InstalledSoftwareIndex(StaticBackend(ENTRIES))
+
+    assert index.find('7-Zip') == ('23.01', '7z-uninstall.exe', '7-Zip 23.01 (x64)')
+    assert index.find('7zip')[0] == '23.01'
+    assert index.find('anydesk') == ('ad 8.0.9', 'AnyDesk.exe --uninstall', 'AnyDesk')
+    # Без DisplayName программа находится по имени раздела
+    assert index.find('Notepad++') == ('8.6', 'np-uninstall.exe', 'Notepad++')
+    assert index.find('iikoCard5POS')[2] == 'iikoCard POS'
+    assert index.is_installed(['TeamViewer', 'iikoCard'])
+
+
+def test_index_does_not_match_other_programs():
+    index = InstalledSoftwareIndex(StaticBackend(ENTRIES))
+
+    assert index.find('TeamViewer') is None
+    assert index.find('7-Zip File Manager') is None
+    assert index.find('') is None
+    assert index.find('++') is None
+    assert not index.is_installed(['Advanced IP Scanner', 'RHelper'])
+
+
+def test_index_reads_backend_once_until_refresh():
+    backend = CountingBackend(ENTRIES)
+    index = InstalledSoftwareIndex(backend)
+    for name in ('7-Zip', 'AnyDesk', 'TeamViewer'):
+        index.find(name)
+    assert backend.reads == 1
+
+    backend._entries.append({'key': 'TeamViewer', 'name': 'TeamViewer', 'version': '15', 'uninstall_string': None})
+    assert index.find('TeamViewer') is None
+    index.refresh()
+    assert index.find('TeamViewer')[0] == '15'
+    assert backend.reads == 2
@@ -0,0 +1,82 @@
+import pytest
+
+import managers.installer_manager as installer_manager
+import ui.tabs.installer_tab as installer_tab
+from managers.default_catalog import DEFAULT_CATALOG
+from managers.installed_software import InstalledStateCache
+
+
+class FakeJob:
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.is_active = True
+
+
+class FakeSignal:
+    def connect(self, slot):
+        pass
+
+
+class FakeQueue:
+    """Очередь без загрузок: запоминает параметры поставленных заданий"""
+
+    def __init__(self):
+        self.submitted = []
+        self.job_updated = FakeSignal()
+        self.job_finished = FakeSignal()
+
+    def submit(self, name, url, dest_path=None, **kwargs):
+        self.submitted.append((name, kwargs))
+        return FakeJob(len(self.submitted))
+
+    def get_job(self, job_id):
+        return None
+
+
+@pytest.fixture
+def tab(qapp, monkeypatch):
+    queue = FakeQueue()
+    monkeypatch.setattr(installer_tab, 'get_download_queue', lambda: queue)
+    monkeypatch.setattr(installer_manager, 'get_download_queue', lambda: queue)
+    return installer_tab.InstallerTab(), queue
+
+
+def test_tab_and_profiles_share_the_install_slot_rule(tab):
+    tab, queue = tab
+    for key, program in DEFAULT_CATALOG['programs'].items():
+        tab.download_and_install(tab.catalog.get(key), key)
+        tab.installer_manager.queue_install(key)
+        (_, from_tab), (_, from_profile) = queue.submitted[-2:]
+        assert from_tab['exclusive'] == from_profile['exclusive'], key
+
+    exclusive = {name: kwargs['exclusive'] for name, kwargs in queue.submitted}
+    assert exclusive['7-Zip'] and not exclusive['AnyDesk']
+
+
+class CountingIndex:
+    def __init__(self):
+        self.refreshes = 0
+
+    def refresh(self):
+        self.refreshes += 1
+
+    def find(self, name):
+        return ('23.01', 'uninstall.exe', name)
+
+
+def test_reinstall_prompt_uses_cached_state(tab, monkeypatch):
+    tab, queue = tab
+    index = CountingIndex()
+    cache = InstalledStateCache(index)
+    cache.compute({'7zip': ['7-Zip']})
+    tab.installer_manager.installed_states = cache
+    prompts = []
+    monkeypatch.setattr(installer_tab.QMessageBox, 'exec', lambda msg: prompts.append(msg.text()))
+
+    # Фоновая проверка вкладки еще не пришла - берется состояние из общего кэша
+    tab.install_program('7zip')
+    tab.install_program('anydesk')
+
+    assert 'уже установлена' in prompts[0] and '23.01' in prompts[0]
+    assert 'Начать загрузку' in prompts[1]
+    assert index.refreshes == 1
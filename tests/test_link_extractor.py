@@ -0,0 +1,63 @@
+import pytest
+
+from managers.link_extractor import CHUNK_SIZE, iter_zip_links
+
+
+def autoindex_page(entries, style):
+    """Страница листинга каталога в стиле Apache или nginx"""
+    lines = ['<html><head><title>Index of /plugins/</title></head><body>',
+             '<h1>Index of /plugins/</h1>']
+    if style == 'apache':
+        lines.append('<table><tr><th><a href="?C=N;O=D">Name</a></th>'
+                     '<th><a href="?C=M;O=A">Last modified</a></th></tr>')
+        for i in range(entries):
+            lines.append(f'<tr><td valign="top"><img src="/icons/compressed.gif" alt="[   ]"></td>'
+                         f'<td><a href="Plugin%20{i // 100}.{i % 100}.zip">Plugin {i // 100}.{i % 100}.zip</a></td>'
+                         f'<td align="right">2024-01-01 12:00  </td><td align="right">1.2M</td></tr>')
+        lines.append('</table>')
+    else:
+        lines.append('<hr><pre><a href="../">../</a>')
+        for i in range(entries):
+            lines.append(f'<a href="Plugin_{i // 100}.{i % 100}.zip">Plugin_{i // 100}.{i % 100}.zip</a>'
+                         f'                 01-Jan-2024 12:00             1234567')
+        lines.append('</pre><hr>')
+    lines.append('</body></html>')
+    return '\n'.join(lines).encode('utf-8')
+
+
+def _chunks(page, size=CHUNK_SIZE):
+    return [page[i:i + size] for i in range(0, len(page), size)]
+
+
+@pytest.mark.parametrize('style, first', [('apache', 'Plugin%200.0.zip'), ('nginx', 'Plugin_0.0.zip')])
+def test_autoindex_links(style, first):
+    links = list(iter_zip_links(_chunks(autoindex_page(2000, style))))
+    assert len(links) == 2000
+    assert links[0] == first
+
+
+def test_tags_split_across_chunks():
+    page = autoindex_page(300, 'apache')
+    # Блоки по 7 байт режут почти каждый тег <a> пополам
+    assert list(iter_zip_links(_chunks(page, 7))) == list(iter_zip_links([page]))
+
+
+def test_quoting_entities_and_other_links():
+    page = ('<a href=\'a.zip\'>a</a> <A HREF=b.zip>b</A> <a class="x" href="c&amp;d.zip">c</a>'
+            '<a href="notes.txt">n</a> <a name="top">top</a> <link href="style.zip.css">')
+    assert list(iter_zip_links([page])) == ['a.zip', 'b.zip', 'c&d.zip']
+
+
+def test_multibyte_characters_split_across_chunks():
+    page = '<a href="Плагин 1.0.zip">Плагин</a>'.encode('utf-8')
+    assert list(iter_zip_links(_chunks(page, 3))) == ['Плагин 1.0.zip']
+
+
+@pytest.mark.parametrize('style', ['apache', 'nginx'])
+def test_same_links_as_beautifulsoup(style):
+    # Прежний разбор страниц плагинов шел через BeautifulSoup
+    bs4 = pytest.importorskip('bs4')
+    page = autoindex_page(2000, style)
+    soup = bs4.BeautifulSoup(page.decode('utf-8'), 'html.parser')
+    expected = [a['href'] for a in soup.find_all('a', href=True) if a['href'].endswith('.zip')]
+    assert list(iter_zip_links(_chunks(page))) == expected
@@ -0,0 +1,116 @@
+import os
+import hashlib
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from managers.download_cache import DownloadCache
+from managers.peer_cache import PeerCacheServer, PeerCacheClient
+
+CONTENT = os.urandom(512 * 1024)
+SHA256 = hashlib.sha256(CONTENT).hexdigest()
+
+
+class OriginHandler(BaseHTTPRequestHandler):
+    """Источник файла (вместо интернета): всегда отдает CONTENT"""
+
+    def do_GET(self):
+        self.server.requests += 1
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(CONTENT)))
+        self.end_headers()
+        self.wfile.write(CONTENT)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ForgedPeerHandler(BaseHTTPRequestHandler):
+    """Чужой компьютер в сети: на любой хэш отдает подмененный файл"""
+
+    def do_GET(self):
+        body = b'MZ forged installer' * 1000
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _serve(handler):
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    httpd.requests = 0
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+@pytest.fixture
+def origin(monkeypatch):
+    monkeypatch.setenv('NO_PROXY', '127.0.0.1')
+    httpd = _serve(OriginHandler)
+    yield httpd, f"http://127.0.0.1:{httpd.server_address[1]}/tool.exe"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def seeded_peer(tmp_path, origin):
+    _, url = origin
+    seed = DownloadCache(cache_dir=str(tmp_path / 'seed'))
+    seed_file = os.path.join(seed.tmp_dir, 'tool.exe')
+    with open(seed_file, 'wb') as f:
+        f.write(CONTENT)
+    seed.store(url, seed_file, SHA256)
+    server = PeerCacheServer(seed, host='127.0.0.1', port=0, discovery_port=0).start()
+    yield server
+    server.stop()
+
+
+def _leecher(tmp_path, peer):
+    cache = DownloadCache(cache_dir=str(tmp_path / 'leecher'))
+    cache.peer_client = PeerCacheClient(peers=[peer], discovery=False)
+    return cache
+
+
+def test_file_with_trusted_hash_is_taken_from_peer(tmp_path, origin, seeded_peer):
+    origin_server, url = origin
+    leecher = _leecher(tmp_path, f"127.0.0.1:{seeded_peer.port}")
+
+    path, from_cache = leecher.fetch(url, expected_sha256=SHA256)
+
+    assert not from_cache
+    with open(path, 'rb') as f:
+        assert f.read() == CONTENT
+    assert seeded_peer.served == 1
+    assert origin_server.requests == 0
+
+
+def test_peer_is_not_used_without_trusted_hash(tmp_path, origin, seeded_peer):
+    origin_server, url = origin
+    leecher = _leecher(tmp_path, f"127.0.0.1:{seeded_peer.port}")
+
+    leecher.fetch(url)
+
+    assert seeded_peer.served == 0
+    assert origin_server.requests == 1
+
+
+def test_forged_peer_file_is_rejected(tmp_path, origin):
+    origin_server, url = origin
+    forged = _serve(ForgedPeerHandler)
+    try:
+        client = PeerCacheClient(peers=[f"127.0.0.1:{forged.server_address[1]}"], discovery=False)
+        assert client.fetch(SHA256, str(tmp_path / 'tool.exe')) is None
+
+        # Кэш после отказа соседа берет файл у источника
+        leecher = _leecher(tmp_path, f"127.0.0.1:{forged.server_address[1]}")
+        path, _ = leecher.fetch(url, expected_sha256=SHA256)
+        with open(path, 'rb') as f:
+            assert f.read() == CONTENT
+        assert origin_server.requests == 1
+    finally:
+        forged.shutdown()
+        forged.server_close()
@@ -0,0 +1,43 @@
+import os
+import json
+
+import pytest
+
+from managers.default_catalog import DEFAULT_CATALOG
+from managers.program_catalog import ProgramCatalog, CatalogError, parse_catalog
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_default_catalog_matches_published_manifest():
+    with open(os.path.join(REPO_DIR, 'catalog.json'), 'r', encoding='utf-8') as f:
+        assert json.load(f) == DEFAULT_CATALOG
+
+
+def test_offline_first_start_uses_built_in_catalog(tmp_path):
+    catalog = ProgramCatalog(url='http://127.0.0.1:9/catalog.json', cache_path=str(tmp_path / 'missing.json'))
+    assert set(catalog.programs) == set(DEFAULT_CATALOG['programs'])
+    assert catalog.version == DEFAULT_CATALOG['version']
+
+
+def test_downloaded_catalog_older_than_build_is_ignored(tmp_path):
+    cache_path = tmp_path / 'program_catalog.json'
+    cache_path.write_text(json.dumps({
+        'version': DEFAULT_CATALOG['version'] - 1,
+        'programs': {'old': {'name': 'Old', 'url': 'http://x/old.exe', 'filename': 'old.exe'}},
+        'etag': '"old"',
+    }), encoding='utf-8')
+    catalog = ProgramCatalog(cache_path=str(cache_path))
+    assert 'old' not in catalog.programs
+    assert '7zip' in catalog.programs
+
+
+def test_optional_hash_and_size_are_validated():
+    program = {'name': 'Tool', 'url': 'http://x/tool.exe', 'filename': 'tool.exe'}
+    _, programs = parse_catalog({'programs': {'tool': dict(program, sha256='AB' * 32, size=1024)}})
+    assert programs['tool']['size'] == 1024
+    assert parse_catalog({'programs': {'tool': program}})[1]['tool'] == program
+
+    for bad in ({'sha256': 'abc'}, {'size': 0}, {'size': '10'}):
+        with pytest.raises(CatalogError):
+            parse_catalog({'programs': {'tool': dict(program, **bad)}})
@@ -0,0 +1,81 @@
+import os
+import subprocess
+
+import pytest
+
+import managers.unblock as unblock
+from managers.unblock import ZONE_STREAM, UNBLOCK_TIMEOUT, unblock_directory
+
+
+class RecordingRunner:
+    """Подмена запуска команд: запоминает вызовы и возвращает заданный код"""
+
+    def __init__(self, returncode=0):
+        self.returncode = returncode
+        self.calls = []
+
+    def __call__(self, args, timeout):
+        self.calls.append((args, timeout))
+        return self.returncode
+
+
+@pytest.fixture
+def plugin_dir(tmp_path, monkeypatch):
+    # Вне Windows поток Zone.Identifier изображает обычный файл "имя:Zone.Identifier"
+    for name in ('Plugin.dll', os.path.join('lib', 'Helper.dll'), os.path.join('lib', 'clean.txt')):
+        path = tmp_path / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(b'data')
+        if not name.endswith('clean.txt'):
+            (tmp_path / (name + ZONE_STREAM)).write_text('[ZoneTransfer]\nZoneId=3\n')
+
+    def no_subprocess(*args, **kwargs):
+        raise AssertionError("unblock_directory запустил процесс в обход runner")
+
+    monkeypatch.setattr(subprocess, 'run', no_subprocess)
+    monkeypatch.setattr(subprocess, 'Popen', no_subprocess)
+    return tmp_path
+
+
+def test_without_streams_one_batched_command(plugin_dir):
+    runner = RecordingRunner()
+    assert unblock_directory(str(plugin_dir), runner=runner, use_streams=False) == (0, True)
+
+    assert len(runner.calls) == 1
+    args, timeout = runner.calls[0]
+    assert args[0] == 'powershell' and timeout == UNBLOCK_TIMEOUT
+    script = args[-1]
+    assert f"Get-ChildItem -LiteralPath '{plugin_dir}' -Recurse -File" in script
+    assert '| Unblock-File' in script
+
+
+def test_stream_deletion_runs_no_commands(plugin_dir):
+    runner = RecordingRunner()
+    assert unblock_directory(str(plugin_dir), runner=runner, use_streams=True) == (2, False)
+
+    assert runner.calls == []
+    assert not list(plugin_dir.rglob('*' + ZONE_STREAM))
+
+
+def test_failed_stream_deletion_falls_back_to_one_command(plugin_dir, monkeypatch):
+    remove = os.remove
+
+    def locked_remove(path):
+        if path.endswith('Helper.dll' + ZONE_STREAM):
+            raise PermissionError(path)
+        remove(path)
+
+    monkeypatch.setattr(unblock.os, 'remove', locked_remove)
+    runner = RecordingRunner()
+    assert unblock_directory(str(plugin_dir), runner=runner, use_streams=True) == (1, True)
+    assert len(runner.calls) == 1
+
+
+def test_failed_fallback_is_reported(plugin_dir):
+    with pytest.raises(OSError):
+        unblock_directory(str(plugin_dir), runner=RecordingRunner(returncode=1), use_streams=False)
+
+
+def test_quotes_in_path_are_escaped():
+    script = unblock.unblock_command("C:\\Users\\O'Brien\\Downloads")[-1]
+    assert "-LiteralPath 'C:\\Users\\O''Brien\\Downloads'" in script
@@ -0,0 +1,147 @@
+import os
+import hashlib
+
+import pytest
+
+import managers.update_manager as update_manager
+from managers.download_queue import STATUS_FAILED, STATUS_DONE
+
+
+class FakeJob:
+    def __init__(self, job_id, status=None, sha256=None):
+        self.job_id = job_id
+        self.status = status
+        self.sha256 = sha256
+
+
+class FakeQueue:
+    """Очередь без загрузок: запоминает поставленные задания"""
+
+    def __init__(self):
+        self.submitted = []
+        self.jobs = {}
+        self.finished_slots = []
+
+    @property
+    def job_finished(self):
+        return self
+
+    def connect(self, slot):
+        self.finished_slots.append(slot)
+
+    def submit(self, name, url, dest_path=None, **kwargs):
+        job = FakeJob(len(self.submitted) + 1)
+        self.submitted.append((name, url))
+        self.jobs[job.job_id] = job
+        return job
+
+    def get_job(self, job_id):
+        return self.jobs.get(job_id)
+
+    def active_jobs(self):
+        return []
+
+
+@pytest.fixture
+def manager(qapp, monkeypatch):
+    queue = FakeQueue()
+    monkeypatch.setattr(update_manager, 'get_download_queue', lambda: queue)
+    manager = update_manager.SimpleUpdateManager()
+    manager.current_version = '1.0.0'
+    manager.delta_info = None
+    monkeypatch.setattr(manager, '_fetch_version_data', lambda: {
+        'version': '2.0.0', 'sha256': 'ab' * 32, 'download_url': 'https://example.invalid/bobrik.exe'
+    })
+    delays = []
+    manager.schedule_check_signal.disconnect()
+    manager.schedule_check_signal.connect(delays.append)
+    return manager, queue, delays
+
+
+def test_failed_staging_retries_on_next_poll(manager):
+    manager, queue, delays = manager
+
+    manager._background_check()
+    assert len(queue.submitted) == 1
+    # Пока загрузка идет, повторная проверка ее не дублирует
+    manager._background_check()
+    assert len(queue.submitted) == 1
+
+    job_id = manager._staging_job_id
+    queue.jobs[job_id].status = STATUS_FAILED
+    manager._on_update_job_finished(job_id, False)
+
+    assert manager._staging_version is None
+    # Повтор - с той же экспоненциальной паузой, что и после ошибки проверки
+    assert delays[-1] == update_manager.UPDATE_CHECK['retry_min'] * 60 * 1000
+
+    manager._background_check()
+    assert len(queue.submitted) == 2
+
+
+def test_downloaded_but_rejected_update_is_retried(manager):
+    manager, queue, delays = manager
+
+    manager._background_check()
+    job_id = manager._staging_job_id
+    # Задание завершилось, но обработчик не положил exe в слот (битый файл)
+    queue.jobs[job_id].status = STATUS_DONE
+    manager._on_update_job_finished(job_id, True)
+
+    assert manager._staging_version is None
+    manager._background_check()
+    assert len(queue.submitted) == 2
+
+
+def test_update_without_matching_hash_is_not_staged(manager, tmp_path):
+    manager, queue, delays = manager
+    manager._read_version_data(manager._fetch_version_data())
+
+    exe_path = tmp_path / 'bobrik_2.0.0.exe'
+    exe_path.write_bytes(b'MZ' + b'\0' * (6 * 1024 * 1024))
+    actual = hashlib.sha256(exe_path.read_bytes()).hexdigest()
+    manager._on_update_downloaded(FakeJob(1, sha256=actual), str(exe_path), '2.0.0', interactive=False)
+    assert manager.staged_update is None
+    assert not exe_path.exists()
+
+
+def test_update_with_matching_hash_is_staged(manager, tmp_path):
+    manager, queue, delays = manager
+    exe_path = tmp_path / 'bobrik_2.0.0.exe'
+    exe_path.write_bytes(b'MZ' + b'\0' * (6 * 1024 * 1024))
+    expected = hashlib.sha256(exe_path.read_bytes()).hexdigest()
+    manager._state['version_data'] = {'version': '2.0.0', 'sha256': expected}
+    job = FakeJob(1, sha256=expected)
+    manager.expected_sha256 = None
+    # Без хэша в version.json не ставится даже целый файл
+    manager._on_update_downloaded(job, str(exe_path), '2.0.0', interactive=False)
+    assert manager.staged_update is None
+
+    manager.expected_sha256 = expected
+    manager._on_update_downloaded(job, str(exe_path), '2.0.0', interactive=False)
+    assert manager.staged_update['version'] == '2.0.0'
+
+
+def test_staged_update_is_not_rehashed(manager, tmp_path, monkeypatch):
+    manager, queue, delays = manager
+    exe_path = tmp_path / 'bobrik_2.0.0.exe'
+    exe_path.write_bytes(b'MZ' + b'\1' * (6 * 1024 * 1024))
+    expected = hashlib.sha256(exe_path.read_bytes()).hexdigest()
+    manager._state['version_data'] = {'version': '2.0.0', 'sha256': expected}
+    manager.expected_sha256 = expected
+
+    def no_rehash(path):
+        raise AssertionError("exe перечитан после проверки при загрузке")
+
+    file_sha256 = update_manager.file_sha256
+    monkeypatch.setattr(update_manager, 'file_sha256', no_rehash)
+    manager._on_update_downloaded(FakeJob(1, sha256=expected), str(exe_path), '2.0.0', interactive=False)
+    assert manager._find_staged_update('2.0.0')
+
+    # Файл в слоте изменился - хэш пересчитывается, подмененный exe удаляется
+    staged_path = manager.staged_update['path']
+    with open(staged_path, 'ab') as f:
+        f.write(b'tampered')
+    monkeypatch.setattr(update_manager, 'file_sha256', file_sha256)
+    assert manager._find_staged_update('2.0.0') is None
+    assert not os.path.exists(staged_path)
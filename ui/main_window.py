@@ -14,6 +14,8 @@ from ui.tabs.folders_tab import FoldersTab
 from ui.tabs.network_tab import NetworkTab
 from ui.widgets.touch_auth_dialog import TouchAuthDialog
 from managers.update_manager import SimpleUpdateManager
+from managers.download_queue import get_download_queue
+from managers.peer_cache import start_peer_cache
 from config import WINDOW_TITLE, WINDOW_WIDTH, WINDOW_HEIGHT, LAYOUT_PARAMS, get_is_small_screen
 
 try:
@@ -53,6 +55,16 @@ class MainWindow(QMainWindow):
         self.update_manager = SimpleUpdateManager(self)
         self.update_manager.log_signal.connect(self.add_log)
         self.update_manager.set_github_repo("Feuda1/bobrik")
+        self.update_manager.start_background_updates()
+        
+        # Ошибки заданий очереди загрузок
+        get_download_queue().log_signal.connect(self.add_log)
+        
+        try:
+            if start_peer_cache():
+                self.console_panel.add_log("Кэш загрузок доступен соседним кассам", "info")
+        except OSError as e:
+            self.console_panel.add_log(f"Не удалось запустить раздачу кэша: {str(e)}", "warning")
         
     def init_tray_icon(self):
         if not QSystemTrayIcon.isSystemTrayAvailable():
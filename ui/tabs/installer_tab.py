@@ -1,5 +1,5 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, 
-                             QGridLayout, QScrollArea, QLineEdit, QMessageBox)
+                             QGridLayout, QScrollArea, QLineEdit, QMessageBox, QComboBox)
 from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QThread
 import subprocess
 import sys
@@ -7,7 +7,6 @@ import os
 import tempfile
 import threading
 import shutil
-import zipfile
 
 try:
     import requests
@@ -15,136 +14,72 @@ try:
 except ImportError:
     HAS_REQUESTS = False
 
-class DownloadWorker(QThread):
-    log_signal = pyqtSignal(str, str)
-    progress_signal = pyqtSignal(int)
-    finished_signal = pyqtSignal(str, bool)  # path, success
-    
-    def __init__(self, url, filename):
-        super().__init__()
-        self.url = url
-        self.filename = filename
-        
-    def run(self):
-        try:
-            if not HAS_REQUESTS:
-                self.log_signal.emit("Библиотека requests не установлена", "error")
-                self.finished_signal.emit("", False)
-                return
-                
-            temp_dir = tempfile.gettempdir()
-            file_path = os.path.join(temp_dir, self.filename)
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
-            response = requests.get(self.url, stream=True, headers=headers, timeout=60)
-            response.raise_for_status()
-            
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-            last_progress = 0
-            
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        if total_size > 0:
-                            progress = min(90, int((downloaded / total_size) * 90))
-                            if progress >= last_progress + 10:
-                                self.log_signal.emit(f"Загружено: {progress}%", "info")
-                                last_progress = progress
-            
-            file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
-            self.log_signal.emit(f"Загрузка завершена ({file_size_mb:.1f} МБ)", "success")
-            self.finished_signal.emit(file_path, True)
-            
-        except Exception as e:
-            self.log_signal.emit(f"Ошибка загрузки: {str(e)}", "error")
-            self.finished_signal.emit("", False)
+from managers.download_manager import IntegrityError
+from managers.download_queue import (get_download_queue, PRIORITY_PROGRAM, STATUS_DOWNLOADING,
+                                     STATUS_INSTALLING, STATUS_TEXT)
+from managers.installer_manager import InstallerManager
+from managers.profile_manager import ProfileManager
+from managers.zip_extract import extract_zip
+from managers.program_catalog import get_program_catalog, is_installer
+from managers.install_supervisor import get_install_supervisor, INSTALL_WAIT_TIMEOUT
+from ui.tabs.plugins_tab import PluginDownloader
 
 class InstallerTab(QWidget):
     log_signal = pyqtSignal(str, str)
+    installed_states_loaded = pyqtSignal(dict)
+    catalog_updated = pyqtSignal()
     
     def __init__(self):
         super().__init__()
-        self.all_programs = {
-            "7zip": {
-                "name": "7-Zip",
-                "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/7z2500-x64.exe",
-                "filename": "7z2500-x64.exe"
-            },
-            "advanced_ip_scanner": {
-                "name": "Advanced IP Scanner",
-                "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/Advanced_IP_Scanner_2.5.4594.1.exe",
-                "filename": "Advanced_IP_Scanner_2.5.4594.1.exe"
-            },
-            "anydesk": {
-                "name": "AnyDesk",
-                "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/AnyDesk.exe",
-                "filename": "AnyDesk.exe"
-            },
-            "assistant": {
-                "name": "Ассистент",
-                "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/assistant_install_6.exe",
-                "filename": "assistant_install_6.exe"
-            },
-            "com_port_checker": {
-                "name": "Com Port Checker",
-                "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/ComPortChecker.1.1.zip",
-                "filename": "ComPortChecker.1.1.zip",
-                "is_zip": True
-            },
-            "database_net": {
-                "name": "Database Net",
-                "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/DatabaseNet5Pro.zip",
-                "filename": "DatabaseNet5Pro.zip",
-                "is_zip": True
-            },
-            "notepad_plus": {
-                "name": "Notepad++",
-                "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/npp.8.8.2.Installer.x64.exe",
-                "filename": "npp.8.8.2.Installer.x64.exe"
-            },
-            "printer_test": {
-                "name": "Printer TEST V3.1C",
-                "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/Printer-TEST-V3.1C.zip",
-                "filename": "Printer-TEST-V3.1C.zip",
-                "is_zip": True
-            },
-            "rhelper": {
-                "name": "Rhelper",
-                "url": "https://github.com/Feuda1/Programs-for-Bobrik/releases/download/v1.0.0/remote-access-setup.exe",
-                "filename": "remote-access-setup.exe"
-            },
-            "ordercheck": {
-                "name": "OrderCheck",
-                "url": "https://clearbat.iiko.online/downloads/OrderCheck.exe",
-                "filename": "OrderCheck.exe"
-            },
-            "clear_bat": {
-                "name": "CLEAR.bat",
-                "url": "https://clearbat.iiko.online/downloads/CLEAR.bat.exe",
-                "filename": "CLEAR.bat.exe"
-            },
-            "iikotools": {
-                "name": "iikoTools",
-                "url": "https://fronttools.iiko.it/FrontTools.exe",
-                "filename": "FrontTools.exe"
-            },
-            "iikotools_sqlite": {
-                "name": "iikoTools SQLite",
-                "url": "https://fronttools.iiko.it/fronttools_sqlite.zip",
-                "filename": "fronttools_sqlite.zip",
-                "is_zip": True
-            }
-        }
+        # Каталог общий с InstallerManager; читается при первом открытии вкладки
+        self.catalog = get_program_catalog()
+        self.catalog_loaded = False
+        self.catalog_updated.connect(self.on_catalog_updated)
+        
+        # program_key -> id задания в очереди загрузок
+        self.program_jobs = {}
+        self.program_buttons = {}
+        # program_key -> (version, uninstall_string, display_name) или None
+        self.installed_states = {}
+        self.installed_states_loaded.connect(self.on_installed_states_loaded)
+        
+        self.download_queue = get_download_queue()
+        self.download_queue.job_updated.connect(self.on_job_updated)
+        self.download_queue.job_finished.connect(self.on_job_finished)
+        
+        # Профили новой кассы ставят программы без вопросов, с тихой установкой
+        self.installer_manager = InstallerManager(self)
+        self.installer_manager.log_signal.connect(self.log_signal.emit)
+        self.profile_manager = ProfileManager(self.installer_manager, self.install_profile_plugin)
+        self.profile_manager.log_signal.connect(self.log_signal.emit)
+        self.profile_manager.profile_finished.connect(self.on_profile_finished)
         
-        self.download_worker = None
         self.init_ui()
         
+    def showEvent(self, event):
+        """При первом открытии вкладки строит кнопки по каталогу и сверяет его с опубликованным"""
+        super().showEvent(event)
+        if self.catalog_loaded:
+            return
+        self.catalog_loaded = True
+        self.create_program_buttons()
+        # Реестр читается в фоне, кнопки получают отметки по готовности
+        self.refresh_installed_states()
+        if HAS_REQUESTS:
+            threading.Thread(target=self._revalidate_catalog, daemon=True).start()
+        
+    def _revalidate_catalog(self):
+        try:
+            if self.catalog.revalidate():
+                self.log_signal.emit(f"Каталог программ обновлен (версия {self.catalog.version})", "info")
+                self.catalog_updated.emit()
+        except Exception as e:
+            self.log_signal.emit(f"Не удалось проверить каталог программ: {str(e)}", "warning")
+        
+    def on_catalog_updated(self):
+        self.create_program_buttons()
+        self.refresh_installed_states()
+        
     def init_ui(self):
         layout = QVBoxLayout(self)
         layout.setContentsMargins(15, 15, 15, 15)
@@ -184,6 +119,58 @@ class InstallerTab(QWidget):
         """)
         header_layout.addWidget(self.search_edit)
         
+        # Профили новой кассы
+        profile_layout = QHBoxLayout()
+        
+        self.profile_combo = QComboBox()
+        self.profile_combo.setFixedHeight(35)
+        self.profile_combo.addItems(list(self.profile_manager.load_profiles().keys()))
+        self.profile_combo.setStyleSheet("""
+            QComboBox {
+                background-color: #1a1a1a;
+                border: 1px solid #2a2a2a;
+                border-radius: 6px;
+                padding: 6px 12px;
+                color: #e0e0e0;
+                font-size: 13px;
+            }
+            QComboBox QAbstractItemView {
+                background-color: #1a1a1a;
+                color: #e0e0e0;
+                selection-background-color: #1e40af;
+            }
+        """)
+        profile_layout.addWidget(self.profile_combo, 1)
+        
+        self.profile_button = QPushButton("▶ Установить профиль")
+        self.profile_button.setFixedSize(170, 35)
+        self.profile_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.profile_button.clicked.connect(self.run_profile)
+        self.profile_button.setStyleSheet("""
+            QPushButton {
+                background-color: #065f46;
+                border: 1px solid #10b981;
+                border-radius: 6px;
+                color: #10b981;
+                font-size: 12px;
+                font-weight: 600;
+                padding: 6px 12px;
+            }
+            QPushButton:hover {
+                background-color: #047857;
+                border-color: #34d399;
+                color: #34d399;
+            }
+            QPushButton:disabled {
+                background-color: #1a1a1a;
+                border-color: #2a2a2a;
+                color: #606060;
+            }
+        """)
+        profile_layout.addWidget(self.profile_button)
+        
+        header_layout.addLayout(profile_layout)
+        
         layout.addLayout(header_layout)
         
         # Скроллируемая область с программами
@@ -217,13 +204,12 @@ class InstallerTab(QWidget):
         self.programs_layout.setContentsMargins(10, 10, 10, 10)
         self.programs_layout.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
         
-        self.create_program_buttons()
-        
         scroll_area.setWidget(self.content_widget)
         layout.addWidget(scroll_area)
         
     def create_program_buttons(self):
         # Очищаем старые кнопки
+        self.program_buttons = {}
         for i in reversed(range(self.programs_layout.count())):
             child = self.programs_layout.itemAt(i).widget()
             if child:
@@ -233,7 +219,7 @@ class InstallerTab(QWidget):
         search_text = self.search_edit.text().lower() if hasattr(self, 'search_edit') else ""
         filtered_programs = {}
         
-        for key, program in self.all_programs.items():
+        for key, program in self.catalog.programs.items():
             if search_text == "" or search_text in program["name"].lower():
                 filtered_programs[key] = program
         
@@ -273,6 +259,8 @@ class InstallerTab(QWidget):
         button.setFixedSize(140, 50)
         button.setCursor(Qt.CursorShape.PointingHandCursor)
         button.clicked.connect(lambda: self.install_program(program_key))
+        self.program_buttons[program_key] = button
+        self.update_button_state(program_key)
         
         # Специальный стиль для CLEAR.bat
         if program_key == "clear_bat":
@@ -343,15 +331,28 @@ class InstallerTab(QWidget):
         return button
         
     def install_program(self, program_key):
-        if program_key not in self.all_programs:
+        program = self.catalog.get(program_key)
+        if program is None:
             self.log_signal.emit(f"Программа {program_key} не найдена", "error")
             return
-            
-        program = self.all_programs[program_key]
+        
+        job = self.download_queue.get_job(self.program_jobs.get(program_key, 0))
+        if job and job.is_active:
+            self.offer_cancel(program, job)
+            return
         
         msg = QMessageBox(self)
         msg.setWindowTitle('Установка программы')
-        msg.setText(f'Начать загрузку и установку {program["name"]}?')
+        # Реестр здесь не читается (поток интерфейса): состояние приходит из
+        # фоновой проверки, до нее - последнее известное из общего кэша
+        installed = self.installed_states.get(program_key)
+        if installed is None:
+            _, installed = self.installer_manager.installed_states.get(program_key)
+        if installed:
+            version = f" (версия {installed[0]})" if installed[0] else ""
+            msg.setText(f'{program["name"]}{version} уже установлена в системе.\n\nПереустановить?')
+        else:
+            msg.setText(f'Начать загрузку и установку {program["name"]}?')
         msg.setIcon(QMessageBox.Icon.Question)
         
         yes_button = msg.addButton('Да', QMessageBox.ButtonRole.YesRole)
@@ -361,61 +362,173 @@ class InstallerTab(QWidget):
         msg.exec()
         
         if msg.clickedButton() == yes_button:
-            self.download_and_install(program)
+            self.download_and_install(program, program_key)
         
-    def download_and_install(self, program):
+    def download_and_install(self, program, program_key):
         if not HAS_REQUESTS:
             self.log_signal.emit("Для загрузки программ требуется библиотека requests", "error")
             self.log_signal.emit("Установите: pip install requests", "info")
             return
             
-        self.log_signal.emit(f"Начинаем загрузку {program['name']}...", "info")
+        self.log_signal.emit(f"{program['name']} добавлена в очередь загрузки", "info")
         
-        self.download_worker = DownloadWorker(program["url"], program["filename"])
-        self.download_worker.log_signal.connect(self.log_signal.emit)
-        self.download_worker.finished_signal.connect(lambda path, success: self.on_download_finished(path, success, program))
-        self.download_worker.start()
+        file_path = os.path.join(tempfile.gettempdir(), program["filename"])
+        # Настоящие установщики запускаются строго по одному (то же правило,
+        # что и в профилях); архивы и утилиты вроде FrontTools или AnyDesk открываются сразу
+        job = self.download_queue.submit(
+            program["name"], program["url"], file_path,
+            priority=PRIORITY_PROGRAM,
+            on_downloaded=lambda job, path: self.on_download_finished(job, path, program),
+            exclusive=is_installer(program),
+            size_hint=program.get("size", 0),
+            segments=program.get("segments", 1),
+            expected_sha256=program.get("sha256"),
+        )
+        self.program_jobs[program_key] = job.job_id
+        self.update_button_state(program_key)
         
-    def on_download_finished(self, file_path, success, program):
-        if not success:
+    def run_profile(self):
+        """Устанавливает все программы и плагины выбранного профиля"""
+        profile_name = self.profile_combo.currentText()
+        if not profile_name:
             return
-            
-        try:
-            if program.get("is_zip", False):
-                self.handle_zip_file(file_path, program)
+        if not HAS_REQUESTS:
+            self.log_signal.emit("Для загрузки программ требуется библиотека requests", "error")
+            return
+        
+        profile = self.profile_manager.load_profiles().get(profile_name, {})
+        names = [self.installer_manager.programs[key]["name"] for key in profile.get("programs", [])
+                 if key in self.installer_manager.programs]
+        names += [plugin["name"] for plugin in profile.get("plugins", [])]
+        
+        msg = QMessageBox(self)
+        msg.setWindowTitle('Установка профиля')
+        msg.setText(f'Установить профиль "{profile_name}"?\n\n' + "\n".join(names))
+        msg.setIcon(QMessageBox.Icon.Question)
+        
+        yes_button = msg.addButton('Да', QMessageBox.ButtonRole.YesRole)
+        no_button = msg.addButton('Нет', QMessageBox.ButtonRole.NoRole)
+        msg.setDefaultButton(no_button)
+        
+        msg.exec()
+        
+        if msg.clickedButton() == yes_button and self.profile_manager.run_profile(profile_name):
+            self.profile_button.setEnabled(False)
+            self.profile_button.setText("⏳ Установка...")
+        
+    def on_profile_finished(self, profile_name, success):
+        self.profile_button.setEnabled(True)
+        self.profile_button.setText("▶ Установить профиль")
+        
+    def install_profile_plugin(self, plugin_name, version_info, path):
+        """Распаковывает плагин, загруженный в рамках профиля (поток очереди)"""
+        downloader = PluginDownloader(plugin_name, version_info)
+        downloader.log_signal.connect(self.log_signal.emit)
+        downloader.install_downloaded(path)
+        
+    def offer_cancel(self, program, job):
+        """Предлагает отменить задание, которое уже в очереди"""
+        msg = QMessageBox(self)
+        msg.setWindowTitle('Программа в очереди')
+        msg.setText(f'{program["name"]}: {STATUS_TEXT[job.status]}.\n\nОтменить?')
+        msg.setIcon(QMessageBox.Icon.Question)
+        
+        yes_button = msg.addButton('Отменить', QMessageBox.ButtonRole.YesRole)
+        no_button = msg.addButton('Продолжить', QMessageBox.ButtonRole.NoRole)
+        msg.setDefaultButton(no_button)
+        
+        msg.exec()
+        
+        if msg.clickedButton() == yes_button:
+            installing = job.status == STATUS_INSTALLING
+            if self.download_queue.cancel(job.job_id):
+                if installing:
+                    self.log_signal.emit(f"{program['name']}: ожидание установщика прекращено, он продолжает работу", "info")
+                else:
+                    self.log_signal.emit(f"Загрузка {program['name']} отменена", "info")
             else:
-                self.handle_executable(file_path, program)
+                self.log_signal.emit(f"{program['name']} уже устанавливается, отмена невозможна", "warning")
+        
+    def update_button_state(self, program_key):
+        """Показывает на кнопке состояние задания в очереди"""
+        button = self.program_buttons.get(program_key)
+        program = self.catalog.get(program_key)
+        if button is None or program is None:
+            return
+        name = program["name"]
+        job = self.download_queue.get_job(self.program_jobs.get(program_key, 0))
+        if job and job.is_active:
+            status = STATUS_TEXT[job.status]
+            if job.status == STATUS_DOWNLOADING:
+                status = f"{status} {job.progress}%"
+            button.setText(f"{name}\n{status}")
+            return
+        installed = self.installed_states.get(program_key)
+        if installed:
+            version, _, display_name = installed
+            button.setText(f"{name}\n✓ {version}" if version else f"{name}\n✓ установлена")
+            button.setToolTip(f"Установлено: {display_name}")
+        else:
+            button.setText(name)
+            button.setToolTip("")
+        
+    def refresh_installed_states(self, program_keys=None):
+        """Пересчитывает в фоне, какие программы уже установлены"""
+        threading.Thread(target=self._load_installed_states, args=(program_keys,), daemon=True).start()
+        
+    def _load_installed_states(self, program_keys):
+        try:
+            self.installed_states_loaded.emit(self.installer_manager.get_installed_states(program_keys))
         except Exception as e:
-            self.log_signal.emit(f"Ошибка обработки файла: {str(e)}", "error")
+            self.log_signal.emit(f"Не удалось проверить установленные программы: {str(e)}", "warning")
+        
+    def on_installed_states_loaded(self, states):
+        self.installed_states.update(states)
+        for program_key in states:
+            self.update_button_state(program_key)
+        
+    def on_job_updated(self, job_id, status, progress):
+        for program_key, program_job_id in self.program_jobs.items():
+            if program_job_id == job_id:
+                self.update_button_state(program_key)
+                break
+        
+    def on_job_finished(self, job_id, success):
+        for program_key, program_job_id in list(self.program_jobs.items()):
+            if program_job_id == job_id:
+                job = self.download_queue.get_job(job_id)
+                if job and isinstance(job.error, IntegrityError):
+                    self.log_signal.emit(f"{job.name}: файл поврежден, установка отменена", "error")
+                del self.program_jobs[program_key]
+                self.update_button_state(program_key)
+                # Установщик завершился - версия могла измениться
+                self.installer_manager.installed_states.invalidate(program_key)
+                self.refresh_installed_states([program_key])
+                break
+        
+    def on_download_finished(self, job, file_path, program):
+        """Обрабатывает загруженный файл (выполняется в потоке очереди)"""
+        if job.from_cache:
+            self.log_signal.emit(f"{program['name']}: файл не изменился, используется копия из кэша", "info")
+        file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
+        self.log_signal.emit(f"{program['name']}: загрузка завершена ({file_size_mb:.1f} МБ)", "success")
+        
+        if program.get("is_zip", False):
+            self.handle_zip_file(file_path, program)
+        else:
+            self.handle_executable(file_path, program, job.cancel_event)
             
-    def get_safe_folder_name(self, program_name):
-        """Получает безопасное название папки только на английском"""
-        safe_names = {
-            "Advanced IP Scanner": "Advanced_IP_Scanner",
-            "AnyDesk": "AnyDesk", 
-            "Com Port Checker": "ComPortChecker",
-            "Database Net": "DatabaseNet",
-            "Printer TEST V3.1C": "PrinterTEST",
-            "Ассистент": "Assistant",
-            "Rhelper": "Rhelper",
-            "7-Zip": "7-Zip",
-            "Notepad++": "Notepad_Plus",
-            "OrderCheck": "OrderCheck",
-            "CLEAR.bat": "CLEAR_bat",
-            "iikoTools": "iikoTools",
-            "iikoTools SQLite": "iikoTools_SQLite"
-        }
-        return safe_names.get(program_name, program_name.replace(" ", "_"))
+    def get_safe_folder_name(self, program):
+        """Название папки только на английском (поле folder каталога)"""
+        return program.get("folder") or program["name"].replace(" ", "_")
 
     def handle_zip_file(self, zip_path, program):
         try:
             # Получаем безопасное имя папки
-            safe_name = self.get_safe_folder_name(program['name'])
+            safe_name = self.get_safe_folder_name(program)
             
             # Определяем куда извлекать
-            if program.get("filename") in ["Advanced_IP_Scanner_2.5.4594.1.exe", "AnyDesk.exe", 
-                                         "ComPortChecker.1.1.zip", "DatabaseNet5Pro.zip", 
-                                         "Printer-TEST-V3.1C.zip", "fronttools_sqlite.zip"]:
+            if program.get("location") == "desktop":
                 # На рабочий стол
                 desktop_path = os.path.join(os.path.expanduser("~"), "Desktop")
                 extract_dir = os.path.join(desktop_path, safe_name)
@@ -432,29 +545,9 @@ class InstallerTab(QWidget):
             os.makedirs(extract_dir)
             
             # Извлекаем с правильной кодировкой для русских названий
-            try:
-                # Пробуем сначала UTF-8
-                with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                    for member in zip_ref.infolist():
-                        # Исправляем кодировку имени файла
-                        try:
-                            # Пробуем декодировать как cp866 (DOS кодировка)
-                            member.filename = member.filename.encode('cp437').decode('cp866')
-                        except:
-                            try:
-                                # Пробуем декодировать как windows-1251
-                                member.filename = member.filename.encode('cp437').decode('windows-1251')
-                            except:
-                                # Оставляем как есть, если не удалось декодировать
-                                pass
-                        
-                        zip_ref.extract(member, extract_dir)
-                        
-            except Exception as encoding_error:
-                # Если не получилось с кодировкой, извлекаем обычным способом
-                self.log_signal.emit(f"Предупреждение: возможны проблемы с кодировкой файлов", "warning")
-                with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                    zip_ref.extractall(extract_dir)
+            result = extract_zip(zip_path, extract_dir, name_decoder=self.decode_member_name)
+            if result.failed:
+                self.log_signal.emit(f"Не удалось извлечь {len(result.failed)} файлов", "warning")
             
             subprocess.Popen(['explorer', extract_dir])
             self.log_signal.emit(f"{program['name']} извлечен {location_msg} ({safe_name})", "success")
@@ -467,11 +560,24 @@ class InstallerTab(QWidget):
         except Exception as e:
             self.log_signal.emit(f"Ошибка при работе с архивом: {str(e)}", "error")
             
-    def handle_executable(self, exe_path, program):
+    @staticmethod
+    def decode_member_name(member):
+        """Имя файла архива в кодировке cp866/windows-1251 (архивы из русской Windows)"""
+        try:
+            # Пробуем декодировать как cp866 (DOS кодировка)
+            return member.filename.encode('cp437').decode('cp866')
+        except Exception:
+            try:
+                # Пробуем декодировать как windows-1251
+                return member.filename.encode('cp437').decode('windows-1251')
+            except Exception:
+                # Оставляем как есть, если не удалось декодировать
+                return member.filename
+            
+    def handle_executable(self, exe_path, program, cancel_event=None):
         try:
             # Определяем куда сохранять exe файлы
-            if program.get("filename") in ["Advanced_IP_Scanner_2.5.4594.1.exe", "AnyDesk.exe", 
-                                         "OrderCheck.exe", "CLEAR.bat.exe", "FrontTools.exe"]:
+            if program.get("location") == "desktop":
                 # На рабочий стол
                 desktop_path = os.path.join(os.path.expanduser("~"), "Desktop")
                 final_path = os.path.join(desktop_path, program["filename"])
@@ -489,13 +595,29 @@ class InstallerTab(QWidget):
             except:
                 final_path = exe_path  # Если не удалось скопировать, запускаем оригинал
             
+            if not is_installer(program):
+                # Утилита, а не установщик: запускаем и не ждем
+                subprocess.Popen([final_path])
+                self.log_signal.emit(f"{program['name']} запущен", "success")
+                if program.get("notice"):
+                    self.log_signal.emit(program["notice"], "warning")
+                return
+            
             self.log_signal.emit(f"Запуск установщика {program['name']}...", "info")
-            subprocess.Popen([final_path])
+            process = subprocess.Popen([final_path])
+            watch = get_install_supervisor().watch(program['name'], process)
             self.log_signal.emit(f"{program['name']} - установщик запущен", "success")
             
             # Специальные сообщения для некоторых программ
-            if program.get("filename") == "remote-access-setup.exe":
-                self.log_signal.emit("🔑 Пароль для Rhelper: remote-access-setup", "warning")
+            if program.get("notice"):
+                self.log_signal.emit(program["notice"], "warning")
+            
+            # Следующий установщик из очереди запустится, когда завершатся
+            # этот установщик и все запущенные им процессы (или ожидание отменят)
+            if watch.wait(INSTALL_WAIT_TIMEOUT, cancel_event) and not watch.expired:
+                self.log_signal.emit(f"{program['name']}: установщик завершил работу ({watch.duration:.0f} с)", "info")
+            elif not (cancel_event and cancel_event.is_set()):
+                self.log_signal.emit(f"Установка {program['name']} занимает больше времени чем ожидалось", "info")
                 
         except Exception as e:
             self.log_signal.emit(f"Ошибка запуска установщика: {str(e)}", "error")
\ No newline at end of file
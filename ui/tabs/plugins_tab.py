@@ -13,11 +13,15 @@ from urllib.parse import urljoin, unquote
 
 try:
     import requests
-    from bs4 import BeautifulSoup
     HAS_REQUIREMENTS = True
 except ImportError:
     HAS_REQUIREMENTS = False
 
+from config import PLUGINS_CONFIG
+from managers.plugin_index import (fetch_plugin_versions, fetch_all_plugin_versions,
+                                   get_plugin_index_cache)
+from managers.plugin_versions import find_compatible_version, get_iiko_front_version
+
 class PluginParser(QThread):
     plugin_found = pyqtSignal(str, list)  # name, versions (убираем description)
     parsing_finished = pyqtSignal()
@@ -29,56 +33,34 @@ class PluginParser(QThread):
         
     def run(self):
         if not HAS_REQUIREMENTS:
-            self.log_signal.emit("Требуются библиотеки: pip install requests beautifulsoup4", "error")
+            self.log_signal.emit("Требуется библиотека: pip install requests", "error")
             return
             
-        for plugin_name, plugin_url in self.plugins_config.items():
-            try:
-                self.log_signal.emit(f"Парсинг {plugin_name}...", "info")
-                versions = self.parse_plugin_versions(plugin_url)
+        self.log_signal.emit(f"Парсинг {len(self.plugins_config)} плагинов...", "info")
+        # Страницы загружаются параллельно, плагины появляются по мере готовности
+        # Сигнал plugin_found - только для плагинов, у которых изменился список
+        for plugin_name, versions, changed, error in fetch_all_plugin_versions(self.plugins_config):
+            if error:
                 if versions:
-                    self.plugin_found.emit(plugin_name, versions)
-                    self.log_signal.emit(f"Найдено {len(versions)} версий для {plugin_name}", "success")
+                    self.log_signal.emit(
+                        f"{plugin_name}: нет связи с сайтом, показан сохраненный список", "warning"
+                    )
                 else:
-                    self.log_signal.emit(f"Версии не найдены для {plugin_name}", "warning")
-            except Exception as e:
-                self.log_signal.emit(f"Ошибка парсинга {plugin_name}: {str(e)}", "error")
+                    self.log_signal.emit(f"Ошибка парсинга {plugin_name}: {str(error)}", "error")
+            elif changed and versions:
+                self.plugin_found.emit(plugin_name, versions)
+                self.log_signal.emit(f"Найдено {len(versions)} версий для {plugin_name}", "success")
+            elif versions:
+                continue
+            else:
+                self.log_signal.emit(f"Версии не найдены для {plugin_name}", "warning")
                 
         self.parsing_finished.emit()
         
     def parse_plugin_versions(self, plugin_url):
         """Парсит доступные версии плагина"""
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
-            response = requests.get(plugin_url, headers=headers, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            versions = []
-            
-            # Ищем ссылки на архивы (.zip)
-            for link in soup.find_all('a', href=True):
-                href = link['href']
-                if href.endswith('.zip'):
-                    # Получаем полную ссылку
-                    full_url = urljoin(plugin_url, href)
-                    # Извлекаем название версии из имени файла
-                    filename = unquote(os.path.basename(href))
-                    version_name = filename.replace('.zip', '')
-                    
-                    versions.append({
-                        'name': version_name,
-                        'url': full_url,
-                        'filename': filename
-                    })
-            
-            # Сортируем версии (новые сверху)
-            versions.sort(key=lambda x: x['name'], reverse=True)
-            return versions
-            
+            return fetch_plugin_versions(plugin_url)
         except Exception as e:
             raise Exception(f"Ошибка парсинга: {str(e)}")
 
@@ -88,123 +70,64 @@ import zipfile
 import subprocess
 import tempfile
 import time
-from PyQt6.QtCore import QThread, pyqtSignal
+from PyQt6.QtCore import QObject, pyqtSignal
+from managers.download_queue import get_download_queue, PRIORITY_PLUGIN
+from managers.unblock import unblock_directory
+from managers.zip_extract import StreamingZipExtractor, extract_zip, remove_stale_files
 
-class PluginDownloader(QThread):
+class PluginDownloader(QObject):
+    """Распаковывает плагин, загруженный общей очередью загрузок"""
     log_signal = pyqtSignal(str, str)
-    progress_signal = pyqtSignal(int)
     finished_signal = pyqtSignal(str, bool)  # path, success
     
     def __init__(self, plugin_name, version_info):
         super().__init__()
         self.plugin_name = plugin_name
         self.version_info = version_info
+        self.stream = None
         
-    def run(self):
-        try:
-            try:
-                import requests
-            except ImportError:
-                self.log_signal.emit("Требуются библиотеки requests и beautifulsoup4", "error")
-                self.finished_signal.emit("", False)
-                return
-                
-            downloads_path = os.path.join(os.path.expanduser("~"), "Downloads")
-            file_path = os.path.join(downloads_path, self.version_info['filename'])
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
-            self.log_signal.emit(f"Загрузка {self.plugin_name} {self.version_info['name']}...", "info")
-            
-            response = requests.get(self.version_info['url'], stream=True, headers=headers, timeout=60)
-            response.raise_for_status()
-            
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-            last_progress = 0
-            
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        if total_size > 0:
-                            progress = min(90, int((downloaded / total_size) * 90))
-                            if progress >= last_progress + 10:
-                                self.progress_signal.emit(progress)
-                                last_progress = progress
-            
-            self.progress_signal.emit(100)
-            file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
-            self.log_signal.emit(f"Загрузка завершена ({file_size_mb:.1f} МБ)", "success")
-            
-            # Разархивируем
-            self.extract_plugin(file_path)
-            
-            self.finished_signal.emit(file_path, True)
-            
-        except Exception as e:
-            self.log_signal.emit(f"Ошибка загрузки: {str(e)}", "error")
-            self.finished_signal.emit("", False)
+    def get_extract_dir(self):
+        downloads_path = os.path.join(os.path.expanduser("~"), "Downloads")
+        return os.path.join(downloads_path, f"{self.plugin_name}_{self.version_info['name']}")
+        
+    def start_streaming(self):
+        """Включает распаковку во время загрузки; возвращает chunk_callback для download_file"""
+        self.stream = StreamingZipExtractor(self.get_extract_dir(), prepare=self._prepare_extract_dir,
+                                            skip_unchanged=True)
+        return self.stream.feed
+        
+    def abort_streaming(self):
+        if self.stream:
+            self.stream.abort()
+        
+    def install_downloaded(self, file_path):
+        """Распаковывает загруженный архив плагина (вызывается из потока очереди)"""
+        file_size_mb = os.path.getsize(file_path) / (1024 * 1024)
+        self.log_signal.emit(f"Загрузка завершена ({file_size_mb:.1f} МБ)", "success")
+        
+        # Разархивируем
+        self.extract_plugin(file_path)
+        
+        self.finished_signal.emit(file_path, True)
     
     def extract_plugin(self, zip_path):
         """Извлекает плагин с улучшенной обработкой заблокированных файлов"""
         try:
-            downloads_path = os.path.join(os.path.expanduser("~"), "Downloads")
-            extract_dir = os.path.join(downloads_path, f"{self.plugin_name}_{self.version_info['name']}")
-            
-            # Удаляем старую папку если существует
-            if os.path.exists(extract_dir):
-                self.log_signal.emit("Удаляем старую папку плагина...", "info")
-                self._force_remove_directory(extract_dir)
-            
-            # Создаем новую папку
-            os.makedirs(extract_dir, exist_ok=True)
+            extract_dir = self.get_extract_dir()
             
-            # Извлекаем архив с обработкой ошибок
-            self.log_signal.emit("Извлечение архива...", "info")
-            extracted_files = 0
-            failed_files = []
-            
-            try:
-                with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                    file_list = zip_ref.infolist()
-                    
-                    for file_info in file_list:
-                        try:
-                            # Извлекаем файл
-                            zip_ref.extract(file_info, extract_dir)
-                            extracted_files += 1
-                            
-                        except Exception as extract_error:
-                            # Если не удалось извлечь файл, пробуем альтернативный способ
-                            failed_files.append(file_info.filename)
-                            self.log_signal.emit(f"Проблема с файлом {file_info.filename}, пробуем альтернативный способ...", "warning")
-                            
-                            try:
-                                # Альтернативный способ - читаем и записываем вручную
-                                file_data = zip_ref.read(file_info.filename)
-                                file_path = os.path.join(extract_dir, file_info.filename)
-                                
-                                # Создаем директорию если нужно
-                                os.makedirs(os.path.dirname(file_path), exist_ok=True)
-                                
-                                # Записываем файл с несколькими попытками
-                                self._write_file_with_retry(file_path, file_data)
-                                extracted_files += 1
-                                failed_files.remove(file_info.filename)
-                                
-                            except Exception as retry_error:
-                                self.log_signal.emit(f"Не удалось извлечь {file_info.filename}: {str(retry_error)}", "warning")
-                        
-            except zipfile.BadZipFile:
-                self.log_signal.emit("Поврежденный архив", "error")
-                return
-            except Exception as e:
-                self.log_signal.emit(f"Ошибка при чтении архива: {str(e)}", "error")
-                return
+            result = None
+            prepared = False
+            if self.stream:
+                # Поток без данных (файл из кэша) уже подготовил папку
+                prepared = not self.stream.received
+                result = self._finish_streaming(zip_path)
+            if result is None:
+                if not prepared:
+                    self._prepare_extract_dir()
+                result = self._extract_archive(zip_path, extract_dir)
+                if result is None:
+                    return
+            extracted_files, failed_files = result
             
             # Результаты извлечения
             if extracted_files > 0:
@@ -239,73 +162,71 @@ class PluginDownloader(QThread):
         except Exception as e:
             self.log_signal.emit(f"Ошибка извлечения: {str(e)}", "error")
     
-    def _force_remove_directory(self, directory_path):
-        """Принудительно удаляет директорию с несколькими попытками"""
-        max_attempts = 3
-        
-        for attempt in range(max_attempts):
-            try:
-                if os.path.exists(directory_path):
-                    # Сначала пробуем обычное удаление
-                    shutil.rmtree(directory_path)
-                    return
-            except (PermissionError, OSError) as e:
-                if attempt < max_attempts - 1:
-                    self.log_signal.emit(f"Попытка {attempt + 1}: не удалось удалить папку, повторяем...", "warning")
-                    time.sleep(1)
-                    
-                    # Пробуем снять атрибуты только для чтения
-                    try:
-                        for root, dirs, files in os.walk(directory_path):
-                            for file in files:
-                                file_path = os.path.join(root, file)
-                                try:
-                                    os.chmod(file_path, 0o777)
-                                except:
-                                    pass
-                    except:
-                        pass
-                else:
-                    # Если все попытки неудачны, переименовываем папку
-                    try:
-                        temp_name = f"{directory_path}_old_{int(time.time())}"
-                        os.rename(directory_path, temp_name)
-                        self.log_signal.emit(f"Папка переименована в {os.path.basename(temp_name)}", "warning")
-                    except:
-                        self.log_signal.emit("Не удалось удалить старую папку, продолжаем...", "warning")
+    def _prepare_extract_dir(self):
+        """Создает папку плагина (старая не удаляется - файлы обновляются по месту)"""
+        extract_dir = self.get_extract_dir()
+        if os.path.exists(extract_dir):
+            self.log_signal.emit("Папка плагина уже есть, обновляются только изменившиеся файлы", "info")
+        os.makedirs(extract_dir, exist_ok=True)
     
-    def _write_file_with_retry(self, file_path, data, max_attempts=3):
-        """Записывает файл с несколькими попытками"""
-        for attempt in range(max_attempts):
-            try:
-                with open(file_path, 'wb') as f:
-                    f.write(data)
-                return
-            except (PermissionError, OSError) as e:
-                if attempt < max_attempts - 1:
-                    time.sleep(0.5)  # Небольшая пауза
-                else:
-                    raise e
+    def _log_incremental(self, unchanged, removed):
+        if unchanged:
+            self.log_signal.emit(f"Без изменений: {unchanged} файлов", "info")
+        if removed:
+            self.log_signal.emit(f"Удалено устаревших файлов: {removed}", "info")
+    
+    def _finish_streaming(self, zip_path):
+        """Результат распаковки во время загрузки: (извлечено, []) или None"""
+        stream, self.stream = self.stream, None
+        if not stream.finish():
+            # Файл взят из кэша - данные в поток не передавались, это не ошибка
+            if stream.received:
+                self.log_signal.emit(f"Распаковка во время загрузки не удалась: {stream.error}", "warning")
+            return None
+        
+        # Проверяем по центральному каталогу, что извлечены все файлы архива
+        try:
+            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+                expected = {info.filename for info in zip_ref.infolist() if not info.is_dir()}
+        except zipfile.BadZipFile:
+            return None
+        if expected != set(stream.extracted):
+            self.log_signal.emit("Состав архива не совпал, распаковываем заново", "warning")
+            return None
+        
+        self.log_signal.emit("Архив распакован во время загрузки", "info")
+        removed = remove_stale_files(self.get_extract_dir(), expected)
+        self._log_incremental(stream.unchanged, removed)
+        return len(stream.extracted), []
+    
+    def _extract_archive(self, zip_path, extract_dir):
+        """Распаковывает загруженный архив; возвращает (извлечено, не извлечены) или None"""
+        self.log_signal.emit("Извлечение архива...", "info")
+        
+        try:
+            # Файлы с тем же размером и CRC-32 уже на месте - не перезаписываем
+            result = extract_zip(zip_path, extract_dir, skip_unchanged=True, remove_stale=True)
+        except zipfile.BadZipFile:
+            self.log_signal.emit("Поврежденный архив", "error")
+            return None
+        except Exception as e:
+            self.log_signal.emit(f"Ошибка при чтении архива: {str(e)}", "error")
+            return None
+        
+        for name, error in result.failed[:5]:
+            self.log_signal.emit(f"Не удалось извлечь {name}: {str(error)}", "warning")
+        self._log_incremental(result.unchanged, result.removed)
+        return result.extracted + result.unchanged, [name for name, _ in result.failed]
     
     def unblock_files(self, directory):
         """Снимает блокировку Windows с файлов"""
         try:
-            unblocked_count = 0
-            
-            for root, dirs, files in os.walk(directory):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    try:
-                        # Снимаем атрибут блокировки через PowerShell
-                        cmd = f'powershell -Command "Unblock-File -Path \'{file_path}\' -ErrorAction SilentlyContinue"'
-                        result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=30)
-                        if result.returncode == 0:
-                            unblocked_count += 1
-                    except Exception:
-                        continue
+            unblocked_count, used_powershell = unblock_directory(directory)
             
             if unblocked_count > 0:
                 self.log_signal.emit(f"Снята блокировка с {unblocked_count} файлов", "success")
+            if used_powershell:
+                self.log_signal.emit("Блокировка снята через PowerShell для всей папки", "info")
             
         except Exception as e:
             self.log_signal.emit(f"Ошибка снятия блокировки: {str(e)}", "warning")
@@ -317,20 +238,40 @@ class PluginsTab(QWidget):
         super().__init__()
         
         # Конфигурация плагинов
-        self.plugins_config = {
-            'AlcoholMarkingPlugin': 'https://rapid.iiko.ru/plugins/AlcoholMarkingPlugin/',
-            'OnlineMarkingVerification': 'https://rapid.iiko.ru/plugins/Resto%20OnlineMarkingVerification/',
-            'Sberbank': 'https://rapid.iiko.ru/plugins/Smart%20Sberbank/',
-            'DualConnector': 'https://rapid.iiko.ru/plugins/Resto.Front.Api.PaymentSystem.DualConnector/',
-            'Arrivals': 'https://rapid.iiko.ru/plugins/Arrivals/'
-        }
+        self.plugins_config = dict(PLUGINS_CONFIG)
         
         self.plugins_data = {}
+        self.plugin_widgets = {}
+        self.updated_plugins = 0
+        self.index_revalidated = False
+        self.front_version = get_iiko_front_version()
         self.parser = None
-        self.downloader = None
+        self.downloaders = []
+        self.plugin_jobs = {}
         
         self.init_ui()
         
+        self.download_queue = get_download_queue()
+        self.download_queue.job_finished.connect(self.on_plugin_job_finished)
+        
+        self.show_cached_plugins()
+        
+    def showEvent(self, event):
+        """При первом открытии вкладки сверяет сохраненный список с сайтом"""
+        super().showEvent(event)
+        if not self.index_revalidated and HAS_REQUIREMENTS:
+            self.index_revalidated = True
+            self.refresh_plugins_list()
+    
+    def show_cached_plugins(self):
+        """Сразу показывает последние известные версии плагинов"""
+        if not HAS_REQUIREMENTS:
+            return
+        for plugin_name, versions in get_plugin_index_cache().cached_versions(self.plugins_config).items():
+            if versions:
+                self.plugins_data[plugin_name] = {'versions': versions}
+                self.create_plugin_widget(plugin_name, "", versions)
+        
     def init_ui(self):
         layout = QVBoxLayout(self)
         layout.setContentsMargins(15, 15, 15, 15)
@@ -455,33 +396,31 @@ class PluginsTab(QWidget):
     def show_requirements_message(self):
         """Показывает сообщение о необходимых зависимостях"""
         self.status_label.setText("""
-        ⚠️ Для работы с плагинами требуются дополнительные библиотеки:
+        ⚠️ Для работы с плагинами требуется библиотека requests:
         
-        pip install requests beautifulsoup4
+        pip install requests
         
-        Установите их и перезапустите программу.
+        Установите ее и перезапустите программу.
         """)
         self.refresh_button.setEnabled(False)
     
     def refresh_plugins_list(self):
         """Обновляет список доступных плагинов"""
         if not HAS_REQUIREMENTS:
-            self.log_signal.emit("Установите требуемые библиотеки: pip install requests beautifulsoup4", "error")
+            self.log_signal.emit("Установите библиотеку: pip install requests", "error")
+            return
+        
+        if self.parser and self.parser.isRunning():
             return
         
         self.refresh_button.setEnabled(False)
         self.refresh_button.setText("⏳ Загрузка...")
         
-        self.status_label.setText("Загрузка списка плагинов...")
-        self.plugins_data.clear()
+        if not self.plugins_data:
+            self.status_label.setText("Загрузка списка плагинов...")
+        self.updated_plugins = 0
         
-        # Очищаем текущий список
-        for i in reversed(range(self.plugins_layout.count())):
-            child = self.plugins_layout.itemAt(i).widget()
-            if child and child != self.status_label:
-                child.setParent(None)
-        
-        # Запускаем парсер
+        # Показанный список остается, парсер обновит только изменившиеся плагины
         self.parser = PluginParser(self.plugins_config)
         self.parser.plugin_found.connect(self.on_plugin_found)
         self.parser.parsing_finished.connect(self.on_parsing_finished)
@@ -493,7 +432,9 @@ class PluginsTab(QWidget):
         self.plugins_data[plugin_name] = {
             'versions': versions
         }
+        self.updated_plugins += 1
         self.create_plugin_widget(plugin_name, "", versions)  # Пустое описание
+        self.filter_plugins()
     
     def on_parsing_finished(self):
         """Завершение парсинга"""
@@ -502,7 +443,10 @@ class PluginsTab(QWidget):
         
         if self.plugins_data:
             self.status_label.hide()
-            self.log_signal.emit(f"Загружено {len(self.plugins_data)} плагинов", "success")
+            if self.updated_plugins:
+                self.log_signal.emit(f"Обновлено плагинов: {self.updated_plugins}", "success")
+            else:
+                self.log_signal.emit("Список плагинов актуален", "info")
         else:
             self.status_label.setText("Плагины не найдены. Проверьте подключение к интернету.")
     
@@ -541,6 +485,15 @@ class PluginsTab(QWidget):
         for version in versions:
             version_combo.addItem(version['name'], version)
         
+        # Предвыбираем самую новую сборку для установленного iikoFront
+        compatible = find_compatible_version(versions, self.front_version)
+        if compatible:
+            index = versions.index(compatible)
+            version_combo.setCurrentIndex(index)
+            version_combo.setItemText(index, f"{compatible['name']} ✓")
+            front = '.'.join(str(part) for part in self.front_version)
+            version_combo.setToolTip(f"✓ - подходит для iikoFront {front}")
+        
         version_combo.setStyleSheet("""
             QComboBox {
                 background-color: #2a2a2a;
@@ -608,7 +561,16 @@ class PluginsTab(QWidget):
         if self.status_label.isVisible():
             self.status_label.hide()
         
-        self.plugins_layout.addWidget(plugin_frame)
+        # Изменившийся плагин заменяет свою строку на том же месте
+        old_frame = self.plugin_widgets.get(plugin_name)
+        if old_frame is not None:
+            index = self.plugins_layout.indexOf(old_frame)
+            old_frame.setParent(None)
+            old_frame.deleteLater()
+            self.plugins_layout.insertWidget(index, plugin_frame)
+        else:
+            self.plugins_layout.addWidget(plugin_frame)
+        self.plugin_widgets[plugin_name] = plugin_frame
     
     def filter_plugins(self):
         """Фильтрует плагины по поиску"""
@@ -647,10 +609,34 @@ class PluginsTab(QWidget):
         """Загружает и устанавливает плагин"""
         self.log_signal.emit(f"Начинается установка {plugin_name}...", "info")
         
-        self.downloader = PluginDownloader(plugin_name, version_info)
-        self.downloader.log_signal.connect(self.log_signal.emit)
-        self.downloader.finished_signal.connect(self.on_plugin_installed)
-        self.downloader.start()
+        downloader = PluginDownloader(plugin_name, version_info)
+        downloader.log_signal.connect(self.log_signal.emit)
+        downloader.finished_signal.connect(self.on_plugin_installed)
+        self.downloaders.append(downloader)
+        
+        # Загрузка идет через общую очередь, распаковка - сразу после нее
+        downloads_path = os.path.join(os.path.expanduser("~"), "Downloads")
+        job = get_download_queue().submit(
+            f"{plugin_name} {version_info['name']}",
+            version_info['url'],
+            os.path.join(downloads_path, version_info['filename']),
+            priority=PRIORITY_PLUGIN,
+            on_downloaded=lambda job, path: downloader.install_downloaded(path),
+            # Архив распаковывается по мере загрузки
+            chunk_callback=downloader.start_streaming(),
+        )
+        self.plugin_jobs[job.job_id] = downloader
+    
+    def on_plugin_job_finished(self, job_id, success):
+        """Освобождает загрузчик плагина после завершения задания очереди"""
+        downloader = self.plugin_jobs.pop(job_id, None)
+        if downloader is None:
+            return
+        if downloader in self.downloaders:
+            self.downloaders.remove(downloader)
+        if not success:
+            downloader.abort_streaming()
+            self.on_plugin_installed("", False)
     
     def on_plugin_installed(self, file_path, success):
         """Обрабатывает результат установки плагина"""